@@ -0,0 +1,146 @@
+"""
+Stand-in for the parts of discord.py the bot uses. install() registers this module
+as `discord` so src/server/discord_bot.py can be imported and driven without a gateway.
+Every send/edit is timestamped so the harness can measure reply latency.
+"""
+import asyncio
+import contextvars
+import itertools
+import sys
+import time
+
+# Set by the harness around each on_message call; channel activity is attributed to it
+current_record = contextvars.ContextVar("current_record", default=None)
+
+_ids = itertools.count(10**17)
+
+def install():
+    sys.modules["discord"] = sys.modules[__name__]
+
+class Intents:
+    @classmethod
+    def default(cls):
+        return cls()
+
+class File:
+    def __init__(self, fp, filename=None):
+        self.fp = fp
+        self.filename = filename
+
+class Embed:
+    def __init__(self, description=None):
+        self.description = description
+        self.image_url = None
+
+    def set_image(self, url):
+        self.image_url = url
+
+class DMChannel:
+    pass
+
+class FakeUser:
+    def __init__(self, name, bot=False):
+        self.id = next(_ids)
+        self.name = name
+        self.display_name = name
+        self.bot = bot
+        self.mention = f"<@{self.id}>"
+
+    def __str__(self):
+        return self.name
+
+class FakeGuild:
+    def get_member(self, user_id):
+        return None
+
+class FakeSentMessage:
+    def __init__(self, channel, content=None, embed=None, file=None):
+        self.id = next(_ids)
+        self.channel = channel
+        self.content = content
+        self.embed = embed
+        self.file = file
+
+    async def edit(self, content=..., embed=None, attachments=None):
+        if content is not ...:
+            self.content = content
+        if embed is not None:
+            self.embed = embed
+        for file in attachments or ():
+            self.channel._upload(file)
+        self.channel._record("edit", len(self.content or "") + len(getattr(self.embed, "description", None) or ""))
+
+    async def delete(self):
+        self.channel._record("delete", 0)
+
+class _Typing:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+class FakeChannel:
+    def __init__(self, channel_id=None):
+        self.id = channel_id or next(_ids)
+        self.guild = FakeGuild()
+        self.sent = []
+        self.events = []
+        self.upload_bytes = 0
+
+    def typing(self):
+        return _Typing()
+
+    def _record(self, kind, size):
+        now = time.perf_counter()
+        self.events.append((now, kind, size))
+        record = current_record.get()
+        if record is not None and record.get("first_output") is None:
+            record["first_output"] = now
+
+    def _upload(self, file):
+        self.upload_bytes += len(file.fp.getbuffer())
+
+    async def send(self, content=None, embed=None, file=None):
+        if file is not None:
+            self._upload(file)
+        message = FakeSentMessage(self, content, embed, file)
+        self.sent.append(message)
+        self._record("send", len(content or "") + len(getattr(embed, "description", None) or ""))
+        return message
+
+class FakeIncomingMessage:
+    def __init__(self, author, channel, content):
+        self.id = next(_ids)
+        self.author = author
+        self.channel = channel
+        self.content = content
+
+class Client:
+    def __init__(self, *args, intents=None, **kwargs):
+        self.intents = intents
+        self.user = FakeUser("DungeonMaster", bot=True)
+        self.channels = {}
+        self.closed = False
+
+    def event(self, coro):
+        setattr(self, coro.__name__, coro)
+        return coro
+
+    def add_channel(self, channel):
+        self.channels[channel.id] = channel
+        return channel
+
+    def get_channel(self, channel_id):
+        return self.channels.get(int(channel_id))
+
+    async def wait_for(self, event, check=None, timeout=None):
+        # Scripted sessions use pre-made characters, so nothing ever waits on DMs
+        await asyncio.sleep(timeout or 3600)
+        raise asyncio.TimeoutError()
+
+    def run(self, token):
+        raise RuntimeError("The fake discord client cannot connect; drive on_message directly.")
+
+    async def close(self):
+        self.closed = True
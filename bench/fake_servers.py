@@ -0,0 +1,167 @@
+"""
+Minimal in-process HTTP/1.1 stand-ins for Ollama (/api/generate) and
+SD WebUI (/sdapi/v1/txt2img) with configurable latency and payload sizes.
+Only the stdlib is used; keep-alive and chunked (streaming) responses are supported.
+"""
+import asyncio
+import base64
+import json
+import os
+import random
+import struct
+import zlib
+
+class FakeHTTPServer:
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self._server = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, value = line.decode("latin-1").split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", "0")))
+                self.requests += 1
+                await self.handle(method, path.split("?", 1)[0], body, writer)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle(self, method, path, body, writer):
+        await self.send_json(writer, {"error": "not found"}, status=404)
+
+    @staticmethod
+    async def send_json(writer, obj, status=200):
+        payload = json.dumps(obj).encode("utf-8")
+        reason = "OK" if status == 200 else "Error"
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: keep-alive\r\n\r\n".encode("latin-1") + payload
+        )
+        await writer.drain()
+
+    @staticmethod
+    async def start_chunked(writer, content_type="application/x-ndjson"):
+        writer.write(
+            f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\n"
+            f"Transfer-Encoding: chunked\r\nConnection: keep-alive\r\n\r\n".encode("latin-1")
+        )
+        await writer.drain()
+
+    @staticmethod
+    async def send_chunk(writer, data: bytes):
+        writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+        await writer.drain()
+
+    @staticmethod
+    async def end_chunked(writer):
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+WORDS = (
+    "neon rain hisses over the corroded walkways while drones sweep the plaza "
+    "a fixer in a mirrored visor watches from the noodle stall and the air smells of ozone"
+).split()
+
+class FakeOllama(FakeHTTPServer):
+    """
+    /api/generate stand-in. Waits first_token_latency, then emits reply_tokens words
+    token_latency apart (as NDJSON when streaming). Replies end with an Exits line.
+    """
+
+    def __init__(self, first_token_latency=0.2, token_latency=0.005, reply_tokens=120, exits=("North Gate", "Market"), **kwargs):
+        super().__init__(**kwargs)
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.reply_tokens = reply_tokens
+        self.exits = list(exits)
+        self.prompt_chars = 0
+        self.context_requests = 0
+
+    def _tokens(self, prompt):
+        rng = random.Random(hash(prompt))
+        tokens = [rng.choice(WORDS) + " " for _ in range(self.reply_tokens)]
+        tokens.append(f"\nExits: {', '.join(self.exits)}")
+        return tokens
+
+    async def handle(self, method, path, body, writer):
+        if method != "POST" or path != "/api/generate":
+            await super().handle(method, path, body, writer)
+            return
+        request = json.loads(body or b"{}")
+        prompt = request.get("prompt", "")
+        self.prompt_chars += len(prompt) + len(request.get("system", ""))
+        if request.get("context"):
+            self.context_requests += 1
+        context = list(request.get("context") or []) + list(range(len(prompt) // 4 + self.reply_tokens))
+        tokens = self._tokens(prompt)
+        await asyncio.sleep(self.first_token_latency)
+        if not request.get("stream", True):
+            await asyncio.sleep(self.token_latency * len(tokens))
+            await self.send_json(writer, {"model": request.get("model"), "response": "".join(tokens), "done": True, "context": context})
+            return
+        await self.start_chunked(writer)
+        for token in tokens:
+            await self.send_chunk(writer, json.dumps({"response": token, "done": False}).encode("utf-8") + b"\n")
+            await asyncio.sleep(self.token_latency)
+        await self.send_chunk(writer, json.dumps({"response": "", "done": True, "context": context}).encode("utf-8") + b"\n")
+        await self.end_chunked(writer)
+
+def make_png(width, height, seed=0):
+    """Valid RGB PNG filled with noise (so it does not compress away)."""
+    rng = random.Random(seed)
+    raw = b"".join(b"\x00" + rng.randbytes(width * 3) for _ in range(height))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw, 1))
+        + chunk(b"IEND", b"")
+    )
+
+class FakeSDWebUI(FakeHTTPServer):
+    """/sdapi/v1/txt2img stand-in returning a noise PNG of image_size x image_size after latency seconds."""
+
+    def __init__(self, latency=1.0, image_size=256, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.image_b64 = base64.b64encode(make_png(image_size, image_size, seed=os.getpid())).decode("ascii")
+
+    async def handle(self, method, path, body, writer):
+        if method != "POST" or path.rstrip("/") != "/sdapi/v1/txt2img":
+            await super().handle(method, path, body, writer)
+            return
+        await asyncio.sleep(self.latency)
+        await self.send_json(writer, {"images": [self.image_b64]})
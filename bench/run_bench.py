@@ -0,0 +1,293 @@
+"""
+Load-test harness for the Discord bot. Runs the real handlers from src/server against
+in-process fakes for Ollama, SD WebUI and Discord, replays a scripted multi-player
+session and reports throughput, reply latency percentiles and disk bytes written.
+
+    python bench/run_bench.py --players 5 --rounds 20
+    python bench/run_bench.py --storage sqlite --no-stream --json
+    python bench/run_bench.py --storage sqlite --workers 2   # split deployment: generation in run_worker.py processes
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(BENCH_DIR.parent / "src" / "server"))
+
+import fake_discord
+fake_discord.install()
+
+from fake_servers import FakeOllama, FakeSDWebUI
+
+PLAYER_ACTIONS = [
+    "I look around for anyone suspicious.",
+    "I ask the vendor about the missing courier.",
+    "I check my cyberdeck for local network traffic.",
+    "I keep watch on the crowd near the fountain.",
+    "I haggle over the price of a stim pack.",
+    "I search the alley for signs of a struggle.",
+    "I listen to the street preacher's sermon.",
+    "I wave down a security drone and ask for directions."
+]
+
+CHANNEL_ID = 424242
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+async def start_workers(count, base_dir, queue_path, sd_url, storage, verbose):
+    """Launch run_worker.py processes against the bench's job queue and fake SD WebUI."""
+    env = dict(os.environ, SD_WEBUI_URL=sd_url)
+    output = None if verbose else asyncio.subprocess.DEVNULL
+    return [
+        await asyncio.create_subprocess_exec(
+            sys.executable, str(BENCH_DIR.parent / "run_worker.py"),
+            "--base-dir", str(base_dir), "--job-queue", str(queue_path), "--storage", storage,
+            env=env, stdout=output, stderr=output
+        )
+        for _ in range(count)
+    ]
+
+async def stop_workers(workers):
+    for proc in workers:
+        if proc.returncode is None:
+            proc.terminate()
+    for proc in workers:
+        await proc.wait()
+
+class DiskWriteMeter:
+    """Bytes written by this process to files: /proc/self/io wchar on Linux, else growth of the data dir."""
+
+    def __init__(self, data_dir):
+        self.data_dir = Path(data_dir)
+        self.method = "proc_io" if Path("/proc/self/io").exists() else "dir_size"
+        self._start = self._read()
+
+    def _read(self):
+        if self.method == "proc_io":
+            with open("/proc/self/io", "r") as f:
+                for line in f:
+                    if line.startswith("wchar:"):
+                        return int(line.split()[1])
+        return sum(p.stat().st_size for p in self.data_dir.rglob("*") if p.is_file())
+
+    def written(self):
+        return self._read() - self._start
+
+async def seed_world(base_dir, players, storage):
+    """Write a started campaign with an active adventure so the session starts in-game."""
+    from room_utils import RoomStore
+    db_dir = base_dir / "db"
+    db_dir.mkdir(parents=True, exist_ok=True)
+    world_state = {
+        "location": "Town Square",
+        "players": [],
+        "description": "Rain-slick plaza under flickering holo-ads.",
+        "image": None
+    }
+    campaign = {
+        "name": "Bench Campaign",
+        "main_story": "A courier has vanished in Verisium.",
+        "adventures": [{"name": "The Missing Courier", "summary": "Find the courier.", "completed": False}],
+        "current_adventure": 0,
+        "world_state": world_state,
+        "campaign_started": True,
+        "state": "adventure_running"
+    }
+    characters = {
+        str(p.id): {"name": p.name, "race_class": "Human Netrunner", "backstory": "Bench player."}
+        for p in players
+    }
+    if storage is not None:
+        import image_utils
+        storage.save_campaign(campaign)
+        storage.save_characters(characters)
+        image_utils.set_image_storage(storage)
+    else:
+        with open(db_dir / "campaign_state.json", "w", encoding="utf-8") as f:
+            json.dump(campaign, f, indent=2)
+        with open(db_dir / "characters.json", "w", encoding="utf-8") as f:
+            json.dump(characters, f, indent=2)
+    rooms = RoomStore(db_dir / "rooms.json", storage)
+    rooms.set("Town Square", {
+        "description": world_state["description"],
+        "image": None,
+        "exits": {"north gate": "North Gate", "market": "Market"}
+    })
+    await rooms.aclose()
+
+def build_script(players, rounds, move_every):
+    """One list of (player, content) per round; every player acts once per round."""
+    script = []
+    for r in range(rounds):
+        turn = []
+        for i, player in enumerate(players):
+            if move_every and (r + 1) % move_every == 0 and i == 0:
+                turn.append((player, "!move North Gate" if r % 2 == 0 else "!move Town Square"))
+            else:
+                turn.append((player, PLAYER_ACTIONS[(r * len(players) + i) % len(PLAYER_ACTIONS)]))
+        script.append(turn)
+    return script
+
+async def drive_message(bot, channel, player, content):
+    record = {"player": player.name, "content": content, "first_output": None, "error": None}
+    message = fake_discord.FakeIncomingMessage(player, channel, content)
+    token = fake_discord.current_record.set(record)
+    record["start"] = time.perf_counter()
+    try:
+        await bot.on_message(message)
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        record["end"] = time.perf_counter()
+        fake_discord.current_record.reset(token)
+    return record
+
+async def run(args):
+    base_dir = Path(args.base_dir) if args.base_dir else Path(tempfile.mkdtemp(prefix="llm-coop-bench-"))
+    ollama = await FakeOllama(
+        first_token_latency=args.llm_first_token,
+        token_latency=args.llm_token_latency,
+        reply_tokens=args.reply_tokens
+    ).start()
+    sd = await FakeSDWebUI(latency=args.sd_latency, image_size=args.image_size).start()
+
+    import image_utils
+    image_utils.SD_WEBUI_ENDPOINTS = [f"{sd.url}/sdapi/v1/txt2img"]
+    import discord_bot
+
+    players = [fake_discord.FakeUser(f"player{i + 1}") for i in range(args.players)]
+    storage = None
+    if args.storage == "sqlite":
+        from storage import SQLiteStorage
+        storage = SQLiteStorage(base_dir / "db" / "game.sqlite3")
+    await seed_world(base_dir, players, storage)
+    queue_path = base_dir / "db" / "jobs.sqlite3" if args.workers else None
+    workers = await start_workers(args.workers, base_dir, queue_path, sd.url, args.storage, args.verbose) if args.workers else []
+
+    bot = discord_bot.setup_bot(
+        discord_channel=str(CHANNEL_ID),
+        base_dir=base_dir,
+        ollama_host=ollama.url,
+        ollama_model="bench-model",
+        storage=storage,
+        stream_responses=not args.no_stream,
+        stream_edit_interval=args.stream_edit_interval,
+        llm_max_concurrency=args.llm_max_concurrency,
+        coalesce_window=args.coalesce_window,
+        prefetch_rooms=args.prefetch_rooms,
+        job_queue=queue_path
+    )
+    channel = bot.add_channel(fake_discord.FakeChannel(CHANNEL_ID))
+
+    meter = DiskWriteMeter(base_dir)
+    records = []
+    started = time.perf_counter()
+    for turn in build_script(players, args.rounds, args.move_every):
+        results = await asyncio.gather(*(drive_message(bot, channel, p, c) for p, c in turn))
+        records.extend(results)
+        if args.think_time:
+            await asyncio.sleep(args.think_time)
+    elapsed = time.perf_counter() - started
+    await bot.close()
+    disk_bytes = meter.written()
+    await stop_workers(workers)
+
+    await ollama.stop()
+    await sd.stop()
+    if storage is not None:
+        storage.close()
+
+    latencies = [r["end"] - r["start"] for r in records if not r["error"]]
+    first_outputs = [r["first_output"] - r["start"] for r in records if r["first_output"] and not r["error"]]
+    errors = [r["error"] for r in records if r["error"]]
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("json", "verbose")},
+        "messages": len(records),
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:3],
+        "elapsed_s": round(elapsed, 3),
+        "throughput_msgs_per_s": round(len(records) / elapsed, 3) if elapsed else None,
+        "reply_latency_s": {f"p{p}": _round(percentile(latencies, p)) for p in (50, 95, 99)},
+        "first_output_latency_s": {f"p{p}": _round(percentile(first_outputs, p)) for p in (50, 95, 99)},
+        "disk_bytes_written": disk_bytes,
+        "disk_bytes_per_message": round(disk_bytes / len(records), 1) if records else None,
+        "disk_meter": meter.method,
+        "discord_sends": sum(1 for _, kind, _ in channel.events if kind == "send"),
+        "discord_edits": sum(1 for _, kind, _ in channel.events if kind == "edit"),
+        "discord_upload_bytes": channel.upload_bytes,
+        "ollama_requests": ollama.requests,
+        "ollama_prompt_chars": ollama.prompt_chars,
+        "ollama_context_requests": ollama.context_requests,
+        "sd_requests": sd.requests
+    }
+    if not args.base_dir:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    return report
+
+def _round(value):
+    return round(value, 4) if value is not None else None
+
+def print_report(report):
+    print("== LLM co-op bot benchmark ==")
+    print(f"messages:          {report['messages']} ({report['errors']} errors)")
+    for sample in report["error_samples"]:
+        print(f"  error: {sample}")
+    print(f"elapsed:           {report['elapsed_s']} s")
+    print(f"throughput:        {report['throughput_msgs_per_s']} msgs/s")
+    print("reply latency:     " + "  ".join(f"{k}={v}s" for k, v in report["reply_latency_s"].items()))
+    print("first output:      " + "  ".join(f"{k}={v}s" for k, v in report["first_output_latency_s"].items()))
+    print(f"disk written:      {report['disk_bytes_written']} B total, {report['disk_bytes_per_message']} B/msg ({report['disk_meter']})")
+    print(f"discord:           {report['discord_sends']} sends, {report['discord_edits']} edits, {report['discord_upload_bytes']} B of images uploaded")
+    print(f"ollama:            {report['ollama_requests']} requests, {report['ollama_prompt_chars']} prompt chars, {report['ollama_context_requests']} with reused context")
+    print(f"sd webui:          {report['sd_requests']} requests")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bot against fake Ollama / SD WebUI / Discord")
+    parser.add_argument('--players', type=int, default=5, help='Players posting each round')
+    parser.add_argument('--rounds', type=int, default=10, help='Rounds of simultaneous player messages')
+    parser.add_argument('--think-time', type=float, default=0.0, help='Pause between rounds (s)')
+    parser.add_argument('--move-every', type=int, default=0, help='Every N rounds the first player sends !move instead (0 = never)')
+    parser.add_argument('--llm-first-token', type=float, default=0.2, help='Fake Ollama time to first token (s)')
+    parser.add_argument('--llm-token-latency', type=float, default=0.005, help='Fake Ollama delay between tokens (s)')
+    parser.add_argument('--reply-tokens', type=int, default=120, help='Words per fake LLM reply')
+    parser.add_argument('--sd-latency', type=float, default=1.0, help='Fake SD WebUI latency per image (s)')
+    parser.add_argument('--image-size', type=int, default=256, help='Fake image width/height in pixels')
+    parser.add_argument('--storage', choices=['json', 'sqlite'], default='json', help='Persistence backend')
+    parser.add_argument('--no-stream', action='store_true', help='Disable streaming replies')
+    parser.add_argument('--stream-edit-interval', type=float, default=1.0, help='Min seconds between streaming edits')
+    parser.add_argument('--llm-max-concurrency', type=int, default=2, help='LLM scheduler concurrency')
+    parser.add_argument('--coalesce-window', type=float, default=0.0, help='Player message coalescing window (s)')
+    parser.add_argument('--prefetch-rooms', type=int, default=0, help='Room prefetch budget')
+    parser.add_argument('--workers', type=int, default=0, help='Run generation in this many run_worker.py processes (0 = in the bot process)')
+    parser.add_argument('--base-dir', type=str, default=None, help='Keep bench data here instead of a temp dir')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    parser.add_argument('--verbose', action='store_true', help='Show the bot\'s own log output')
+    args = parser.parse_args()
+    if args.workers and args.storage != "sqlite":
+        parser.error("--workers needs --storage sqlite (workers share the image index through SQLite)")
+
+    # The bot logs heavily to stdout; keep it out of the report (and out of the disk meter)
+    log_sink = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with log_sink:
+        report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Serialization benchmark for the state files. Builds an LLM-text-heavy world
+(campaign_state.json plus rooms.json sized by --rooms) and times encoding and decoding
+with every available codec, compact and indented, against the old stdlib indent=2 format.
+
+    python bench/serializer_bench.py --rooms 500
+    python bench/serializer_bench.py --json
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "src" / "server"))
+
+import serializer
+
+WORDS = (
+    "neon rain corporate spire wasteland mutant courier syndicate drone chrome alley "
+    "market gate sewer reactor hacker implant rust ash signal static ration credit "
+    "enforcer shrine tunnel — “quoted” café naïve"
+).split()
+
+def prose(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+def build_world(rooms, seed=1):
+    rng = random.Random(seed)
+    names = [f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {i}" for i in range(rooms)]
+    room_db = {}
+    for i, name in enumerate(names):
+        exits = {n.lower(): n for n in rng.sample(names, min(3, len(names)))}
+        room_db[name.lower().replace(" ", "_")] = {
+            "name": name,
+            "description": "\n\n".join(prose(rng, 60) for _ in range(4)),
+            "image": f"db/worldImages/room_{i}.png",
+            "exits": exits
+        }
+    campaign = {
+        "name": "Bench Campaign",
+        "main_story": "\n".join(prose(rng, 80) for _ in range(6)),
+        "story_summary": prose(rng, 300),
+        "adventures": [{"name": f"Adventure {i}", "summary": prose(rng, 120), "completed": i < 3} for i in range(6)],
+        "current_adventure": 3,
+        "world_state": {"location": names[0], "players": [f"<@{i}>" for i in range(6)], "description": prose(rng, 80), "image": None},
+        "campaign_started": True,
+        "state": "adventure_running"
+    }
+    return {"campaign_state.json": campaign, "rooms.json": room_db}
+
+def codecs():
+    """(name, dumps, loads) for the old format and every installed backend."""
+    found = [
+        ("stdlib indent=2 (old)", lambda o: json.dumps(o, indent=2).encode("utf-8"), json.loads),
+        ("stdlib compact", lambda o: json.dumps(o, separators=(",", ":")).encode("utf-8"), json.loads),
+    ]
+    try:
+        import orjson
+        found.append(("orjson compact", orjson.dumps, orjson.loads))
+        found.append(("orjson pretty", lambda o: orjson.dumps(o, option=orjson.OPT_INDENT_2), orjson.loads))
+    except ImportError:
+        pass
+    try:
+        import msgspec
+        encoder, decoder = msgspec.json.Encoder(), msgspec.json.Decoder()
+        found.append(("msgspec compact", encoder.encode, decoder.decode))
+        found.append(("msgspec pretty", lambda o: msgspec.json.format(encoder.encode(o), indent=2), decoder.decode))
+    except ImportError:
+        pass
+    return found
+
+def timed(fn, arg, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def run(args):
+    world = build_world(args.rooms)
+    results = []
+    for name, dumps, loads in codecs():
+        row = {"codec": name, "bytes": 0, "dump_ms": 0.0, "load_ms": 0.0}
+        for obj in world.values():
+            dump_s, data = timed(dumps, obj, args.repeat)
+            load_s, loaded = timed(loads, data, args.repeat)
+            assert loaded == obj, f"{name} did not round-trip"
+            row["bytes"] += len(data)
+            row["dump_ms"] += dump_s * 1000
+            row["load_ms"] += load_s * 1000
+        results.append(row)
+    baseline = results[0]
+    for row in results:
+        row["size_vs_old"] = round(row["bytes"] / baseline["bytes"], 3)
+        row["cpu_vs_old"] = round((row["dump_ms"] + row["load_ms"]) / (baseline["dump_ms"] + baseline["load_ms"]), 3)
+        row["dump_ms"] = round(row["dump_ms"], 3)
+        row["load_ms"] = round(row["load_ms"], 3)
+    # The reader must accept whatever either mode wrote
+    for pretty in (False, True):
+        for obj in world.values():
+            assert serializer.loads(serializer.dumps(obj, pretty=pretty)) == obj
+    return {"rooms": args.rooms, "bot_backend": serializer.BACKEND, "results": results}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark state file serialization codecs")
+    parser.add_argument('--rooms', type=int, default=500, help='Rooms in the synthetic world')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement (best is reported)')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"== State serialization ({report['rooms']} rooms; bot uses {report['bot_backend']}) ==")
+    print(f"{'codec':<24}{'bytes':>12}{'dump ms':>10}{'load ms':>10}{'size':>8}{'cpu':>8}")
+    for row in report["results"]:
+        print(f"{row['codec']:<24}{row['bytes']:>12}{row['dump_ms']:>10}{row['load_ms']:>10}{row['size_vs_old']:>8}{row['cpu_vs_old']:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -6,22 +6,56 @@ from dotenv import load_dotenv
 
 # Ensure src/server is in sys.path for module resolution
 sys.path.insert(0, str(Path(__file__).parent / "src" / "server"))
+# Before the server modules are imported: some read their settings (PRETTY_JSON,
+# SD_WEBUI_URL, ...) when they load
+load_dotenv()
 
-from room_utils import set_rooms_db_path
+import serializer
+from image_utils import set_image_storage
+from storage import SQLiteStorage, import_json_db
 from discord_bot import init_bot
 
 def main():
-    load_dotenv()
     parser = argparse.ArgumentParser(description="LLM-Driven Co-Op Game Server")
     parser.add_argument('--discord-token', type=str, default=os.getenv("DISCORD_TOKEN"), help='Discord bot token')
-    parser.add_argument('--discord-channel', type=str, default=os.getenv("DISCORD_CHANNEL"), help='Discord channel ID (optional)')
+    parser.add_argument('--discord-channel', type=str, default=os.getenv("DISCORD_CHANNEL"), help='Discord channel ID, or comma-separated IDs to run one campaign per channel (optional)')
     parser.add_argument('--ollama-host', type=str, default=os.getenv("OLLAMA_HOST", "http://localhost:11434"), help='Ollama host URL')
     parser.add_argument('--ollama-model', type=str, default=os.getenv("OLLAMA_MODEL", "deepseek"), help='Ollama model name')
     parser.add_argument('--base-dir', type=str, default=str(Path(__file__).resolve().parent), help='Base directory for data')
+    parser.add_argument('--llm-max-connections', type=int, default=int(os.getenv("LLM_MAX_CONNECTIONS", "10")), help='Max pooled HTTP connections to Ollama')
+    parser.add_argument('--llm-max-keepalive', type=int, default=int(os.getenv("LLM_MAX_KEEPALIVE", "5")), help='Max idle keep-alive connections to Ollama')
+    parser.add_argument('--llm-max-concurrency', type=int, default=int(os.getenv("LLM_MAX_CONCURRENCY", "2")), help='Max simultaneous LLM generations (interactive replies are admitted first)')
+    parser.add_argument('--coalesce-window', type=float, default=float(os.getenv("LLM_COALESCE_WINDOW", "0")), help='Seconds to gather simultaneous player messages in a channel into one DM reply (0 = off)')
+    parser.add_argument('--image-workers', type=int, default=int(os.getenv("IMAGE_WORKERS", "1")), help='Concurrent background image generation jobs')
+    parser.add_argument('--image-cache-mb', type=float, default=float(os.getenv("IMAGE_CACHE_MAX_MB", "2048")), help='Disk quota for generated images in MB; least used images are evicted past it (0 = no limit)')
+    parser.add_argument('--image-cache-policy', type=str, choices=['lru', 'lfu'], default=os.getenv("IMAGE_CACHE_POLICY", "lru"), help='Evict the least recently (lru) or least often (lfu) posted images first')
+    parser.add_argument('--image-gc-interval', type=float, default=float(os.getenv("IMAGE_GC_INTERVAL", "3600")), help='Seconds between image cache clean-ups (0 = only on !imagecache gc)')
+    parser.add_argument('--prefetch-rooms', type=int, default=int(os.getenv("PREFETCH_ROOMS", "0")), help='Max unvisited neighbouring rooms to pre-generate in the background (0 = off)')
+    parser.add_argument('--no-stream', action='store_true', default=os.getenv("LLM_STREAM", "1") == "0", help='Wait for complete LLM replies instead of streaming them into Discord')
+    parser.add_argument('--campaign-idle-timeout', type=float, default=float(os.getenv("CAMPAIGN_IDLE_TIMEOUT", "1800")), help='Seconds before an idle channel campaign is flushed and unloaded (0 = never)')
+    parser.add_argument('--chat-history-turns', type=int, default=int(os.getenv("CHAT_HISTORY_TURNS", "20")), help='Recent conversation turns kept verbatim per campaign; older ones are summarized')
+    parser.add_argument('--prompt-token-budget', type=int, default=int(os.getenv("PROMPT_TOKEN_BUDGET", "1500")), help='Approximate token budget for summary, room and recent turns in DM prompts')
+    parser.add_argument('--lore-chunks', type=int, default=int(os.getenv("LORE_CHUNKS", "4")), help='Lore excerpts retrieved from the example/campaign index per campaign or adventure prompt')
+    parser.add_argument('--job-queue', type=str, default=os.getenv("JOB_QUEUE") or None, help='Offload LLM/image generation to run_worker.py processes through this SQLite queue (default: run in-process)')
+    parser.add_argument('--storage', type=str, choices=['json', 'sqlite'], default=os.getenv("STORAGE_BACKEND", "json"), help='Persistence backend for game data')
+    parser.add_argument('--pretty-json', action='store_true', default=serializer.PRETTY, help='Write indented JSON state files for debugging (default: compact)')
     args = parser.parse_args()
 
+    if args.job_queue and args.storage != 'sqlite':
+        # Workers record generated images in the image index too; JSON index files would overwrite each other
+        print("--job-queue needs the SQLite storage backend. Set STORAGE_BACKEND=sqlite or pass --storage sqlite.")
+        sys.exit(1)
+
     BASE_DIR = Path(args.base_dir)
-    set_rooms_db_path(BASE_DIR / "db" / "rooms.json")
+    serializer.set_pretty(args.pretty_json)
+    print(f"[Server] JSON backend: {serializer.BACKEND}{' (pretty)' if args.pretty_json else ''}")
+
+    storage = None
+    if args.storage == 'sqlite':
+        storage = SQLiteStorage(BASE_DIR / "db" / "game.sqlite3")
+        # First run against an existing JSON install: pull the old files in once
+        import_json_db(storage, BASE_DIR / "db")
+        set_image_storage(storage)
 
     if not args.discord_token:
         print("DISCORD_TOKEN is required. Set it in your .env file or pass with --discord-token.")
@@ -34,7 +68,23 @@ def main():
             discord_channel=args.discord_channel,
             base_dir=BASE_DIR,
             ollama_host=args.ollama_host,
-            ollama_model=args.ollama_model
+            ollama_model=args.ollama_model,
+            storage=storage,
+            llm_max_connections=args.llm_max_connections,
+            llm_max_keepalive=args.llm_max_keepalive,
+            stream_responses=not args.no_stream,
+            llm_max_concurrency=args.llm_max_concurrency,
+            coalesce_window=args.coalesce_window,
+            image_workers=args.image_workers,
+            image_cache_max_mb=args.image_cache_mb,
+            image_cache_policy=args.image_cache_policy,
+            image_gc_interval=args.image_gc_interval,
+            prefetch_rooms=args.prefetch_rooms,
+            campaign_idle_timeout=args.campaign_idle_timeout,
+            job_queue=Path(args.job_queue) if args.job_queue else None,
+            chat_history_turns=args.chat_history_turns,
+            prompt_token_budget=args.prompt_token_budget,
+            lore_chunks=args.lore_chunks
         )
     except Exception as e:
         import traceback
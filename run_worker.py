@@ -0,0 +1,42 @@
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Ensure src/server is in sys.path for module resolution
+sys.path.insert(0, str(Path(__file__).parent / "src" / "server"))
+# Before the server modules are imported: some read their settings when they load
+load_dotenv()
+
+from image_utils import set_images_base_dir, set_image_storage
+from storage import SQLiteStorage
+from job_worker import run_worker
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM-Driven Co-Op Game generation worker")
+    parser.add_argument('--base-dir', type=str, default=str(Path(__file__).resolve().parent), help='Base directory for data (shared with the bot)')
+    parser.add_argument('--job-queue', type=str, default=os.getenv("JOB_QUEUE") or None, help='Job queue database (default: <base-dir>/db/jobs.sqlite3)')
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv("WORKER_CONCURRENCY", "2")), help='Jobs this worker runs at once')
+    parser.add_argument('--storage', type=str, choices=['json', 'sqlite'], default=os.getenv("STORAGE_BACKEND", "json"), help='Persistence backend for the world image index (must be sqlite, as for the bot)')
+    args = parser.parse_args()
+
+    if args.storage != 'sqlite':
+        # With JSON files the worker and the bot would each rewrite their own copy of the image index
+        print("run_worker.py needs the SQLite storage backend shared with the bot. Set STORAGE_BACKEND=sqlite or pass --storage sqlite.")
+        sys.exit(1)
+
+    BASE_DIR = Path(args.base_dir)
+    set_images_base_dir(BASE_DIR)
+    set_image_storage(SQLiteStorage(BASE_DIR / "db" / "game.sqlite3"))
+    queue_path = Path(args.job_queue) if args.job_queue else BASE_DIR / "db" / "jobs.sqlite3"
+
+    print("[Server] Starting generation worker...")
+    try:
+        asyncio.run(run_worker(queue_path, concurrency=args.concurrency))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import asyncio
+from pathlib import Path
+from utils.file_utils import atomic_write_json
+from file_io import default_io
+import serializer
+from storage import DEFAULT_CAMPAIGN_ID
+
+class CampaignStore:
+    """
+    Authoritative in-memory copy of campaign_state.json shared by all bot handlers.
+    Mutations only mark the store dirty; a debounced background task writes the
+    state back to disk (atomic rename + fsync) at most once per flush_delay seconds.
+    If a SQLiteStorage is given, the state is persisted there instead of the JSON file.
+    """
+
+    def __init__(self, path: Path, flush_delay: float = 2.0, storage=None, campaign_id=DEFAULT_CAMPAIGN_ID):
+        self.path = Path(path)
+        self.flush_delay = flush_delay
+        self.storage = storage
+        self.campaign_id = campaign_id
+        self._state = None
+        self._loaded = False
+        self._dirty = False
+        self._flush_task = None
+
+    def get(self):
+        """Return the live campaign dict (or None if no campaign exists yet)."""
+        if not self._loaded:
+            if self.storage is not None:
+                self._state = self.storage.load_campaign(self.campaign_id)
+            elif self.path.exists():
+                self._state = serializer.load_file(self.path)
+            self._loaded = True
+        return self._state
+
+    def set(self, state):
+        """Replace the campaign state and schedule a flush."""
+        self._state = state
+        self._loaded = True
+        self.mark_dirty()
+
+    def update_world_state(self, world_state):
+        """Copy the current world_state into the campaign, if one exists."""
+        campaign = self.get()
+        if campaign is None:
+            return
+        campaign["world_state"] = world_state.copy()
+        self.mark_dirty()
+
+    def mark_dirty(self):
+        self._dirty = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (startup/shutdown code paths): write through immediately
+            self.flush()
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_delay)
+        # Changes made while this write is in flight schedule a flush of their own
+        self._flush_task = None
+        await self.aflush()
+
+    async def aflush(self):
+        """Like flush, but the JSON file is written on the file I/O pool."""
+        if self.storage is not None:
+            self.flush()
+            return
+        if not self._dirty or self._state is None:
+            return
+        self._dirty = False
+        try:
+            await default_io.write_json(self.path, self._state)
+        except Exception as e:
+            self._dirty = True
+            print(f"[Bot] Failed to save campaign state: {e}")
+
+    def flush(self):
+        """Write the state to disk now if it has unsaved changes."""
+        if not self._dirty or self._state is None:
+            return
+        self._dirty = False
+        try:
+            if self.storage is not None:
+                self.storage.save_campaign(self._state, self.campaign_id)
+            else:
+                atomic_write_json(self.path, self._state)
+        except Exception as e:
+            self._dirty = True
+            print(f"[Bot] Failed to save campaign state: {e}")
+
+    async def aclose(self):
+        """Cancel any pending debounced write and flush now."""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        self._flush_task = None
+        await self.aflush()
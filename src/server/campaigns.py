@@ -0,0 +1,286 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+from campaign_store import CampaignStore
+from conversation import ConversationMemory
+from game_state import load_game_state, save_game_state
+from llm_utils import LLMSession
+from room_utils import RoomStore, get_room_key
+from room_graph import RoomGraph
+from ruleset import Character, CHARACTER_SCHEMA_VERSION
+from utils.intent_utils import IntentDetector
+from storage import DEFAULT_CAMPAIGN_ID
+from file_io import default_io
+import serializer
+
+DEFAULT_WORLD_STATE = {
+    "location": "Town Square",
+    "players": [],
+    "description": "🌳 **Town Square** 🌳\n\nYou are in the bustling town square.\nAdventurers gather here, and the fountain sparkles in the sunlight.",
+    "image": None
+}
+
+class CampaignContext:
+    """
+    Everything the bot keeps for one channel's campaign: the campaign store, rooms,
+    characters, world state, conversation memory and the channel's Ollama session.
+    Files live in data_dir; with a SQLiteStorage, rows are keyed by campaign_id.
+    """
+
+    def __init__(self, campaign_id, channel_id, data_dir: Path, storage=None, flush_delay: float = 2.0, memory_turns: int = 20):
+        self.campaign_id = campaign_id
+        self.channel_id = channel_id
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.storage = storage
+        self.characters_path = self.data_dir / "characters.json"
+        self.campaign_json_path = self.data_dir / "campaign.json"
+        self.store = CampaignStore(self.data_dir / "campaign_state.json", flush_delay=flush_delay, storage=storage, campaign_id=campaign_id)
+        # Read here, in the registry's loader thread, so the first room lookup does not parse the world on the event loop
+        self.rooms = RoomStore(self.data_dir / "rooms.json", storage=storage, campaign_id=campaign_id).load()
+        self.graph = RoomGraph(self.rooms)
+        self.intents = IntentDetector(self.graph)
+        self.characters = self.load_characters()
+        campaign = self.store.get()
+        if campaign and "world_state" in campaign:
+            self.world_state = campaign["world_state"]
+        else:
+            self.world_state = json.loads(json.dumps(DEFAULT_WORLD_STATE))
+        saved_location = load_game_state(self.data_dir)
+        if saved_location:
+            starting_room = self.rooms.get(saved_location)
+            if starting_room:
+                self.world_state.update({
+                    "location": saved_location,
+                    "description": starting_room.get("description", self.world_state["description"]),
+                    "image": starting_room.get("image")
+                })
+        # Recent turns plus a rolling summary, which is saved with the campaign state
+        self.memory = ConversationMemory(
+            memory_turns,
+            summary=(campaign or {}).get("story_summary", ""),
+            on_summary=self._save_summary
+        )
+        # Reused Ollama context for DM replies in this channel (see LLMSession)
+        self.llm_session = LLMSession()
+        # Set by the bot: the campaign's RoomPrefetcher, a pending bootstrap task and
+        # the dependencies handed to command handlers
+        self.prefetcher = None
+        self.bootstrap_task = None
+        self.command_deps = None
+        # User ids with a character creation flow waiting on their DM answers
+        self.creating_characters = set()
+        self.active_handlers = 0
+        self.last_active = time.monotonic()
+
+    def _save_summary(self, summary):
+        campaign = self.store.get()
+        if campaign is not None:
+            campaign["story_summary"] = summary
+            self.store.mark_dirty()
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    def load_characters(self):
+        """Hydrate the saved character records into Character objects, once per load."""
+        if self.storage is not None:
+            records = self.storage.load_characters(self.campaign_id)
+        elif self.characters_path.exists():
+            records = serializer.load_file(self.characters_path)
+        else:
+            records = {}
+        characters = {user_id: Character.from_dict(data) for user_id, data in records.items()}
+        # Older records get their generated abilities and inventory written back right away
+        if any(data.get("version", 0) < CHARACTER_SCHEMA_VERSION for data in records.values()):
+            self.save_characters(characters)
+        return characters
+
+    def save_characters(self, characters=None, user_id=None):
+        characters = self.characters if characters is None else characters
+        if self.storage is not None:
+            # Only the changed character's row is written when the caller knows it
+            if user_id is not None:
+                self.storage.save_character(user_id, characters[user_id].to_dict(), self.campaign_id)
+            else:
+                self.storage.save_characters({uid: char.to_dict() for uid, char in characters.items()}, self.campaign_id)
+            return
+        default_io.write_json(self.characters_path, {uid: char.to_dict() for uid, char in characters.items()})
+
+    async def load_campaign_json(self):
+        return await default_io.read_json(self.campaign_json_path)
+
+    def save_campaign_json(self, state):
+        default_io.write_json(self.campaign_json_path, state)
+
+    def save_location(self, location):
+        default_io.submit(self.data_dir / "game_state.json", save_game_state, self.data_dir, location)
+
+    async def aclose(self):
+        if self.bootstrap_task and not self.bootstrap_task.done():
+            self.bootstrap_task.cancel()
+        if self.prefetcher is not None:
+            await self.prefetcher.aclose()
+        await self.memory.aclose()
+        await self.store.aclose()
+        await self.rooms.aclose()
+
+class CampaignRegistry:
+    """
+    Lazily loads one CampaignContext per Discord channel and unloads campaigns that
+    have been idle for idle_timeout seconds (their state is flushed first).
+
+    The legacy channel (the first configured one) keeps using base_dir/db and the
+    default campaign id so existing single-channel data is picked up unchanged; every
+    other channel gets base_dir/db/<channel_id> and campaign id str(channel_id). Without
+    a configured channel list, the first channel to load a campaign becomes the legacy one.
+    on_load is a coroutine function awaited before a new campaign is handed out.
+    """
+
+    def __init__(self, base_dir: Path, storage=None, legacy_channel_id=None, idle_timeout: float = 1800, on_load=None, on_unload=None, memory_turns: int = 20):
+        self.base_dir = Path(base_dir)
+        self.storage = storage
+        self.legacy_channel_id = int(legacy_channel_id) if legacy_channel_id else None
+        self.idle_timeout = idle_timeout
+        self.on_load = on_load
+        self.on_unload = on_unload
+        self.memory_turns = memory_turns
+        self._campaigns = {}
+        self._loading = {}
+        self._reaper = None
+
+    def _location(self, channel_id):
+        if self.legacy_channel_id is None:
+            self.legacy_channel_id = channel_id
+            print(f"[Bot] No channel configured; channel {channel_id} uses the campaign in {self.base_dir / 'db'}")
+        if channel_id == self.legacy_channel_id:
+            return DEFAULT_CAMPAIGN_ID, self.base_dir / "db"
+        return str(channel_id), self.base_dir / "db" / str(channel_id)
+
+    async def get(self, channel_id):
+        """
+        Return the channel's campaign, loading it on first use. The files are read in a
+        worker thread; concurrent first messages for one channel share a single load.
+        """
+        channel_id = int(channel_id)
+        ctx = self._campaigns.get(channel_id)
+        if ctx is None:
+            loading = self._loading.get(channel_id)
+            if loading is None:
+                loading = asyncio.ensure_future(self._load(channel_id))
+                self._loading[channel_id] = loading
+            ctx = await asyncio.shield(loading)
+        ctx.touch()
+        self._start_reaper()
+        return ctx
+
+    async def _load(self, channel_id):
+        campaign_id, data_dir = self._location(channel_id)
+        try:
+            ctx = await asyncio.to_thread(CampaignContext, campaign_id, channel_id, data_dir, storage=self.storage, memory_turns=self.memory_turns)
+            # Set up before anyone else sees the campaign; waiters share this load meanwhile
+            if self.on_load:
+                await self.on_load(ctx)
+        finally:
+            del self._loading[channel_id]
+        self._campaigns[channel_id] = ctx
+        print(f"[Bot] Loaded campaign {campaign_id} for channel {channel_id}")
+        return ctx
+
+    def loaded(self):
+        return list(self._campaigns.values())
+
+    async def room_references(self):
+        """
+        Room keys and room image paths of every campaign, loaded or not (for image_gc),
+        including each campaign's current location and image. Campaigns that are not
+        loaded are read from disk or storage in a worker thread.
+        """
+        loaded = self.loaded()
+        # With SQLite every saved room is in storage; loaded campaigns only add in-memory state
+        skip = set() if self.storage is not None else {ctx.campaign_id for ctx in loaded}
+        room_sets, world_states = await asyncio.to_thread(self._stored_references, skip)
+        for ctx in loaded:
+            room_sets.append(ctx.rooms.rooms if self.storage is not None else ctx.rooms.all())
+            world_states.append(ctx.world_state)
+        keys, images = set(), set()
+        for rooms in room_sets:
+            for key, room in rooms.items():
+                keys.add(key)
+                if room.get("image"):
+                    images.add(room["image"])
+        for world_state in world_states:
+            if world_state.get("location"):
+                keys.add(get_room_key(world_state["location"]))
+            if world_state.get("image"):
+                images.add(world_state["image"])
+        return keys, images
+
+    def _stored_references(self, skip):
+        """Saved rooms and world states of the campaigns not in skip."""
+        db_dir = self.base_dir / "db"
+        if self.storage is not None:
+            campaign_ids = set(self.storage.room_campaign_ids()) | set(self.storage.campaign_ids())
+            locations = [(campaign_id, db_dir if campaign_id == DEFAULT_CAMPAIGN_ID else db_dir / campaign_id) for campaign_id in campaign_ids]
+        elif db_dir.is_dir():
+            # The legacy campaign lives in db/ itself, the others in db/<channel_id>/
+            locations = [(DEFAULT_CAMPAIGN_ID, db_dir)] + [(d.name, d) for d in db_dir.iterdir() if d.is_dir()]
+        else:
+            return [], []
+        room_sets, world_states = [], []
+        for campaign_id, data_dir in locations:
+            if campaign_id in skip:
+                continue
+            if self.storage is not None:
+                room_sets.append(self.storage.load_rooms(campaign_id))
+                campaign = self.storage.load_campaign(campaign_id)
+            else:
+                path = data_dir / "rooms.json"
+                if path.exists() or path.with_suffix(".jsonl").exists():
+                    room_sets.append(RoomStore(path, campaign_id=campaign_id).all())
+                state_path = data_dir / "campaign_state.json"
+                campaign = serializer.load_file(state_path) if state_path.exists() else None
+            if campaign and campaign.get("world_state"):
+                world_states.append(campaign["world_state"])
+            # The location the campaign restarts in (see CampaignContext)
+            saved_location = load_game_state(data_dir) if data_dir.is_dir() else None
+            if saved_location:
+                world_states.append({"location": saved_location})
+        return room_sets, world_states
+
+    def _start_reaper(self):
+        if not self.idle_timeout or (self._reaper and not self._reaper.done()):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._reaper = loop.create_task(self._reap())
+
+    async def _reap(self):
+        while True:
+            await asyncio.sleep(min(self.idle_timeout, 60))
+            await self.evict_idle()
+
+    async def evict_idle(self):
+        """Unload campaigns that have not seen a message for idle_timeout seconds."""
+        now = time.monotonic()
+        for channel_id, ctx in list(self._campaigns.items()):
+            if ctx.active_handlers or now - ctx.last_active < self.idle_timeout:
+                continue
+            if ctx.bootstrap_task and not ctx.bootstrap_task.done():
+                continue
+            del self._campaigns[channel_id]
+            await ctx.aclose()
+            if self.on_unload:
+                self.on_unload(ctx)
+            print(f"[Bot] Unloaded idle campaign {ctx.campaign_id} (channel {channel_id})")
+
+    async def aclose(self):
+        if self._reaper and not self._reaper.done():
+            self._reaper.cancel()
+        self._reaper = None
+        for ctx in list(self._campaigns.values()):
+            await ctx.aclose()
+        self._campaigns.clear()
@@ -0,0 +1,131 @@
+import importlib
+import inspect
+import math
+import os
+import pkgutil
+import time
+from pathlib import Path
+
+COMMANDS_DIR = Path(__file__).parent / "commands"
+
+# Discord user IDs allowed to run admin commands besides members who can manage the server
+ADMIN_USER_IDS = {user_id.strip() for user_id in os.getenv("ADMIN_USER_IDS", "").split(",") if user_id.strip()}
+
+def is_admin(author):
+    if str(author.id) in ADMIN_USER_IDS:
+        return True
+    permissions = getattr(author, "guild_permissions", None)
+    return bool(permissions and (permissions.administrator or permissions.manage_guild))
+
+class Command:
+    """A registered chat command: its handler and what it needs to run."""
+
+    def __init__(self, name, handler, states=None, cooldown: float = 0, state_error=None, aliases=(), admin=False):
+        self.name = name
+        self.handler = handler
+        self.states = frozenset(states) if states is not None else None
+        self.cooldown = cooldown
+        self.admin = admin
+        self.state_error = state_error or "You can only use this command during an active adventure."
+        self.aliases = tuple(aliases)
+        # Resolved once: the keyword arguments the handler takes besides message
+        params = list(inspect.signature(handler).parameters.values())[1:]
+        self.wants_args = any(p.name == "args" for p in params)
+        self.needs = tuple(
+            p.name for p in params
+            if p.name != "args" and p.kind in (p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY)
+        )
+
+    def allowed_in(self, state):
+        return self.states is None or state in self.states
+
+class CommandRegistry:
+    """
+    Commands registered with the @command decorator, keyed by name and alias.
+    Handlers are async functions taking the message first; any other parameter is
+    filled by name: args with the words after the command, everything else from the
+    dependencies passed to dispatch. Unknown dependencies are caught by validate().
+    """
+
+    def __init__(self):
+        self.commands = {}
+        self._last_used = {}
+        self._loaded = False
+
+    def command(self, name, states=("adventure_running",), cooldown: float = 0, state_error=None, aliases=(), admin=False):
+        """
+        Register the decorated handler as !name. states=None allows every game state;
+        admin=True limits it to server managers and ADMIN_USER_IDS.
+        """
+        def decorator(handler):
+            cmd = Command(name, handler, states=states, cooldown=cooldown, state_error=state_error, aliases=aliases, admin=admin)
+            for key in (name,) + tuple(aliases):
+                self.commands[key.lower()] = cmd
+            return handler
+        return decorator
+
+    def load(self, directory: Path = COMMANDS_DIR, package: str = "commands"):
+        """Import every module in the commands package once, registering their handlers."""
+        if self._loaded:
+            return self
+        self._loaded = True
+        for module in sorted(pkgutil.iter_modules([str(directory)]), key=lambda m: m.name):
+            importlib.import_module(f"{package}.{module.name}")
+        print(f"[Bot] Registered {len(self.names())} commands: {', '.join(self.names())}")
+        return self
+
+    def names(self):
+        return sorted({cmd.name for cmd in self.commands.values()})
+
+    def get(self, name):
+        return self.commands.get(name.lower())
+
+    def validate(self, available):
+        """Raise ValueError if a handler needs a dependency that is not in available."""
+        available = set(available)
+        for cmd in set(self.commands.values()):
+            missing = [need for need in cmd.needs if need not in available]
+            if missing:
+                raise ValueError(f"Command !{cmd.name} needs unknown dependencies: {', '.join(missing)}")
+
+    def cooldown_left(self, cmd, user_id):
+        if not cmd.cooldown:
+            return 0
+        last = self._last_used.get((cmd.name, user_id))
+        if last is None:
+            return 0
+        return max(0, cmd.cooldown - (time.monotonic() - last))
+
+    async def dispatch(self, message, content, state, deps):
+        """
+        Run the command in content ("!name args...") for message in game state state.
+        Returns False if no such command exists; True once the command has been handled
+        (including refusals for non-admins, the wrong state or a cooldown).
+        """
+        parts = content[1:].split()
+        if not parts:
+            return False
+        cmd = self.commands.get(parts[0].lower())
+        if cmd is None:
+            return False
+        if cmd.admin and not is_admin(message.author):
+            await message.channel.send(f"Only server admins can use !{cmd.name}.")
+            return True
+        if not cmd.allowed_in(state):
+            await message.channel.send(cmd.state_error)
+            return True
+        user_id = str(message.author.id)
+        wait = self.cooldown_left(cmd, user_id)
+        if wait:
+            await message.channel.send(f"Slow down! You can use !{cmd.name} again in {math.ceil(wait)}s.")
+            return True
+        if cmd.cooldown:
+            self._last_used[(cmd.name, user_id)] = time.monotonic()
+        kwargs = {need: deps[need] for need in cmd.needs}
+        if cmd.wants_args:
+            kwargs["args"] = parts[1:]
+        await cmd.handler(message, **kwargs)
+        return True
+
+registry = CommandRegistry()
+command = registry.command
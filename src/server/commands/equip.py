@@ -1,5 +1,7 @@
 from llm_utils import llm_can_equip
+from command_registry import command
 
+@command("equip", cooldown=5)
 async def equip_command(message, args, characters, save_characters, ollama_host, ollama_model, **kwargs):
     if not args:
         await message.channel.send("Usage: !equip <item or phrase>")
@@ -14,18 +16,10 @@ async def equip_command(message, args, characters, save_characters, ollama_host,
     equip_result = await llm_can_equip(char, item_phrase, ollama_host, ollama_model)
     if equip_result.get('allowed'):
         slot = equip_result.get('slot') or 'Misc'
+        item_phrase = equip_result['item']
         try:
             char.equip_item(item_phrase, slot)
-            save_characters(characters)
-            # --- AUTO-SAVE CAMPAIGN STATE if available ---
-            campaign = None
-            if 'save_campaign_state' in kwargs and 'load_campaign_state' in kwargs:
-                load_campaign_state = kwargs['load_campaign_state']
-                save_campaign_state = kwargs['save_campaign_state']
-                campaign = load_campaign_state()
-                if campaign:
-                    campaign['characters'] = characters
-                    save_campaign_state(campaign)
+            save_characters(characters, user_id=user_id)
             await message.channel.send(f"{message.author.display_name} equipped {item_phrase} in {slot} slot.")
         except Exception as e:
             await message.channel.send(f"Could not equip: {e}")
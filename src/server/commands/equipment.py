@@ -1,3 +1,6 @@
+from command_registry import command
+
+@command("equipment")
 async def equipment_command(message, characters, **kwargs):
     user_id = str(message.author.id)
     char = characters.get(user_id)
@@ -1,14 +1,18 @@
+from command_registry import command
+
+@command("help", states=None)
 async def help_command(message, **kwargs):
     help_text = """
 **Available Commands:**
-!roll <dice or skill> - Roll dice or make a skill check
+!roll [dice] - Roll dice, e.g. !roll 3d6 or !roll d20+2 (default d20)
 !move <destination> - Move to a new room/location
 !equip <item> - Equip an item from your inventory
 !equipment - List your equipped items and inventory
 !players - List all active players
 !buy <item> - Buy an item from the shop
 !sell <item> - Sell an item from your inventory
-!shop - List all available shop items
+!shop [type] [page] - List shop items, optionally of one type
+!imagecache [stats|gc] - (Admins) Show image cache usage or clean it up now
 !help - Show this help message
 """
     await message.channel.send(help_text)
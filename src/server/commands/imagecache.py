@@ -0,0 +1,46 @@
+from command_registry import command
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.2f} GB"
+
+def format_age(seconds):
+    if seconds is None:
+        return "never"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m ago"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f}h ago"
+    return f"{seconds / 86400:.1f}d ago"
+
+def format_report(report):
+    return (
+        f"{report['orphans']} orphaned, {report['unindexed']} stray files, {report['evicted']} evicted, "
+        f"{report['locations_pruned']} stale locations, {format_bytes(report['freed_bytes'])} freed"
+    )
+
+@command("imagecache", states=None, admin=True)
+async def imagecache_command(message, args, image_cache, **kwargs):
+    action = args[0].lower() if args else "stats"
+    if action == "gc":
+        report = await image_cache.collect()
+        await message.channel.send(f"**Image cache GC:** {format_report(report)}")
+        return
+    if action != "stats":
+        await message.channel.send("Usage: !imagecache stats | !imagecache gc")
+        return
+    stats = image_cache.stats()
+    quota = format_bytes(stats["quota_bytes"]) if stats["quota_bytes"] else "none"
+    lines = [
+        "**Image cache:**",
+        f"Images: {stats['images']} ({format_bytes(stats['bytes'])} on disk, {format_bytes(stats['original_bytes'])} originals)",
+        f"Quota: {quota} ({stats['policy'].upper()} eviction)",
+        f"Posts served: {stats['hits']}, never posted: {stats['never_served']}, oldest last post: {format_age(stats['oldest_served_age'])}",
+        f"Last GC: {format_age(stats['last_run_age'])}"
+    ]
+    if stats["last_report"]:
+        lines[-1] += f" — {format_report(stats['last_report'])}"
+    await message.channel.send("\n".join(lines))
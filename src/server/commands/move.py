@@ -1,3 +1,6 @@
+from command_registry import command
+
+@command("move")
 async def move_command(message, args, handle_movement, world_state, **kwargs):
     if not args:
         await message.channel.send("Usage: !move <destination>")
@@ -1,5 +1,26 @@
 import random
+import re
+from command_registry import command
 
+DICE_RE = re.compile(r"^(\d*)d(\d+)(?:([+-])(\d+))?$")
+
+@command("roll", cooldown=2)
 async def roll_command(message, args, **kwargs):
-    result = random.randint(1, 20)
-    await message.channel.send(f"🎲 {message.author.display_name} rolled a d20: **{result}**")
+    """!roll [NdM[+K]], e.g. !roll 3d6 or !roll d20+2; a plain !roll is a d20."""
+    expression = "".join(args).lower() or "d20"
+    match = DICE_RE.match(expression)
+    count = int(match.group(1) or 1) if match else 0
+    sides = int(match.group(2)) if match else 0
+    if not (1 <= count <= 100 and 2 <= sides <= 1000):
+        await message.channel.send("Usage: !roll [NdM[+K]], e.g. !roll 3d6 or !roll d20+2")
+        return
+    rolls = [random.randint(1, sides) for _ in range(count)]
+    modifier = int(match.group(4) or 0) * (-1 if match.group(3) == "-" else 1)
+    total = sum(rolls) + modifier
+    detail = ""
+    if count > 1 or modifier:
+        detail = " + ".join(map(str, rolls))
+        if modifier:
+            detail += f" {match.group(3)} {match.group(4)}"
+        detail = f" ({detail})"
+    await message.channel.send(f"🎲 {message.author.display_name} rolled {expression}: **{total}**{detail}")
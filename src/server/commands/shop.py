@@ -1,14 +1,17 @@
-import json
-from pathlib import Path
+from command_registry import command
+from gear_catalog import default_catalog
 
-async def shop_command(message, **kwargs):
-    gear_path = Path(__file__).parent.parent / "gear" / "gear.json"
-    with open(gear_path, "r", encoding="utf-8") as f:
-        shop_items = json.load(f)
-    lines = ["**Shop Items:**"]
-    for item in shop_items:
-        name = item.get("name", "Unknown")
-        price = item.get("price", 0)
-        desc = item.get("description", "")
-        lines.append(f"- {name} ({price} PP): {desc}")
-    await message.channel.send("\n".join(lines))
+@command("shop")
+async def shop_command(message, args, **kwargs):
+    # !shop [type] [page], e.g. "!shop 2", "!shop weapons", "!shop hacker tool 2"
+    page = 1
+    if args and args[-1].isdigit():
+        page = int(args[-1])
+        args = args[:-1]
+    item_type = None
+    if args:
+        item_type = default_catalog.find_type(' '.join(args))
+        if item_type is None:
+            await message.channel.send(f"No such item type. Types: {', '.join(default_catalog.types())}")
+            return
+    await message.channel.send(default_catalog.page(page, item_type))
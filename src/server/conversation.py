@@ -0,0 +1,117 @@
+import asyncio
+from collections import deque
+
+def estimate_tokens(text):
+    """Rough token count for budgeting (about four characters per token)."""
+    return len(text) // 4 + 1 if text else 0
+
+def truncate_to_tokens(text, tokens):
+    max_chars = max(0, tokens * 4)
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + "…"
+
+class ConversationMemory:
+    """
+    Bounded memory of a campaign's conversation: the last max_turns turns verbatim in
+    a ring buffer, plus a rolling summary. Turns pushed out of the buffer are folded
+    into the summary by summarize(summary, turns) -> new summary, run in the background.
+    Without a summarizer (or a running event loop) old turns are simply dropped.
+    """
+
+    def __init__(self, max_turns: int = 20, summary: str = "", summarize=None, on_summary=None):
+        self.max_turns = max(1, max_turns)
+        self.turns = deque()
+        self.summary = summary or ""
+        self.summarize = summarize
+        self.on_summary = on_summary
+        self._unfolded = []
+        self._task = None
+
+    def append(self, sender, message):
+        self.turns.append({"sender": sender, "message": message})
+        while len(self.turns) > self.max_turns:
+            self._unfolded.append(self.turns.popleft())
+        # Never hold more than one buffer's worth of turns waiting for the summarizer
+        if len(self._unfolded) > self.max_turns:
+            del self._unfolded[:len(self._unfolded) - self.max_turns]
+        if self._unfolded:
+            self._schedule_fold()
+
+    def _schedule_fold(self):
+        if self.summarize is None:
+            self._unfolded.clear()
+            return
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._unfolded.clear()
+            return
+        self._task = loop.create_task(self._fold())
+
+    async def _fold(self):
+        while self._unfolded:
+            batch, self._unfolded = self._unfolded, []
+            try:
+                summary = await self.summarize(self.summary, batch)
+            except Exception as e:
+                print(f"[Bot] Conversation summary failed: {e}")
+                return
+            if summary:
+                self.summary = summary.strip()
+                if self.on_summary:
+                    self.on_summary(self.summary)
+
+    def recent(self, budget_tokens):
+        """Newest turns (oldest first) that fit in budget_tokens."""
+        picked = []
+        for turn in reversed(self.turns):
+            line = f"{turn['sender']}: {turn['message']}"
+            cost = estimate_tokens(line)
+            if cost > budget_tokens:
+                break
+            picked.append(line)
+            budget_tokens -= cost
+        picked.reverse()
+        return picked
+
+    def build_prompt(self, action, location=None, room_description=None, budget_tokens: int = 1500, lore=None):
+        """
+        Prompt for a DM reply: rolling summary, room context, retrieved lore excerpts and as
+        many recent turns as fit in budget_tokens, followed by the player action (always in full).
+        """
+        budget = budget_tokens - estimate_tokens(action)
+        sections = []
+        if self.summary and budget > 0:
+            summary = truncate_to_tokens(self.summary, budget // 3)
+            sections.append(f"Story so far:\n{summary}")
+            budget -= estimate_tokens(summary)
+        if location and budget > 0:
+            room = f"Current location: {location}"
+            if room_description:
+                room += "\n" + truncate_to_tokens(room_description, budget // 2)
+            sections.append(room)
+            budget -= estimate_tokens(room)
+        if lore and budget > 0:
+            excerpts = []
+            for text in lore:
+                text = truncate_to_tokens(text, budget // 4)
+                if estimate_tokens(text) > budget // 2:
+                    break
+                excerpts.append(text)
+                budget -= estimate_tokens(text)
+            if excerpts:
+                sections.append("Relevant lore:\n" + "\n---\n".join(excerpts))
+        if budget > 0:
+            recent = self.recent(budget)
+            if recent:
+                sections.append("Recent conversation:\n" + "\n".join(recent))
+        sections.append(f"Player action:\n{action}")
+        return "\n\n".join(sections)
+
+    async def aclose(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
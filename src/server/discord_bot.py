@@ -1,17 +1,33 @@
+import io
 import os
 import re
+import time
+import asyncio
+import contextlib
+import threading
 import discord
 from discord import File
 from typing import Optional
 from pathlib import Path
-from llm_utils import get_llm_response
-from game_state import save_game_state, load_game_state
-from room_utils import get_room, set_room, extract_exits_from_dm
-from image_utils import ensure_world_image
-import importlib
+from llm_utils import get_llm_response, stream_llm_response, configure_http_client, close_http_client, configure_llm_scheduler, set_llm_cache, set_llm_job_client
+from llm_cache import LLMResponseCache
+from llm_scheduler import MessageCoalescer, PRIORITY_INTERACTIVE, PRIORITY_QA, PRIORITY_BACKGROUND
+from room_utils import extract_exits_from_dm, get_room_key
+from room_graph import normalize_exits
+from image_queue import ImageJobQueue
+from image_gc import ImageCacheGC
+from job_queue import SQLiteJobQueue, JobQueueClient
+from image_utils import set_images_base_dir, ensure_world_image, note_image_served
+from room_prefetch import RoomPrefetcher
+from campaigns import CampaignRegistry
+from ruleset import Character
+from lore_index import LoreIndex, EXAMPLES_SCOPE
+import functools
+from command_registry import registry as commands, command
+from gear_catalog import default_catalog
+from file_io import default_io
 from utils.discord_utils import replace_mentions, get_user_mention
-from utils.message_utils import send_dm_response
-from utils.movement_utils import detect_movement
+from utils.message_utils import send_dm_response, send_world_image, format_dm_reply, stream_to_channel
 from utils.world_utils import update_world_state_from_room
 
 intents = discord.Intents.default()
@@ -19,112 +35,249 @@ intents.messages = True
 intents.message_content = True
 intents.guilds = True
 
-bot = discord.Client(intents=intents)
+class GameClient(discord.Client):
+    """discord.Client that runs registered async cleanup hooks (HTTP pools, pending writes) on shutdown."""
 
-def init_bot(
-    discord_token: str,
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.shutdown_hooks = []
+
+    async def close(self):
+        for hook in self.shutdown_hooks:
+            try:
+                await hook()
+            except Exception as e:
+                print(f"[Bot] Shutdown hook {getattr(hook, '__name__', hook)} failed: {e}")
+        self.shutdown_hooks.clear()
+        await super().close()
+
+bot = GameClient(intents=intents)
+
+class StartupTimer:
+    """Wall-clock breakdown of startup phases, printed once the bot is online."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+        self.reported = False
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def mark(self, name):
+        """Record an event (e.g. gateway connected) as time since startup began."""
+        self.phases.append((name, time.perf_counter() - self.started))
+
+    def report(self):
+        self.reported = True
+        breakdown = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases)
+        print(f"[Server] Online after {time.perf_counter() - self.started:.2f}s ({breakdown})")
+
+# Everything a command handler may name in its signature (see command_registry)
+COMMAND_DEPENDENCIES = ('ctx', 'characters', 'save_characters', 'ollama_host', 'ollama_model', 'handle_movement', 'world_state', 'image_cache')
+
+def init_bot(discord_token: str, **options):
+    """Set up the bot (see setup_bot for options) and block running it until shutdown."""
+    setup_bot(**options)
+    bot.run(discord_token)
+
+def setup_bot(
     discord_channel: Optional[str],
     base_dir: Path,
     ollama_host: str,
-    ollama_model: str
+    ollama_model: str,
+    storage=None,
+    llm_max_connections: Optional[int] = None,
+    llm_max_keepalive: Optional[int] = None,
+    stream_responses: bool = True,
+    stream_edit_interval: float = 1.0,
+    llm_max_concurrency: Optional[int] = None,
+    coalesce_window: float = 0.0,
+    image_workers: int = 1,
+    prefetch_rooms: int = 0,
+    campaign_idle_timeout: float = 1800,
+    job_queue: Optional[Path] = None,
+    chat_history_turns: int = 20,
+    prompt_token_budget: int = 1500,
+    lore_chunks: int = 4,
+    image_cache_max_mb: float = 0,
+    image_cache_policy: str = "lru",
+    image_gc_interval: float = 3600
 ):
-    import json
-    CAMPAIGN_STATE_PATH = base_dir / "db" / "campaign_state.json"
-    CHARACTERS_PATH = base_dir / "db" / "characters.json"
-    CAMPAIGN_JSON_PATH = base_dir / "db" / "campaign.json"
-
-    def save_campaign_state(state):
-        with open(CAMPAIGN_STATE_PATH, "w", encoding="utf-8") as f:
-            json.dump(state, f, indent=2)
-
-    def load_campaign_state():
-        if CAMPAIGN_STATE_PATH.exists():
-            with open(CAMPAIGN_STATE_PATH, "r", encoding="utf-8") as f:
-                return json.load(f)
-        return None
-
-    def load_characters():
-        if CHARACTERS_PATH.exists():
-            with open(CHARACTERS_PATH, "r", encoding="utf-8") as f:
-                return json.load(f)
-        return {}
-
-    def save_characters(characters):
-        with open(CHARACTERS_PATH, "w", encoding="utf-8") as f:
-            json.dump(characters, f, indent=2)
-
-    def save_campaign_json(state):
-        with open(CAMPAIGN_JSON_PATH, "w", encoding="utf-8") as f:
-            json.dump(state, f, indent=2)
-
-    def load_campaign_json():
-        if CAMPAIGN_JSON_PATH.exists():
-            with open(CAMPAIGN_JSON_PATH, "r", encoding="utf-8") as f:
-                return json.load(f)
-        return None
-
-    global world_state, chat_history
-    campaign = load_campaign_state()
-    if campaign and "world_state" in campaign:
-        world_state = campaign["world_state"]
-    else:
-        world_state = {
-            "location": "Town Square",
-            "players": [],
-            "description": "🌳 **Town Square** 🌳\n\nYou are in the bustling town square.\nAdventurers gather here, and the fountain sparkles in the sunlight.",
-            "image": None
-        }
-    chat_history = []
-    
-    # Load initial game state
-    saved_location = load_game_state(base_dir)
-    if saved_location:
-        starting_room = get_room(saved_location)
-        if starting_room:
-            world_state.update({
-                "location": saved_location,
-                "description": starting_room.get("description", world_state["description"]),
-                "image": starting_room.get("image")
-            })
+    startup = StartupTimer()
+    # discord_channel is a comma-separated allow-list; each channel runs its own campaign.
+    # The first one (or, with none configured, the first to load) keeps the original
+    # base_dir/db files (see CampaignRegistry).
+    channel_ids = [int(c) for c in (discord_channel or "").split(",") if c.strip()]
+    legacy_channel_id = channel_ids[0] if channel_ids else None
+
+    set_images_base_dir(base_dir)
+    # Command modules are imported once here; dispatch is a dict lookup from then on
+    with startup.phase("commands"):
+        commands.load()
+    with startup.phase("gear catalog"):
+        default_catalog.all()
+
+    # The bot owns one pooled HTTP client for all Ollama traffic
+    configure_http_client(max_connections=llm_max_connections, max_keepalive_connections=llm_max_keepalive)
+    bot.shutdown_hooks.append(close_http_client)
+    configure_llm_scheduler(max_concurrency=llm_max_concurrency)
+    # Repeat adjudications / room descriptions are answered from memory or db/llm_cache.sqlite3
+    with startup.phase("llm cache"):
+        llm_response_cache = LLMResponseCache(disk_path=base_dir / "db" / "llm_cache.sqlite3")
+    set_llm_cache(llm_response_cache)
+
+    async def close_llm_cache():
+        llm_response_cache.close()
+    bot.shutdown_hooks.append(close_llm_cache)
+
+    # Split deployment: generation runs in run_worker.py processes fed through a SQLite job queue
+    image_generate = ensure_world_image
+    if job_queue:
+        job_client = JobQueueClient(SQLiteJobQueue(job_queue))
+        set_llm_job_client(job_client)
+        image_generate = job_client.image
+        bot.shutdown_hooks.append(job_client.aclose)
+        print(f"[Bot] Offloading generation to workers via {job_queue}")
+
+    # Room images are generated in the background and edited into the room post when ready
+    image_jobs = ImageJobQueue(generate=image_generate, workers=image_workers)
+    bot.shutdown_hooks.append(image_jobs.aclose)
+    background_tasks = set()
+
+    def track_task(coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+        return task
+
+    # Example adventures/campaigns are chunked and indexed once, on first use (warmed in a
+    # thread once connected); generated campaign, adventure and room text joins the index
+    # under its campaign id
+    lore_index = None
+    lore_lock = threading.Lock()
+
+    def get_lore_index():
+        nonlocal lore_index
+        if lore_index is not None:
+            return lore_index
+        with lore_lock:
+            if lore_index is None:
+                lore_index = LoreIndex.from_directories([base_dir / "example_adventures", base_dir / "example_campaigns"])
+                print(f"[Bot] Indexed {len(lore_index.chunks)} lore chunks from {len(lore_index.documents)} example files")
+        return lore_index
+
+    def index_campaign(ctx):
+        campaign = ctx.store.get()
+        if campaign:
+            get_lore_index().add(f"{ctx.campaign_id}:campaign", campaign.get("main_story", ""), scope=ctx.campaign_id)
+            for i, adventure in enumerate(campaign.get("adventures", [])):
+                get_lore_index().add(f"{ctx.campaign_id}:adventure:{i}", adventure.get("summary", ""), scope=ctx.campaign_id)
+        for key, room in ctx.rooms.all().items():
+            index_room(ctx, key, room)
+
+    def index_room(ctx, location, room):
+        description = room.get("description") if room else None
+        if description:
+            get_lore_index().add(f"{ctx.campaign_id}:room:{get_room_key(location)}", f"# {location}\n\n{description}", scope=ctx.campaign_id)
+
+    def find_lore(query, scopes, k=None, doc_id=None):
+        return [chunk["text"] for chunk in get_lore_index().search(query, k=k or lore_chunks, scopes=scopes, doc_id=doc_id)]
+
+    async def summarize_turns(summary, turns):
+        """Fold turns that left the conversation buffer into the campaign's running summary."""
+        transcript = "\n".join(f"{t['sender']}: {t['message']}" for t in turns)
+        prompt = (
+            "Update the running summary of a tabletop RPG session with the new events below. "
+            "Keep names, places, items, open threads and decisions; drop flavour text. "
+            "Answer with the updated summary only, at most 200 words.\n\n"
+            f"Current summary:\n{summary or '(none yet)'}\n\nNew events:\n{transcript}"
+        )
+        return await get_llm_response(prompt, ollama_host, ollama_model, priority=PRIORITY_BACKGROUND)
+
+    async def on_campaign_loaded(ctx):
+        ctx.memory.summarize = summarize_turns
+        # The on_ready warm-up may still be building the index; wait for it in a thread
+        await asyncio.to_thread(get_lore_index)
+        index_campaign(ctx)
 
-    characters = load_characters()
-
-    def get_example_adventure_descriptions():
-        example_dirs = [base_dir / "example_adventures", base_dir / "example_campaigns"]
-        adventure_files = []
-        import glob
-        for d in example_dirs:
-            adventure_files.extend(glob.glob(str(d / "*.md")))
-        adventures = []
-        for file_path in adventure_files:
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read()
-                # Use the first heading and the first long paragraph as the description
-                lines = content.splitlines()
-                title = next((l.strip('# ').strip() for l in lines if l.startswith('#') or l.lower().startswith('campaign:')), "Example Adventure")
-                # Find the first paragraph after the title
-                desc = ""
-                for i, l in enumerate(lines):
-                    if l.startswith('#') or l.lower().startswith('campaign:'):
-                        # Find next non-empty, non-heading line
-                        for l2 in lines[i+1:]:
-                            if l2.strip() and not l2.startswith('#') and not l2.lower().startswith('campaign:'):
-                                desc = l2.strip()
-                                break
-                        break
-                adventures.append({"title": title, "description": desc, "full_text": content})
-        return adventures
-
-    async def start_new_campaign():
+        def on_room_prefetched(location, room):
+            index_room(ctx, location, room)
+            image_jobs.submit(location, room["description"], priority=PRIORITY_BACKGROUND)
+        # Optional speculative generation of neighbouring rooms (budget 0 = off)
+        ctx.prefetcher = RoomPrefetcher(
+            generate_room,
+            ctx.rooms.get,
+            ctx.rooms.set,
+            max_pending=prefetch_rooms,
+            on_generated=on_room_prefetched
+        )
+        if ctx.store.get() is None:
+            ensure_bootstrap(ctx)
+
+    def ensure_bootstrap(ctx):
+        """Start creating ctx's campaign in the background unless that is already under way."""
+        if ctx.bootstrap_task is not None and not ctx.bootstrap_task.done():
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Not connected yet; on_ready or the channel's first message starts it
+            return
+        ctx.bootstrap_task = track_task(bootstrap_campaign(ctx))
+
+    # One lazily loaded campaign per channel; idle ones are flushed and unloaded
+    campaigns = CampaignRegistry(
+        base_dir,
+        storage=storage,
+        legacy_channel_id=legacy_channel_id,
+        idle_timeout=campaign_idle_timeout,
+        on_load=on_campaign_loaded,
+        on_unload=lambda ctx: get_lore_index().remove_scope(ctx.campaign_id),
+        memory_turns=chat_history_turns
+    )
+    bot.shutdown_hooks.append(campaigns.aclose)
+
+    # Orphaned images are swept and the image directory kept under its quota in the background
+    image_cache = ImageCacheGC(
+        campaigns.room_references,
+        quota_bytes=int(image_cache_max_mb * 1024 * 1024),
+        policy=image_cache_policy,
+        interval=image_gc_interval
+    )
+    bot.shutdown_hooks.append(image_cache.aclose)
+
+    async def get_channel_campaign(channel):
+        """Campaign for a message's channel, or None if the bot should ignore it."""
+        if isinstance(channel, discord.DMChannel):
+            # DMs belong to the campaign of the only configured channel
+            return await campaigns.get(channel_ids[0]) if len(channel_ids) == 1 else None
+        if channel_ids and channel.id not in channel_ids:
+            return None
+        return await campaigns.get(channel.id)
+
+    async def start_new_campaign(ctx):
         # Use example adventures to inspire the campaign
-        example_adventures = get_example_adventure_descriptions()
+        example_adventures = get_lore_index().documents_in(EXAMPLES_SCOPE)
         if example_adventures:
             import random
             chosen = random.choice(example_adventures)
-            prompt = f"Design a campaign inspired by the following adventure path. Use the setting, themes, and structure, but adapt as needed for a new group:\n\n{chosen['title']}\n\n{chosen['description']}\n\n{chosen['full_text']}\n\nGive the campaign a name and a 2-3 sentence overarching story. Then, outline 3-5 short adventure summaries (1-2 sentences each) that could make up the campaign. Format as: Adventure 1: <summary>\nAdventure 2: <summary>..."
+            # Only the most relevant parts of the example, not the whole file
+            excerpts = find_lore(
+                f"{chosen['title']} {chosen['description']} setting city wasteland factions adventure",
+                scopes=[EXAMPLES_SCOPE],
+                doc_id=chosen["doc_id"]
+            )
+            excerpt_text = "\n\n".join(excerpts)
+            prompt = f"Design a campaign inspired by the following adventure path. Use the setting, themes, and structure, but adapt as needed for a new group:\n\n{chosen['title']}\n\n{chosen['description']}\n\n{excerpt_text}\n\nGive the campaign a name and a 2-3 sentence overarching story. Then, outline 3-5 short adventure summaries (1-2 sentences each) that could make up the campaign. Format as: Adventure 1: <summary>\nAdventure 2: <summary>..."
         else:
             prompt = "Create a new D&D campaign. Give it a name and a 2-3 sentence overarching story. Then, outline 3-5 short adventure summaries (1-2 sentences each) that could make up the campaign. Format as: Adventure 1: <summary>\nAdventure 2: <summary>..."
-        main_story = await get_llm_response(prompt, ollama_host, ollama_model)
+        main_story = await get_llm_response(prompt, ollama_host, ollama_model, priority=PRIORITY_BACKGROUND)
         # Parse adventure summaries from the LLM response
         import re
         adventure_summaries = []
@@ -132,7 +285,7 @@ def init_bot(
             adventure_summaries.append(match.strip())
         # Set world_state to match the start of the campaign/adventure if possible
         starting_location = "Town Square"
-        starting_description = world_state["description"]
+        starting_description = ctx.world_state["description"]
         if adventure_summaries:
             # Try to extract a location from the first adventure summary
             import re
@@ -170,18 +323,19 @@ def init_bot(
             "current_adventure": 0,
             "campaign_started": False
         }
-        save_campaign_json(campaign_json)
+        ctx.save_campaign_json(campaign_json)
+        get_lore_index().add(f"{ctx.campaign_id}:campaign", campaign["main_story"], scope=ctx.campaign_id)
         # Only create the first adventure now, using its summary as the prompt
         if adventure_summaries:
             campaign["adventures"] = []
             campaign["current_adventure"] = 0
-            first_adventure = await start_new_adventure(campaign)
+            first_adventure = await start_new_adventure(ctx, campaign)
             campaign["adventures"].append(first_adventure)
-        save_campaign_state(campaign)
+        ctx.store.set(campaign)
         return campaign
 
-    async def start_new_adventure(campaign):
-        campaign_json = load_campaign_json() or {}
+    async def start_new_adventure(ctx, campaign):
+        campaign_json = await ctx.load_campaign_json() or {}
         adv_idx = len(campaign["adventures"])
         # Use DM-provided description if available
         adventure_desc = ""
@@ -191,7 +345,11 @@ def init_bot(
             prompt = f"Create the full adventure for '{campaign['name']}' - Adventure: '{adventure_desc}'. Use the DM's description as the basis."
         else:
             prompt = f"Create a new short adventure for the campaign '{campaign['name']}'. Give it a name and a 1-2 sentence summary."
-        adv = await get_llm_response(prompt, ollama_host, ollama_model)
+        # Ground the adventure in the campaign so far and the closest example material
+        lore = find_lore(f"{campaign['name']} {adventure_desc}", scopes=[ctx.campaign_id, EXAMPLES_SCOPE])
+        if lore:
+            prompt += "\n\nRelevant lore:\n" + "\n---\n".join(lore)
+        adv = await get_llm_response(prompt, ollama_host, ollama_model, priority=PRIORITY_BACKGROUND)
         adventure = {
             "name": adv.split("\n")[0].strip(),
             "summary": adv.strip(),
@@ -199,8 +357,9 @@ def init_bot(
         }
         campaign["adventures"].append(adventure)
         campaign["current_adventure"] = len(campaign["adventures"]) - 1
-        campaign["world_state"] = world_state.copy()
-        save_campaign_state(campaign)
+        get_lore_index().add(f"{ctx.campaign_id}:adventure:{campaign['current_adventure']}", adventure["summary"], scope=ctx.campaign_id)
+        campaign["world_state"] = ctx.world_state.copy()
+        ctx.store.set(campaign)
         # Also update campaign.json with adventure summary if not present
         if campaign_json.get("adventures") and adv_idx < len(campaign_json["adventures"]):
             campaign_json["adventures"][adv_idx]["name"] = adventure["name"]
@@ -215,9 +374,55 @@ def init_bot(
             campaign_json["adventures"] = adventures_json
         campaign_json["current_adventure"] = campaign["current_adventure"]
         campaign_json["campaign_started"] = campaign.get("campaign_started", False)
-        save_campaign_json(campaign_json)
+        ctx.save_campaign_json(campaign_json)
         return adventure
 
+    async def bootstrap_campaign(ctx):
+        """Create the campaign for a channel that has none yet, then open Session Zero."""
+        try:
+            await start_new_campaign(ctx)
+            ensure_campaign_files(ctx)
+            channel = bot.get_channel(ctx.channel_id)
+            if channel:
+                await session_zero(channel)
+        except Exception as e:
+            print(f"[Bot] Could not create a campaign for channel {ctx.channel_id}: {e}")
+
+    def ensure_campaign_files(ctx):
+        if storage is None and not ctx.characters_path.exists():
+            ctx.save_characters({})
+        if not ctx.campaign_json_path.exists():
+            campaign = ctx.store.get()
+            if campaign:
+                campaign_json = {
+                    "name": campaign["name"],
+                    "main_story": campaign["main_story"],
+                    "adventures": [
+                        {
+                            "name": adv.get("name", ""),
+                            "summary": adv.get("summary", ""),
+                            "description": adv.get("summary", "")
+                        } for adv in campaign.get("adventures", [])
+                    ],
+                    "current_adventure": campaign.get("current_adventure", 0),
+                    "campaign_started": campaign.get("campaign_started", False)
+                }
+                ctx.save_campaign_json(campaign_json)
+
+    async def reply_with_llm(channel, prompt, render=None, priority=PRIORITY_QA):
+        """Answer prompt in channel, streaming the text in progressively when enabled."""
+        if stream_responses:
+            streamer = await stream_to_channel(
+                channel,
+                stream_llm_response(prompt, ollama_host, ollama_model, priority=priority),
+                render=render,
+                edit_interval=stream_edit_interval
+            )
+            await streamer.finish()
+        else:
+            response = await get_llm_response(prompt, ollama_host, ollama_model, priority=priority)
+            await channel.send(render(response) if render else response)
+
     def run_sync(awaitable):
         import asyncio
         try:
@@ -228,7 +433,18 @@ def init_bot(
     async def session_zero(channel):
         await channel.send("Game State: Session Zero\nWelcome to Session Zero! Let's create your characters. Each player, please say anything in chat to begin your character creation journey.")
 
-    async def guide_character_creation(user):
+    async def start_character_creation(ctx, user):
+        """Run guide_character_creation unless this user already has one waiting on their answers."""
+        user_id = str(user.id)
+        if user_id in ctx.creating_characters:
+            return
+        ctx.creating_characters.add(user_id)
+        try:
+            await guide_character_creation(ctx, user)
+        finally:
+            ctx.creating_characters.discard(user_id)
+
+    async def guide_character_creation(ctx, user):
         dm = await user.create_dm()
         # World/setting intro for the player
         await dm.send("""
@@ -245,25 +461,23 @@ Welcome to the campaign! All adventures take place in and around a sprawling Meg
         await dm.send(f"Awesome! Give me a one-sentence backstory for {name}.")
         backstory_msg = await bot.wait_for('message', check=check)
         backstory = backstory_msg.content.strip()
-        char_data = {"name": name, "race_class": race_class, "backstory": backstory}
-        characters[str(user.id)] = char_data
-        save_characters(characters)
+        ctx.characters[str(user.id)] = Character(name, race_class=race_class, backstory=backstory)
+        ctx.save_characters(user_id=str(user.id))
         # --- AUTO-SAVE CAMPAIGN STATE (character join) ---
-        campaign = load_campaign_state()
+        campaign = ctx.store.get()
         if campaign:
+            world_state = ctx.world_state
             if "players" not in world_state:
                 world_state["players"] = []
             user_mention = get_user_mention(user, None)
             if user_mention not in world_state["players"]:
                 world_state["players"].append(user_mention)
-            campaign["world_state"] = world_state.copy()
-            save_campaign_state(campaign)
+            ctx.store.update_world_state(world_state)
         await dm.send(f"Character creation complete! Welcome, {name} the {race_class}.")
-        # Announce in main channel
-        if discord_channel:
-            channel = bot.get_channel(int(discord_channel))
-            if channel:
-                await channel.send(f"{user.display_name} has created a character! Game State: Session Zero.")
+        # Announce in the campaign's channel
+        channel = bot.get_channel(ctx.channel_id)
+        if channel:
+            await channel.send(f"{user.display_name} has created a character! Game State: Session Zero.")
 
     # --- State Machine States ---
     # 'pre_session_zero' - No campaign exists
@@ -275,8 +489,10 @@ Welcome to the campaign! All adventures take place in and around a sprawling Meg
     # 'downtime' - Between adventures, shopping/roleplay
     # 'roleplay_scene' - Focused social/roleplay scene
 
-    def get_campaign_state():
-        campaign = load_campaign_state()
+    def get_campaign_state(ctx):
+        if ctx.bootstrap_task is not None and not ctx.bootstrap_task.done():
+            return 'setting_up'
+        campaign = ctx.store.get()
         if not campaign:
             return 'pre_session_zero'
         # Use explicit state field if present
@@ -291,48 +507,45 @@ Welcome to the campaign! All adventures take place in and around a sprawling Meg
             return 'adventure_running'
         return 'campaign_started'
 
-    async def set_campaign_state(new_state, announce=True):
-        campaign = load_campaign_state()
+    async def set_campaign_state(ctx, new_state, announce=True):
+        campaign = ctx.store.get()
         if not campaign:
             return
         campaign['state'] = new_state
-        save_campaign_state(campaign)
-        if announce and discord_channel:
-            channel = bot.get_channel(int(discord_channel))
+        ctx.store.set(campaign)
+        if announce:
+            channel = bot.get_channel(ctx.channel_id)
             if channel:
                 await channel.send(f"Game State changed: **{new_state.replace('_', ' ').title()}**")
 
     # Example: transition to combat encounter
-    async def start_combat_encounter():
-        await set_campaign_state('combat_encounter')
-        if discord_channel:
-            channel = bot.get_channel(int(discord_channel))
-            if channel:
-                await channel.send("A combat encounter has begun! The LLM will now manage initiative, turns, and actions.")
+    async def start_combat_encounter(ctx):
+        await set_campaign_state(ctx, 'combat_encounter')
+        channel = bot.get_channel(ctx.channel_id)
+        if channel:
+            await channel.send("A combat encounter has begun! The LLM will now manage initiative, turns, and actions.")
 
-    async def handle_combat_encounter_message(message):
+    async def handle_combat_encounter_message(ctx, message):
         # Insert LLM prompt logic for combat here
         await message.channel.send("[Combat Encounter] The LLM should now prompt for initiative and manage combat turns.")
 
-    async def start_roleplay_scene():
-        await set_campaign_state('roleplay_scene')
-        if discord_channel:
-            channel = bot.get_channel(int(discord_channel))
-            if channel:
-                await channel.send("A focused roleplay scene has begun! The LLM will facilitate social interaction and choices.")
+    async def start_roleplay_scene(ctx):
+        await set_campaign_state(ctx, 'roleplay_scene')
+        channel = bot.get_channel(ctx.channel_id)
+        if channel:
+            await channel.send("A focused roleplay scene has begun! The LLM will facilitate social interaction and choices.")
 
-    async def handle_roleplay_scene_message(message):
+    async def handle_roleplay_scene_message(ctx, message):
         # Insert LLM prompt logic for roleplay here
         await message.channel.send("[Roleplay Scene] The LLM should now facilitate social interaction and choices.")
 
-    async def start_downtime():
-        await set_campaign_state('downtime')
-        if discord_channel:
-            channel = bot.get_channel(int(discord_channel))
-            if channel:
-                await channel.send("Downtime has begun! Players may shop, craft, or roleplay freely.")
+    async def start_downtime(ctx):
+        await set_campaign_state(ctx, 'downtime')
+        channel = bot.get_channel(ctx.channel_id)
+        if channel:
+            await channel.send("Downtime has begun! Players may shop, craft, or roleplay freely.")
 
-    async def handle_downtime_message(message):
+    async def handle_downtime_message(ctx, message):
         # Insert LLM prompt logic for downtime here
         await message.channel.send("[Downtime] The LLM should now handle shopping, crafting, and freeform roleplay.")
 
@@ -341,11 +554,31 @@ Welcome to the campaign! All adventures take place in and around a sprawling Meg
     async def on_message(message):
         if message.author.bot:
             return
-        if discord_channel and str(message.channel.id) != discord_channel:
+        ctx = await get_channel_campaign(message.channel)
+        if ctx is None:
             return
-        state = get_campaign_state()
+        # Idle campaigns are only unloaded while none of their messages are being handled
+        ctx.active_handlers += 1
+        try:
+            await route_message(ctx, message)
+        finally:
+            ctx.active_handlers -= 1
+            ctx.touch()
+
+    async def route_message(ctx, message):
+        state = get_campaign_state(ctx)
+        user_id = str(message.author.id)
+        if state == 'setting_up':
+            await message.channel.send("The DM is still preparing the campaign. Session Zero will open in the channel shortly.")
+            return
+        if state == 'pre_session_zero':
+            # An earlier bootstrap failed (e.g. Ollama was down); try again
+            ensure_bootstrap(ctx)
         # Only allow character creation during session_zero
         if isinstance(message.channel, discord.DMChannel):
+            if user_id in ctx.creating_characters:
+                # An answer to a creation question; the running flow's wait_for consumes it
+                return
             if state == 'pre_session_zero':
                 await message.channel.send("The campaign setup is not complete yet. Please wait for the DM to begin Session Zero and character creation.")
                 return
@@ -358,24 +591,23 @@ Welcome to the campaign! All adventures take place in and around a sprawling Meg
                     mentioned = True
                 elif bot.user and bot.user.name.lower() in content.lower():
                     mentioned = True
-                if user_id not in characters:
-                    await guide_character_creation(message.author)
+                if user_id not in ctx.characters:
+                    await start_character_creation(ctx, message.author)
                     return
                 if content.startswith('!'):
-                    await handle_command(message, content)
+                    await handle_command(ctx, message, content)
                 elif mentioned:
-                    await handle_session_zero_question(message)
+                    await handle_session_zero_question(ctx, message)
                 else:
                     # Remain silent, let players chat among themselves
                     pass
                 return
-        user_id = str(message.author.id)
         if state == 'pre_session_zero':
             await message.channel.send("The campaign setup is not complete yet. Please wait for the DM to begin Session Zero and character creation.")
             return
         if state == 'session_zero':
-            if user_id not in characters:
-                await guide_character_creation(message.author)
+            if user_id not in ctx.characters:
+                await start_character_creation(ctx, message.author)
                 return
             content = message.content.strip()
             # Only answer if the bot is mentioned
@@ -386,9 +618,9 @@ Welcome to the campaign! All adventures take place in and around a sprawling Meg
             elif bot.user and bot.user.name.lower() in content.lower():
                 mentioned = True
             if content.startswith('!'):
-                await handle_command(message, content)
+                await handle_command(ctx, message, content)
             elif mentioned:
-                await handle_session_zero_question(message)
+                await handle_session_zero_question(ctx, message)
             else:
                 # Remain silent, let players chat among themselves
                 pass
@@ -396,34 +628,34 @@ Welcome to the campaign! All adventures take place in and around a sprawling Meg
         if state == 'campaign_started':
             content = message.content.strip()
             if content.startswith('!'):
-                await handle_command(message, content)
+                await handle_command(ctx, message, content)
             else:
-                await handle_campaign_started_message(message)
+                await handle_campaign_started_message(ctx, message)
             return
         if state == 'adventure_running':
             content = message.content.strip()
             if content.startswith('!'):
-                await handle_command(message, content)
+                await handle_command(ctx, message, content)
             else:
-                await handle_player_message(message)
+                await handle_player_message(ctx, message)
             return
         if state == 'hacking_challenge':
-            await handle_hacking_challenge_message(message)
+            await handle_hacking_challenge_message(ctx, message)
             return
         if state == 'combat_encounter':
-            await handle_combat_encounter_message(message)
+            await handle_combat_encounter_message(ctx, message)
             return
         if state == 'roleplay_scene':
-            await handle_roleplay_scene_message(message)
+            await handle_roleplay_scene_message(ctx, message)
             return
         if state == 'downtime':
-            await handle_downtime_message(message)
+            await handle_downtime_message(ctx, message)
             return
         # If unknown state, ignore all messages
 
-    async def handle_campaign_started_message(message):
+    async def handle_campaign_started_message(ctx, message):
         """Handle player messages during campaign_started (shopping, downtime, pre-adventure)."""
-        campaign = load_campaign_state()
+        campaign = ctx.store.get()
         if not campaign:
             await message.channel.send("No campaign info available yet.")
             return
@@ -435,186 +667,240 @@ Welcome to the campaign! All adventures take place in and around a sprawling Meg
             "Do NOT start the adventure or narrate story events.\n\n"
             f"Campaign Info:\n{context}\n\nPlayer Message:\n{message.content.strip()}"
         )
-        response = await get_llm_response(prompt, ollama_host, ollama_model)
-        await message.channel.send(response)
-
-    async def handle_command(message, content):
-        state = get_campaign_state()
-        parts = content[1:].split()
-        command = parts[0].lower() if parts else ''
-        args = parts[1:]
-        if command == 'startcampaign':
-            if state != 'session_zero':
-                await message.channel.send("You can only start the campaign after Session Zero (character creation phase).")
-                return
-            campaign = load_campaign_state()
-            if not campaign:
-                await message.channel.send("No campaign exists. Please ask all players to create their characters first.")
-                return
-            if campaign.get('campaign_started'):
-                await message.channel.send("Campaign has already started!")
-                return
-            # Mark campaign as started
-            campaign['campaign_started'] = True
-            campaign['state'] = 'campaign_started'
-            save_campaign_state(campaign)
-            await message.channel.send("Campaign is starting!")
-            await send_initial_world_state()
+        await reply_with_llm(message.channel, prompt)
+
+    @command("startcampaign", states=("session_zero",), state_error="You can only start the campaign after Session Zero (character creation phase).")
+    async def start_campaign_command(message, ctx):
+        campaign = ctx.store.get()
+        if not campaign:
+            await message.channel.send("No campaign exists. Please ask all players to create their characters first.")
             return
-        if command == 'startadventure':
-            if state != 'campaign_started':
-                await message.channel.send("You can only start a new adventure after the campaign has started and no adventure is running.")
-                return
-            campaign = load_campaign_state()
-            adv_idx = campaign.get('current_adventure', 0)
-            if adv_idx < len(campaign.get('adventures', [])) and not campaign['adventures'][adv_idx].get('completed', False):
-                await message.channel.send("Current adventure is still ongoing!")
-                return
-            # Start a new adventure
-            adventure = await start_new_adventure(campaign)
-            campaign['state'] = 'adventure_running'
-            save_campaign_state(campaign)
-            await message.channel.send(f"**New Adventure!**\n{adventure['name']}\n{adventure['summary']}")
-            await send_initial_world_state()
+        if campaign.get('campaign_started'):
+            await message.channel.send("Campaign has already started!")
             return
-        if state != 'adventure_running' and command not in ['help', 'players']:
-            await message.channel.send("You can only use this command during an active adventure.")
+        # Mark campaign as started
+        campaign['campaign_started'] = True
+        campaign['state'] = 'campaign_started'
+        ctx.store.set(campaign)
+        await message.channel.send("Campaign is starting!")
+        await send_initial_world_state(ctx)
+
+    @command("startadventure", states=("campaign_started",), state_error="You can only start a new adventure after the campaign has started and no adventure is running.")
+    async def start_adventure_command(message, ctx):
+        campaign = ctx.store.get()
+        adv_idx = campaign.get('current_adventure', 0)
+        if adv_idx < len(campaign.get('adventures', [])) and not campaign['adventures'][adv_idx].get('completed', False):
+            await message.channel.send("Current adventure is still ongoing!")
             return
-        if command in command_map and command_map[command][0]:
-            module_name, func_name = command_map[command]
-            mod = importlib.import_module(module_name)
-            func = getattr(mod, func_name)
-            kwargs = {
-                'characters': characters,
-                'save_characters': save_characters,
+        # Start a new adventure
+        adventure = await start_new_adventure(ctx, campaign)
+        campaign['state'] = 'adventure_running'
+        ctx.store.set(campaign)
+        await message.channel.send(f"**New Adventure!**\n{adventure['name']}\n{adventure['summary']}")
+        await send_initial_world_state(ctx)
+
+    def command_deps(ctx):
+        # Built once per campaign; every handler picks the names its signature asks for
+        if ctx.command_deps is None:
+            ctx.command_deps = {
+                'ctx': ctx,
+                'characters': ctx.characters,
+                'save_characters': ctx.save_characters,
                 'ollama_host': ollama_host,
                 'ollama_model': ollama_model,
-                'handle_movement': handle_movement,
-                'world_state': world_state
+                'handle_movement': functools.partial(handle_movement, ctx),
+                'world_state': ctx.world_state,
+                'image_cache': image_cache
             }
-            await func(message, args, **kwargs)
-            # --- AUTO-SAVE CAMPAIGN STATE after any command ---
-            campaign = load_campaign_state()
-            if campaign:
-                campaign["world_state"] = world_state.copy()
-                save_campaign_state(campaign)
-        else:
-            await message.channel.send(f"Unknown command: {command}")
+        return ctx.command_deps
+
+    commands.validate(COMMAND_DEPENDENCIES)
+
+    async def handle_command(ctx, message, content):
+        if not await commands.dispatch(message, content, get_campaign_state(ctx), command_deps(ctx)):
+            await message.channel.send(f"Unknown command: {content[1:].split(' ')[0].lower()}")
+            return
+        # --- AUTO-SAVE CAMPAIGN STATE after any command ---
+        ctx.store.update_world_state(ctx.world_state)
 
-    async def send_initial_world_state():
+    async def send_initial_world_state(ctx):
         # Only show world state if campaign has started
-        campaign = load_campaign_state()
+        campaign = ctx.store.get()
         if not campaign or not campaign.get('campaign_started'):
             return
         # Load or create campaign/adventure
-        campaign = load_campaign_state()
+        campaign = ctx.store.get()
         if not campaign:
-            campaign = await start_new_campaign()
-            adventure = await start_new_adventure(campaign)
+            campaign = await start_new_campaign(ctx)
+            adventure = await start_new_adventure(ctx, campaign)
             msg = f"**New Campaign Started!**\n{campaign['main_story']}\n\n**First Adventure:** {adventure['name']}\n{adventure['summary']}"
         else:
             adv_idx = campaign.get("current_adventure", 0)
             if adv_idx >= len(campaign["adventures"]):
-                adventure = await start_new_adventure(campaign)
+                adventure = await start_new_adventure(ctx, campaign)
                 msg = f"**New Adventure!**\n{adventure['name']}\n{adventure['summary']}"
             else:
                 adventure = campaign["adventures"][adv_idx]
                 msg = f"**Resuming Adventure:** {adventure['name']}\n{adventure['summary']}"
-        channel = bot.get_channel(int(discord_channel))
+        channel = bot.get_channel(ctx.channel_id)
         if channel:
             # Send long messages in chunks of 2000 characters or less
             max_len = 2000
             for i in range(0, len(msg), max_len):
                 await channel.send(msg[i:i+max_len])
-        world_msg = f"**Current Location:** {world_state['location']}\n\n{world_state['description']}"
+        if channel:
+            await send_room_update(ctx, channel)
+        # --- AUTO-SAVE CAMPAIGN STATE after world state update ---
+        ctx.store.update_world_state(ctx.world_state)
+
+    def build_room_embed(world_msg, image_path, image_bytes):
+        embed = discord.Embed(description=world_msg)
+        file = File(io.BytesIO(image_bytes), Path(image_path).name)
+        embed.set_image(url=f"attachment://{Path(image_path).name}")
+        return embed, file
+
+    async def send_room_update(ctx, channel):
+        """Post the current location right away; a missing image is generated in the background and edited in."""
+        world_state = ctx.world_state
+        location = world_state["location"]
+        world_msg = f"**Current Location:** {location}\n\n{world_state['description']}"
         image_path = world_state.get("image")
-        if not image_path:
-            # Generate image if missing using ensure_world_image (only pass required args)
-            image_path = await ensure_world_image(world_state["location"], world_state["description"])
-            world_state["image"] = image_path
-        print(f"[DEBUG] image_path: {image_path}, exists: {Path(image_path).exists() if image_path else 'N/A'}")
-        if image_path and Path(image_path).exists():
+        image_bytes = await default_io.read_bytes(image_path) if image_path else None
+        if image_bytes:
             print(f"[DEBUG] Sending image to Discord: {image_path}")
-            embed = discord.Embed(description=world_msg)
-            file = File(image_path, Path(image_path).name)
-            embed.set_image(url=f"attachment://{Path(image_path).name}")
+            embed, file = build_room_embed(world_msg, image_path, image_bytes)
             await channel.send(embed=embed, file=file)
-        else:
-            print(f"[DEBUG] No image to send. image_path: {image_path}")
-            await channel.send(world_msg)
-        # --- AUTO-SAVE CAMPAIGN STATE after world state update ---
-        campaign = load_campaign_state()
-        if campaign:
-            campaign["world_state"] = world_state.copy()
-            save_campaign_state(campaign)
+            note_image_served(image_path)
+            return
+        sent = await channel.send(world_msg)
+        job = image_jobs.submit(location, world_state["description"])
+        track_task(attach_room_image(ctx, sent, location, world_msg, job))
 
-    async def handle_player_message(message):
+    async def attach_room_image(ctx, sent, location, world_msg, job):
+        image_path = await job
+        image_bytes = await default_io.read_bytes(image_path) if image_path else None
+        if not image_bytes:
+            print(f"[DEBUG] No image to send for {location}. image_path: {image_path}")
+            return
+        room = ctx.rooms.get(location)
+        if room is not None and room.get("image") != image_path:
+            room["image"] = image_path
+            ctx.rooms.set(location, room)
+        if ctx.world_state["location"] == location:
+            ctx.world_state["image"] = image_path
+            ctx.store.update_world_state(ctx.world_state)
+        embed, file = build_room_embed(world_msg, image_path, image_bytes)
+        try:
+            await sent.edit(content=None, embed=embed, attachments=[file])
+        except Exception as e:
+            print(f"[Bot] Could not edit image into room post, sending separately: {e}")
+            await sent.channel.send(file=File(io.BytesIO(image_bytes), Path(image_path).name))
+        note_image_served(image_path)
+
+    async def handle_player_message(ctx, message):
         player = str(message.author)
         content = message.content.strip()
         
-        if player not in world_state["players"]:
-            world_state["players"].append(player)
+        if player not in ctx.world_state["players"]:
+            ctx.world_state["players"].append(player)
             # --- AUTO-SAVE CAMPAIGN STATE ---
-            campaign = load_campaign_state()
-            if campaign:
-                campaign["world_state"] = world_state.copy()
-                save_campaign_state(campaign)
+            ctx.store.update_world_state(ctx.world_state)
         
-        chat_history.append({"sender": player, "message": content})
-        await process_player_action(message, content)
+        await process_player_action(ctx, message, content)
 
-    async def process_player_action(message, content: str):
-        prev_location = world_state["location"]
-        new_location = detect_movement(content, prev_location, get_room)
-        if new_location:
+    async def process_player_action(ctx, message, content: str):
+        prev_location = ctx.world_state["location"]
+        char = ctx.characters.get(str(message.author.id))
+        intent = ctx.intents.detect(content, prev_location, char.inventory if char else ())
+        if intent and intent.kind == "move":
             # Instead of calling handle_movement directly, call the !move command as if the player did
-            fake_command = f"!move {new_location}"
-            await handle_command(message, fake_command)
+            fake_command = f"!move {intent.name}"
+            await handle_command(ctx, message, fake_command)
+        elif intent:
+            # "What's for sale?", "I equip my pistol", "roll a d20": handled locally, no LLM call
+            await handle_command(ctx, message, " ".join([f"!{intent.name}"] + intent.args))
         else:
-            await generate_dm_response(message, content, prev_location)
+            await dm_reply_coalescer.submit(message.channel.id, (ctx, message, content, prev_location))
+
+    async def generate_coalesced_dm_response(channel_id, batch):
+        """Answer one or more near-simultaneous player actions in the same scene with a single LLM call."""
+        if len(batch) == 1:
+            await generate_dm_response(*batch[0])
+            return
+        ctx, message, _, prev_location = batch[-1]
+        lines = [f"- {m.author.display_name}: {c}" for _, m, c, _ in batch]
+        combined = (
+            "Several players act at the same time. Resolve all of their actions together in one response:\n"
+            + "\n".join(lines)
+        )
+        turns = [(str(m.author), c) for _, m, c, _ in batch]
+        await generate_dm_response(ctx, message, combined, prev_location, turns=turns)
 
-    async def handle_movement(message, new_location: str, prev_location: str, via_command=False):
+    dm_reply_coalescer = MessageCoalescer(generate_coalesced_dm_response, window=coalesce_window)
+
+    async def handle_movement(ctx, message, new_location: str, prev_location: str, via_command=False):
         if not via_command:
             await message.channel.send("All movement must use the !move command.")
             return
-        world_state["location"] = new_location
-        save_game_state(base_dir, new_location)
-        next_room = get_room(new_location)
+        # Exit labels ("back", "north gate") resolve to their room; known rooms further
+        # away are reached along the room graph without generating anything per hop
+        exit_target = ctx.graph.resolve_exit(prev_location, new_location)
+        if exit_target:
+            new_location = exit_target
+        elif ctx.rooms.get(new_location):
+            new_location = ctx.graph.name_of(new_location)
+            route = ctx.graph.shortest_path(prev_location, new_location)
+            if route and len(route) > 2:
+                await message.channel.send(f"You travel {' → '.join(route)}.")
+                prev_location = route[-2]
+        ctx.world_state["location"] = new_location
+        ctx.save_location(new_location)
+        next_room = ctx.rooms.get(new_location)
+        if not next_room:
+            # A speculative generation may already be under way for this exit
+            next_room = await ctx.prefetcher.wait_for(new_location)
         if not next_room:
-            await create_new_room(message, new_location, prev_location)
+            await create_new_room(ctx, message, new_location, prev_location)
         else:
+            if next_room.pop("provisional", False):
+                # First visit to a prefetched room: it becomes a regular room
+                ctx.rooms.set(new_location, next_room)
             # Ensure two-way connection
-            prev_room = get_room(prev_location)
-            if prev_room:
-                exits = prev_room.get("exits", [])
-                if new_location not in exits:
-                    exits.append(new_location)
-                    prev_room["exits"] = exits
-                    set_room(prev_location, prev_room)
-            update_world_state_from_room(world_state, next_room)
-        await send_room_update(message.channel)
+            link_rooms(ctx, prev_location, new_location)
+            update_world_state_from_room(ctx.world_state, next_room)
+        await send_room_update(ctx, message.channel)
         # --- AUTO-SAVE CAMPAIGN STATE ---
-        campaign = load_campaign_state()
-        if campaign:
-            campaign["world_state"] = world_state.copy()
-            save_campaign_state(campaign)
+        ctx.store.update_world_state(ctx.world_state)
+        current_room = ctx.rooms.get(new_location) or {}
+        ctx.prefetcher.schedule(new_location, current_room.get("exits", {}))
+
+    def link_rooms(ctx, prev_location: str, new_location: str):
+        """Make sure prev_location has an exit leading to new_location."""
+        prev_room = ctx.rooms.get(prev_location)
+        if not prev_room:
+            return
+        prev_exits = normalize_exits(prev_room.get("exits"))
+        if get_room_key(new_location) not in {get_room_key(t) for t in prev_exits.values()}:
+            prev_exits[new_location.lower()] = new_location
+            prev_room["exits"] = prev_exits
+            ctx.rooms.set(prev_location, prev_room)
 
-    async def create_new_room(message, new_location: str, prev_location: str):
-        prev_room = get_room(prev_location)
+    async def generate_room(new_location: str, prev_location: str, background=False):
+        """Ask the LLM to describe a new room connected to prev_location. Returns the room dict without storing it."""
         # Prompt LLM to generate a room with at least one exit, including the previous room
         llm_prompt = (
             f"Describe the new room '{new_location}' that connects to '{prev_location}'. "
             f"The room must have at least one exit, and one exit must be '{prev_location}'. "
             f"List all exits at the end in the format: Exits: ..."
         )
-        server_message = await get_llm_response(llm_prompt, ollama_host, ollama_model)
+        priority = PRIORITY_BACKGROUND if background else PRIORITY_INTERACTIVE
+        server_message = await get_llm_response(llm_prompt, ollama_host, ollama_model, priority=priority, cache=True)
         exits = extract_exits_from_dm(server_message)
         # Guarantee at least one exit (the previous room)
         if prev_location not in exits:
             exits.append(prev_location)
         if not exits:
             exits = [prev_location]
-        image_path = await ensure_world_image(new_location, server_message)
         # Build named exits: use LLM to suggest names, fallback to generic if needed
         named_exits = {}
         for exit_name in exits:
@@ -623,35 +909,54 @@ Welcome to the campaign! All adventures take place in and around a sprawling Meg
             else:
                 # Use the exit name as the direction if possible
                 named_exits[exit_name.lower()] = exit_name
-        set_room(new_location, {
+        return {
+            "name": new_location,
             "description": server_message,
-            "image": image_path,
+            "image": None,
             "exits": named_exits,
             "previous": prev_location
-        })
+        }
+
+    async def create_new_room(ctx, message, new_location: str, prev_location: str):
+        room = await generate_room(new_location, prev_location)
+        # Start the image now; send_room_update attaches it once it is ready
+        image_jobs.submit(new_location, room["description"])
+        ctx.rooms.set(new_location, room)
+        index_room(ctx, new_location, room)
         # Ensure two-way connection in previous room
-        if prev_room:
-            prev_exits = prev_room.get("exits", {})
-            if isinstance(prev_exits, list):
-                prev_exits = {e: new_location for e in prev_exits if e != new_location}
-            if new_location not in prev_exits.values():
-                prev_exits["forward"] = new_location
-                prev_room["exits"] = prev_exits
-                set_room(prev_location, prev_room)
-        world_state.update({
-            "description": server_message,
-            "image": image_path
+        link_rooms(ctx, prev_location, new_location)
+        ctx.world_state.update({
+            "description": room["description"],
+            "image": room["image"]
         })
         # --- AUTO-SAVE CAMPAIGN STATE ---
-        campaign = load_campaign_state()
-        if campaign:
-            campaign["world_state"] = world_state.copy()
-            save_campaign_state(campaign)
+        ctx.store.update_world_state(ctx.world_state)
 
-    async def generate_dm_response(message, content: str, prev_location: str):
+    async def generate_dm_response(ctx, message, content: str, prev_location: str, turns=None):
+        mention_replacer = lambda t, c: replace_mentions(t, c, get_user_mention)
+        world_state = ctx.world_state
+        # Reuse the channel's Ollama context until the party changes scene
+        session = ctx.llm_session
+        scene = world_state["location"]
+        action = content
+        if session.context_for(ollama_model, scene) is None:
+            # Fresh context (new scene or reset): ground the reply in the campaign memory
+            lore = find_lore(f"{scene} {action}", scopes=[ctx.campaign_id], k=2)
+            content = ctx.memory.build_prompt(action, scene, world_state.get("description"), prompt_token_budget, lore=lore)
         async with message.channel.typing():
-            server_message = await get_llm_response(content, ollama_host, ollama_model)
-            room_data = get_room(world_state["location"]) or {}
+            if stream_responses:
+                # Show the room image first, then let the reply grow underneath it
+                await send_world_image(message.channel, world_state)
+                streamer = await stream_to_channel(
+                    message.channel,
+                    stream_llm_response(content, ollama_host, ollama_model, priority=PRIORITY_INTERACTIVE, session=session, scene=scene),
+                    render=lambda text: format_dm_reply(text, None, message.channel, mention_replacer, partial=True),
+                    edit_interval=stream_edit_interval
+                )
+                server_message = streamer.text
+            else:
+                server_message = await get_llm_response(content, ollama_host, ollama_model, priority=PRIORITY_INTERACTIVE, session=session, scene=scene)
+            room_data = ctx.rooms.get(world_state["location"]) or {}
             exits = extract_exits_from_dm(server_message)
             # Remove any existing Exits line from the LLM response
             import re
@@ -659,20 +964,27 @@ Welcome to the campaign! All adventures take place in and around a sprawling Meg
             # Always append Exits line to the message
             exits_line = f"Exits: {', '.join(exits) if exits else 'None'}"
             server_message = server_message + f"\n\n{exits_line}"
-            chat_history.append({"sender": "DM", "message": server_message})
+            for sender, text in turns or [(str(message.author), action)]:
+                ctx.memory.append(sender, text)
+            ctx.memory.append("DM", server_message)
             if exits:
-                room_data["exits"] = exits
-                set_room(world_state["location"], room_data)
-            await send_dm_response(message.channel, server_message, exits, world_state, lambda t, c: replace_mentions(t, c, get_user_mention))
+                # Exits the DM mentions are added to the room's known exits (canonical dict form)
+                room_exits = normalize_exits(room_data.get("exits"))
+                room_exits.update(normalize_exits(exits))
+                room_data["exits"] = room_exits
+                room_data.setdefault("name", world_state["location"])
+                ctx.rooms.set(world_state["location"], room_data)
+                ctx.prefetcher.schedule(world_state["location"], exits)
+            if stream_responses:
+                await streamer.finish(format_dm_reply(server_message, exits, message.channel, mention_replacer))
+            else:
+                await send_dm_response(message.channel, server_message, exits, world_state, mention_replacer)
             # --- AUTO-SAVE CAMPAIGN STATE ---
-            campaign = load_campaign_state()
-            if campaign:
-                campaign["world_state"] = world_state.copy()
-                save_campaign_state(campaign)
+            ctx.store.update_world_state(world_state)
 
-    async def handle_session_zero_question(message):
+    async def handle_session_zero_question(ctx, message):
         """Answer player questions about the campaign/rules during session_zero after character creation."""
-        campaign = load_campaign_state()
+        campaign = ctx.store.get()
         if not campaign:
             await message.channel.send("No campaign info available yet.")
             return
@@ -686,36 +998,31 @@ Welcome to the campaign! All adventures take place in and around a sprawling Meg
             f"Campaign Info:\n{context_clean}\n\nPlayer Question:\n{message.content.strip()}"
         )
         async with message.channel.typing():
-            response = await get_llm_response(prompt, ollama_host, ollama_model)
-            response_clean = re.sub(r"^.*Exits:.*$", "", response, flags=re.MULTILINE).strip()
-            await message.channel.send(response_clean)
+            await reply_with_llm(
+                message.channel,
+                prompt,
+                render=lambda text: re.sub(r"^.*Exits:.*$", "", text, flags=re.MULTILINE).strip()
+            )
 
-    # Ensure DB files exist, create if missing
-    if not CAMPAIGN_STATE_PATH.exists():
-        # Create a new campaign and save to file
-        import asyncio
-        campaign = asyncio.get_event_loop().run_until_complete(start_new_campaign())
-        save_campaign_state(campaign)
-    if not CHARACTERS_PATH.exists():
-        with open(CHARACTERS_PATH, "w", encoding="utf-8") as f:
-            json.dump({}, f, indent=2)
-    if not CAMPAIGN_JSON_PATH.exists():
-        campaign = load_campaign_state()
-        if campaign:
-            campaign_json = {
-                "name": campaign["name"],
-                "main_story": campaign["main_story"],
-                "adventures": [
-                    {
-                        "name": adv.get("name", ""),
-                        "summary": adv.get("summary", ""),
-                        "description": adv.get("summary", "")
-                    } for adv in campaign.get("adventures", [])
-                ],
-                "current_adventure": campaign.get("current_adventure", 0),
-                "campaign_started": campaign.get("campaign_started", False)
-            }
-            save_campaign_json(campaign_json)
+    # Registered last so every other hook's final writes are drained first
+    bot.shutdown_hooks.append(default_io.aclose)
+
+    @bot.event
+    async def on_ready():
+        # Fires again on every reconnect; startup work only runs once
+        if startup.reported:
+            return
+        startup.mark("gateway connected")
+        image_cache.start()
+        with startup.phase("lore index"):
+            await asyncio.to_thread(get_lore_index)
+        # The first configured channel's campaign is loaded (and, if it has none yet,
+        # created in the background); other channels load on their first message
+        if legacy_channel_id is not None:
+            with startup.phase("campaign load"):
+                ctx = await campaigns.get(legacy_channel_id)
+                if ctx.store.get() is not None:
+                    ensure_campaign_files(ctx)
+        startup.report()
 
-    # At the end of init_bot, start the bot and block the main thread
-    bot.run(discord_token)
\ No newline at end of file
+    return bot
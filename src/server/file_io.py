@@ -0,0 +1,108 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from utils.file_utils import atomic_write_bytes
+import serializer
+
+class FileIO:
+    """
+    Runs blocking file work (JSON reads/writes, journal appends, image decoding) on a
+    small thread pool so the event loop never waits on the disk. Jobs for the same path
+    run one at a time in submission order, so an append, a snapshot and a truncate of
+    one file can never interleave. Without a running event loop (scripts, tools) the
+    work simply runs inline.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._executor = None
+        self._tails = {}
+        self._pending = set()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="file-io")
+        return self._executor
+
+    def submit(self, path, fn, *args, report: bool = True):
+        """
+        Queue fn(*args) behind earlier jobs for path and return its task, or run it
+        right away and return None when there is no event loop. Failures of jobs
+        nobody awaits are logged when report is set.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            fn(*args)
+            return None
+        key = os.path.abspath(path)
+        task = loop.create_task(self._run_after(self._tails.get(key), fn, args))
+        self._tails[key] = task
+        self._pending.add(task)
+        task.add_done_callback(lambda t: self._finished(key, t, report))
+        return task
+
+    async def _run_after(self, previous, fn, args):
+        if previous is not None:
+            # Only ordering matters here; the earlier job's error is its own
+            await asyncio.wait([previous])
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+
+    def _finished(self, key, task, report):
+        self._pending.discard(task)
+        if self._tails.get(key) is task:
+            del self._tails[key]
+        if report and not task.cancelled() and task.exception() is not None:
+            print(f"[Storage] Background write to {key} failed: {task.exception()}")
+
+    async def run(self, path, fn, *args):
+        """Run fn(*args) in turn with the other jobs for path and return its result."""
+        # Shielded so a cancelled caller cannot let the next job start while this one still runs
+        return await asyncio.shield(self.submit(path, fn, *args, report=False))
+
+    async def read_json(self, path, default=None):
+        return await self.run(path, _read_json, Path(path), default)
+
+    async def read_bytes(self, path):
+        """File contents, or None if it does not exist."""
+        return await self.run(path, _read_bytes, Path(path))
+
+    def write_json(self, path, obj, pretty=None):
+        """
+        Atomically replace path with obj as JSON (see serializer). obj is serialized right
+        away, so later changes to it are not picked up; returns the write's task (None if
+        written inline).
+        """
+        data = serializer.dumps(obj, pretty)
+        return self.submit(path, atomic_write_bytes, path, data)
+
+    async def drain(self, path=None):
+        """Wait for queued jobs, for one path or all of them."""
+        if path is not None:
+            task = self._tails.get(os.path.abspath(path))
+            tasks = [task] if task is not None else []
+        else:
+            tasks = list(self._pending)
+        if tasks:
+            await asyncio.wait(tasks)
+
+    async def aclose(self):
+        await self.drain()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+def _read_json(path, default):
+    if not path.exists():
+        return default
+    return serializer.load_file(path)
+
+def _read_bytes(path):
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+# Shared by the bot's stores, image generation and the room journal
+default_io = FileIO()
@@ -1,16 +1,14 @@
-import json
 from pathlib import Path
+import serializer
+from utils.file_utils import atomic_write_bytes
 
-def save_game_state(base_dir: Path, location: str):
-    game_state_path = base_dir / "db" / "game_state.json"
+def save_game_state(data_dir: Path, location: str):
+    game_state_path = Path(data_dir) / "game_state.json"
     game_state_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(game_state_path, "w", encoding="utf-8") as f:
-        json.dump({"location": location}, f)
+    atomic_write_bytes(game_state_path, serializer.dumps({"location": location}))
 
-def load_game_state(base_dir: Path):
-    game_state_path = base_dir / "db" / "game_state.json"
+def load_game_state(data_dir: Path):
+    game_state_path = Path(data_dir) / "game_state.json"
     if game_state_path.exists():
-        with open(game_state_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            return data.get("location")
-    return None
\ No newline at end of file
+        return serializer.load_file(game_state_path).get("location")
+    return None
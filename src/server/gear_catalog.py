@@ -0,0 +1,180 @@
+import bisect
+import difflib
+import os
+import time
+from pathlib import Path
+import serializer
+
+GEAR_JSON_PATH = Path(__file__).parent / "gear" / "gear.json"
+# Discord rejects messages over 2000 characters
+MAX_MESSAGE_CHARS = 2000
+
+def _words(text):
+    return [w for w in text.lower().replace("-", " ").split() if w]
+
+class GearCatalog:
+    """
+    The shop's gear list, parsed once and re-read when gear.json's mtime changes
+    (checked at most every check_interval seconds). Lookups go through a name index,
+    sorted name/word lists for prefix matches and difflib for typos; shop listings
+    are rendered into pages under Discord's message limit when the file is loaded.
+    """
+
+    def __init__(self, path: Path = GEAR_JSON_PATH, check_interval: float = 1.0, page_chars: int = MAX_MESSAGE_CHARS):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self.page_chars = page_chars
+        self.items = []
+        self.by_name = {}
+        self.by_type = {}
+        self._names = []
+        self._words = []
+        self._pages = {}
+        self._mtime = None
+        self._checked = 0.0
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._mtime is not None and now - self._checked < self.check_interval:
+            return
+        self._checked = now
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = 0
+        if mtime == self._mtime:
+            return
+        items = []
+        if mtime:
+            items = serializer.load_file(self.path)
+        self._index(items)
+        self._mtime = mtime
+        if self.items:
+            print(f"[Bot] Loaded {len(self.items)} gear items from {self.path}")
+
+    def _index(self, items):
+        self.items = [item for item in items if item.get("name")]
+        self.by_name = {item["name"].lower(): item for item in self.items}
+        self.by_type = {}
+        for item in self.items:
+            self.by_type.setdefault(item.get("type") or "Misc", []).append(item)
+        self._names = sorted(self.by_name)
+        self._words = sorted((word, name) for name in self.by_name for word in _words(name))
+        self._pages = {None: self._paginate(self.items)}
+        for item_type, group in self.by_type.items():
+            self._pages[item_type] = self._paginate(group)
+
+    def all(self):
+        self._refresh()
+        return self.items
+
+    def types(self):
+        self._refresh()
+        return list(self.by_type)
+
+    def get(self, name):
+        """Item with exactly this name (case-insensitive), or None."""
+        self._refresh()
+        return self.by_name.get(name.strip().lower())
+
+    def _prefixed(self, keys, prefix):
+        start = bisect.bisect_left(keys, prefix)
+        end = bisect.bisect_left(keys, prefix + "\uffff")
+        return keys[start:end]
+
+    def search(self, query, limit: int = 5):
+        """
+        Items matching query, best first: an exact name, names starting with query,
+        names with a word starting with query, then close spellings.
+        """
+        self._refresh()
+        query = " ".join(_words(query))
+        if not query:
+            return []
+        exact = self.by_name.get(query)
+        if exact:
+            return [exact]
+        names = self._prefixed(self._names, query)
+        if not names:
+            start = bisect.bisect_left(self._words, (query,))
+            for word, name in self._words[start:]:
+                if not word.startswith(query):
+                    break
+                if name not in names:
+                    names.append(name)
+        if not names:
+            names = difflib.get_close_matches(query, self._names, n=limit, cutoff=0.75)
+        return [self.by_name[name] for name in names[:limit]]
+
+    def find(self, query):
+        """(item, candidates): the item query unambiguously names, else None and the near matches."""
+        matches = self.search(query)
+        if len(matches) == 1:
+            return matches[0], matches
+        return None, matches
+
+    def find_type(self, query):
+        """Item type named by query ("weapons", "hacker"), or None."""
+        self._refresh()
+        query = query.strip().lower()
+        for item_type in self.by_type:
+            if item_type.lower() in (query, query.rstrip("s")):
+                return item_type
+        return next((t for t in self.by_type if t.lower().startswith(query)), None)
+
+    def price(self, item, black_market: bool = False):
+        """Store (or black market) price of item; falls back to a plain 'price' field."""
+        field = "black_market_price" if black_market else "store_price"
+        return item.get(field, item.get("price", item.get("store_price", 0)))
+
+    def format_item(self, item):
+        line = f"- {item['name']} ({self.price(item)} PP"
+        if "black_market_price" in item:
+            line += f", black market {self.price(item, black_market=True)} PP"
+        return line + f"): {item.get('description', '')}"
+
+    def _paginate(self, items):
+        # Leave room for the title and footer added in page()
+        limit = self.page_chars - 150
+        pages = []
+        lines = []
+        size = 0
+        current_type = None
+        for item in items:
+            item_type = item.get("type") or "Misc"
+            block = [self.format_item(item)[:limit]]
+            if item_type != current_type:
+                block.insert(0, f"**{item_type}**")
+            block_size = sum(len(line) + 1 for line in block)
+            if lines and size + block_size > limit:
+                pages.append(lines)
+                lines, size = [], 0
+                if item_type == current_type:
+                    block.insert(0, f"**{item_type}** (cont.)")
+                    block_size += len(block[0]) + 1
+            current_type = item_type
+            lines.extend(block)
+            size += block_size
+        if lines:
+            pages.append(lines)
+        return ["\n".join(page) for page in pages]
+
+    def pages(self, item_type=None):
+        """Rendered shop listing pages (each under page_chars), optionally for one type."""
+        self._refresh()
+        return self._pages.get(item_type, [])
+
+    def page(self, number: int = 1, item_type=None):
+        """Page number (1-based, clamped) of the listing with a 'Page x/y' footer."""
+        pages = self.pages(item_type)
+        if not pages:
+            return "The shop has nothing for sale."
+        number = min(max(1, number), len(pages))
+        title = f"**Shop Items{f' — {item_type}' if item_type else ''}:**"
+        text = f"{title}\n{pages[number - 1]}"
+        if len(pages) > 1:
+            more = f"!shop {item_type.lower() + ' ' if item_type else ''}{number % len(pages) + 1}"
+            text += f"\n_Page {number}/{len(pages)} — `{more}` for more_"
+        return text
+
+default_catalog = GearCatalog()
@@ -0,0 +1,170 @@
+import asyncio
+import os
+import time
+from file_io import default_io
+from image_store import delete_files, entry_files, entry_size
+from room_utils import get_room_key
+import image_utils
+
+POLICIES = ("lru", "lfu")
+
+class ImageCacheGC:
+    """
+    Keeps db/worldImages within quota_bytes (0 = no limit). Each collect() pass:
+
+    - drops location -> image mappings for locations no campaign has a room for,
+    - deletes stored images that no room or remaining mapping refers to (orphans),
+      and files under the image directory the store does not know about,
+    - then, while the store is over quota, evicts the least recently served (lru)
+      or least often served (lfu) images. An evicted image still used by a room is
+      simply generated again the next time the room is shown.
+
+    Images created or served within grace seconds are never removed, so a picture
+    that is being generated or posted is not swept from under the bot. references is
+    an async callable returning (room keys, image paths) across all campaigns.
+    """
+
+    def __init__(self, references, quota_bytes: int = 0, policy: str = "lru", interval: float = 3600, grace: float = 600):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown image cache policy {policy!r} (expected one of {', '.join(POLICIES)})")
+        self.references = references
+        self.quota_bytes = quota_bytes
+        self.policy = policy
+        self.interval = interval
+        self.grace = grace
+        self.last_run = None
+        self.last_report = None
+        self._task = None
+        self._lock = asyncio.Lock()
+
+    def start(self):
+        if self.interval and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        # Serve times are only tracked once the store is loaded
+        await image_utils.get_image_store().aload()
+        # First pass soon after startup, then every interval
+        await asyncio.sleep(min(self.interval, 300))
+        while True:
+            try:
+                await self.collect()
+            except Exception as e:
+                print(f"[Storage] Image GC failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def _recent(self, meta, now):
+        return now - max(meta.get("last_served") or 0, meta["created_at"]) < self.grace
+
+    def _eviction_order(self, entries):
+        """Keys in the order they should be evicted under the configured policy."""
+        def last_used(key):
+            meta = entries[key]
+            return meta.get("last_served") or meta["created_at"]
+        if self.policy == "lfu":
+            return sorted(entries, key=lambda key: (entries[key].get("hits", 0), last_used(key)))
+        return sorted(entries, key=last_used)
+
+    async def collect(self):
+        """Run one pass and return what it did (see stats() for the cache as a whole)."""
+        async with self._lock:
+            store = image_utils.get_image_store()
+            # Re-read every pass: in worker mode other processes add images to storage
+            await store.reload()
+            now = time.time()
+            report = {"locations_pruned": 0, "orphans": 0, "unindexed": 0, "evicted": 0, "freed_bytes": 0}
+
+            room_keys, image_paths = await self.references()
+            mapping = await default_io.run(image_utils.DB_PATH, image_utils.world_image_locations)
+            stale = [location for location in mapping if get_room_key(location) not in room_keys]
+            if stale:
+                image_utils.forget_world_images(stale)
+                report["locations_pruned"] = len(stale)
+            referenced = {store.relative(path) for path in image_paths}
+            referenced.update(filename for location, filename in mapping.items() if location not in stale)
+            referenced.discard(None)
+
+            entries = store.entries()
+            for key, meta in list(entries.items()):
+                if self._recent(meta, now) or any(rel in referenced for rel in entry_files(meta)):
+                    continue
+                report["freed_bytes"] += await store.remove(key)
+                report["orphans"] += 1
+
+            # Files nobody indexed: old <location>.png images, crashed writes, other processes' leftovers
+            known = {rel for meta in entries.values() for rel in entry_files(meta)}
+            keys_in_use = {os.path.basename(rel).split(".")[0] for rel in referenced}
+            listing = await default_io.run(store.root, _scan, store.root)
+            unindexed = [
+                rel for rel, (size, mtime) in listing.items()
+                if rel not in known and rel not in referenced
+                and os.path.basename(rel).split(".")[0] not in keys_in_use
+                and now - mtime >= self.grace
+            ]
+            if unindexed:
+                report["freed_bytes"] += await default_io.run(store.root, delete_files, store.root, unindexed)
+                report["unindexed"] = len(unindexed)
+
+            if self.quota_bytes:
+                total = sum(entry_size(meta) for meta in entries.values())
+                for key in self._eviction_order(entries):
+                    if total <= self.quota_bytes:
+                        break
+                    meta = entries[key]
+                    if self._recent(meta, now):
+                        continue
+                    total -= entry_size(meta)
+                    report["freed_bytes"] += await store.remove(key)
+                    report["evicted"] += 1
+
+            self.last_run = now
+            self.last_report = report
+            if any(report.values()):
+                print(f"[Storage] Image GC: {report}")
+            return report
+
+    def stats(self):
+        """Current size and usage of the image cache, plus the last collect() result."""
+        store = image_utils.get_image_store()
+        entries = store.entries()
+        now = time.time()
+        served = [meta["last_served"] for meta in entries.values() if meta.get("last_served")]
+        return {
+            "images": len(entries),
+            "bytes": sum(entry_size(meta) for meta in entries.values()),
+            "original_bytes": sum(meta["size"] for meta in entries.values()),
+            "quota_bytes": self.quota_bytes,
+            "policy": self.policy,
+            "hits": sum(meta.get("hits", 0) for meta in entries.values()),
+            "never_served": len(entries) - len(served),
+            "oldest_served_age": now - min(served) if served else None,
+            "last_run_age": now - self.last_run if self.last_run else None,
+            "last_report": self.last_report
+        }
+
+    async def aclose(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        # Keep the serve times gathered since the last pass
+        if image_utils.image_store is not None:
+            image_utils.image_store.flush()
+
+def _scan(root):
+    """{relative path: (size, mtime)} of every file under root."""
+    files = {}
+    if not root.exists():
+        return files
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files[os.path.relpath(path, root).replace(os.sep, "/")] = (st.st_size, st.st_mtime)
+    return files
@@ -0,0 +1,89 @@
+import asyncio
+import itertools
+from image_utils import ensure_world_image
+from llm_scheduler import PRIORITY_INTERACTIVE
+
+class ImageJobQueue:
+    """
+    Runs world image generation on a bounded pool of background workers so callers
+    never wait on SD WebUI. submit() returns a future resolving to the image path
+    (or None); concurrent requests for the same location share one in-flight job.
+    Queued jobs are started in priority order (see llm_scheduler priorities).
+    """
+
+    def __init__(self, generate=ensure_world_image, workers: int = 1):
+        self.generate = generate
+        self.workers = max(1, workers)
+        self._queue = None
+        self._jobs = {}
+        self._started = set()
+        self._worker_tasks = []
+        self._counter = itertools.count()
+
+    @staticmethod
+    def job_key(location):
+        return location.strip().lower()
+
+    def submit(self, location, description, priority=PRIORITY_INTERACTIVE) -> asyncio.Future:
+        key = self.job_key(location)
+        job = self._jobs.get(key)
+        if job is not None and not job.done():
+            if id(job) not in self._started:
+                # Re-queue at the caller's priority; whichever entry is popped first runs it
+                self._queue.put_nowait((priority, next(self._counter), key, location, description, job))
+            return job
+        self._ensure_workers()
+        job = asyncio.get_running_loop().create_future()
+        self._jobs[key] = job
+        self._queue.put_nowait((priority, next(self._counter), key, location, description, job))
+        return job
+
+    def pending(self):
+        return sum(1 for job in self._jobs.values() if not job.done())
+
+    def _ensure_workers(self):
+        # Workers are created lazily so they belong to the loop the bot actually runs on
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+        self._worker_tasks = [t for t in self._worker_tasks if not t.done()]
+        while len(self._worker_tasks) < self.workers:
+            self._worker_tasks.append(asyncio.get_running_loop().create_task(self._worker()))
+
+    async def _worker(self):
+        while True:
+            _, _, key, location, description, job = await self._queue.get()
+            if job.done() or id(job) in self._started:
+                self._queue.task_done()
+                continue
+            self._started.add(id(job))
+            try:
+                result = await self.generate(location, description)
+            except asyncio.CancelledError:
+                job.cancel()
+                raise
+            except Exception as e:
+                print(f"[Bot] Image job for {location} failed: {e}")
+                result = None
+            finally:
+                self._queue.task_done()
+                self._started.discard(id(job))
+                if self._jobs.get(key) is job:
+                    del self._jobs[key]
+            if not job.done():
+                job.set_result(result)
+
+    async def aclose(self):
+        for task in self._worker_tasks:
+            task.cancel()
+        for task in self._worker_tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._worker_tasks = []
+        for job in self._jobs.values():
+            if not job.done():
+                job.cancel()
+        self._jobs.clear()
+        self._started.clear()
+        self._queue = None
@@ -0,0 +1,275 @@
+import hashlib
+import io
+import json
+import os
+import time
+from pathlib import Path
+from file_io import default_io
+from utils.file_utils import atomic_write_bytes
+import serializer
+
+# Discord-sized copies made next to every original; posts upload UPLOAD_FORMAT
+VARIANT_MAX_SIZE = int(os.getenv("IMAGE_VARIANT_SIZE", "1024"))
+UPLOAD_FORMAT = os.getenv("IMAGE_UPLOAD_FORMAT", "webp").lower()
+VARIANT_FORMATS = {
+    "webp": (".webp", {"format": "WEBP", "quality": 80, "method": 4}),
+    "jpeg": (".jpg", {"format": "JPEG", "quality": 85, "optimize": True, "progressive": True})
+}
+
+def image_key(payload):
+    """Content key for a txt2img request: sha256 of the prompt and every generation parameter."""
+    # Always the stdlib encoder with sorted keys, so keys survive a serializer backend change
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class ImageStore:
+    """
+    Content-addressed store for generated images under root (db/worldImages). An image
+    lives at <key[:2]>/<key>.png, where the key hashes the generation request, so
+    identical prompts are generated once no matter which location asked. Each entry
+    records size, sha256 checksum and when the image was verified; the image is decoded
+    and verified once on the way in, and later hits only compare the file size. WebP/JPEG
+    variants scaled to VARIANT_MAX_SIZE are made at the same time for Discord uploads.
+    touch() counts hits and the last-served time that image_gc evicts by; those are
+    only saved by flush(). The metadata lives in index_path, or the image_blobs table
+    when storage is given.
+    """
+
+    def __init__(self, root: Path, index_path: Path, storage=None):
+        self.root = Path(root)
+        self.index_path = Path(index_path)
+        self.storage = storage
+        self._entries = None
+        self._by_file = {}
+        self._touched = set()
+
+    def load(self):
+        if self._entries is None:
+            self._set_entries(self._read())
+        return self._entries
+
+    async def aload(self):
+        if self._entries is None:
+            await default_io.run(self.index_path, self.load)
+        return self._entries
+
+    async def reload(self):
+        """Save pending hit counts, then re-read the entries (workers add images to storage too)."""
+        self.flush()
+        self._set_entries(await default_io.run(self.index_path, self._read))
+        return self._entries
+
+    def _read(self):
+        if self.storage is not None:
+            return self.storage.load_image_blobs()
+        if self.index_path.exists():
+            return serializer.load_file(self.index_path)
+        return {}
+
+    def _set_entries(self, entries):
+        self._by_file = {rel: key for key, meta in entries.items() for rel in entry_files(meta)}
+        self._entries = entries
+
+    def get(self, key):
+        return self.load().get(key)
+
+    def key_for_file(self, filename):
+        """Key of the entry owning filename (relative to root; original or variant), if any."""
+        self.load()
+        return self._by_file.get(filename)
+
+    def relative(self, path):
+        """path relative to root as stored in the entries, or None if it is outside root."""
+        try:
+            return Path(os.path.abspath(path)).relative_to(os.path.abspath(self.root)).as_posix()
+        except ValueError:
+            return None
+
+    def touch(self, path):
+        """Note that the image at path (any of an entry's files) was just posted."""
+        if self._entries is None:
+            return
+        rel = self.relative(path)
+        key = self._by_file.get(rel) if rel else None
+        if key is None:
+            return
+        meta = self._entries[key]
+        meta["last_served"] = time.time()
+        meta["hits"] = meta.get("hits", 0) + 1
+        self._touched.add(key)
+
+    def flush(self):
+        """Save the hit counts and serve times recorded since the last flush."""
+        touched = [key for key in self._touched if key in self._entries]
+        self._touched.clear()
+        if not touched:
+            return
+        if self.storage is not None:
+            self.storage.put_image_blobs({key: self._entries[key] for key in touched})
+        else:
+            default_io.write_json(self.index_path, self._entries)
+
+    def entries(self):
+        return self.load()
+
+    def path(self, meta):
+        return self.root / meta["file"]
+
+    def upload_path(self, meta, fmt=None):
+        """The variant to post to Discord, or the original if that variant is missing."""
+        variant = meta.get("variants", {}).get(fmt or UPLOAD_FORMAT)
+        return self.root / (variant["file"] if variant else meta["file"])
+
+    async def lookup(self, key):
+        """
+        The entry for key if its image is still on disk unchanged. An image found at the
+        content path without an entry (e.g. written by another process), or whose size
+        changed, is verified and re-registered; an invalid one is deleted.
+        """
+        await self.aload()
+        meta = self._entries.get(key)
+        filename = meta["file"] if meta else content_file(key)
+        path = self.root / filename
+        size = await default_io.run(path, _file_size, path)
+        if meta is not None and size == meta["size"]:
+            return meta
+        if size is None:
+            self.forget(key)
+            return None
+        # Unknown or changed on disk: verify it (again) before trusting it
+        try:
+            return await self.adopt(key, filename)
+        except Exception as e:
+            print(f"[Storage] Dropping invalid image {filename}: {e}")
+            self.forget(key)
+            await default_io.run(path, path.unlink, True)
+            return None
+
+    async def put(self, key, data: bytes):
+        """Verify and store generated image bytes (plus variants) under key."""
+        await self.aload()
+        rel = content_file(key)
+        meta = await default_io.run(self.root / rel, _ingest, self.root, key, rel, data, True)
+        self._record(key, meta)
+        return meta
+
+    async def adopt(self, key, filename):
+        """
+        Register an image already under root (e.g. a pre-content-addressing
+        <location>.png) under key. Raises if it is not a valid image.
+        """
+        await self.aload()
+        path = self.root / filename
+        data = await default_io.run(path, path.read_bytes)
+        meta = await default_io.run(path, _ingest, self.root, key, filename, data, False)
+        self._record(key, meta)
+        return meta
+
+    def _record(self, key, meta):
+        old = self._entries.get(key)
+        if old is not None:
+            for rel in entry_files(old):
+                self._by_file.pop(rel, None)
+            # Re-verifying an image does not reset its usage
+            for field in ("last_served", "hits"):
+                if field in old:
+                    meta[field] = old[field]
+        self._entries[key] = meta
+        for rel in entry_files(meta):
+            self._by_file[rel] = key
+        self._persist(key, meta)
+
+    def forget(self, key):
+        meta = self.load().pop(key, None)
+        if meta is None:
+            return None
+        for rel in entry_files(meta):
+            self._by_file.pop(rel, None)
+        self._touched.discard(key)
+        self._persist(key, None)
+        return meta
+
+    async def remove(self, key):
+        """Forget key and delete its original and variants; returns the bytes freed."""
+        meta = self.forget(key)
+        if meta is None:
+            return 0
+        return await default_io.run(self.path(meta), delete_files, self.root, entry_files(meta))
+
+    def _persist(self, key, meta):
+        if self.storage is not None:
+            if meta is None:
+                self.storage.delete_image_blob(key)
+            else:
+                self.storage.put_image_blob(key, meta)
+            return
+        default_io.write_json(self.index_path, self._entries)
+
+def content_file(key):
+    return f"{key[:2]}/{key}.png"
+
+def entry_files(meta):
+    """The original and every variant of an entry, relative to the store root."""
+    return [meta["file"]] + [variant["file"] for variant in meta.get("variants", {}).values()]
+
+def entry_size(meta):
+    return meta["size"] + sum(variant["size"] for variant in meta.get("variants", {}).values())
+
+def delete_files(root, filenames):
+    """Delete root/filename for each filename that exists, and directories left empty; returns the bytes freed."""
+    freed = 0
+    for filename in filenames:
+        path = root / filename
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        freed += size
+        if path.parent != root:
+            try:
+                path.parent.rmdir()
+            except OSError:
+                # Not empty
+                pass
+    return freed
+
+def _file_size(path):
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return None
+
+# The helpers below run on the file I/O pool
+def _ingest(root, key, filename, data, write):
+    """Verify data, optionally write it to root/filename, make the variants and return the entry."""
+    from PIL import Image
+    with Image.open(io.BytesIO(data)) as img:
+        img.verify()
+    if write:
+        atomic_write_bytes(root / filename, data)
+    now = time.time()
+    return {
+        "file": filename,
+        "size": len(data),
+        "checksum": hashlib.sha256(data).hexdigest(),
+        "verified_at": now,
+        "created_at": now,
+        "variants": _make_variants(root, key, data)
+    }
+
+def _make_variants(root, key, data):
+    from PIL import Image, features
+    variants = {}
+    with Image.open(io.BytesIO(data)) as img:
+        img = img.convert("RGB")
+        img.thumbnail((VARIANT_MAX_SIZE, VARIANT_MAX_SIZE), Image.LANCZOS)
+        for name, (suffix, options) in VARIANT_FORMATS.items():
+            if name == "webp" and not features.check("webp"):
+                continue
+            buf = io.BytesIO()
+            img.save(buf, **options)
+            rel = f"{key[:2]}/{key}{suffix}"
+            atomic_write_bytes(root / rel, buf.getvalue())
+            variants[name] = {"file": rel, "size": buf.tell()}
+    return variants
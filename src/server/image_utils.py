@@ -1,45 +1,141 @@
+import base64
 import os
-import json
 import httpx
 from pathlib import Path
+from file_io import default_io
+from image_store import ImageStore, image_key
+import serializer
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DB_PATH = BASE_DIR / "db" / "worldImages.json"
 
-if DB_PATH.exists():
-    with open(DB_PATH, "r", encoding="utf-8") as f:
-        world_images = json.load(f)
+# SD WebUI txt2img endpoints, tried in order. SD_WEBUI_URL points at a single non-default server.
+if os.getenv("SD_WEBUI_URL"):
+    SD_WEBUI_ENDPOINTS = [f"{os.getenv('SD_WEBUI_URL').rstrip('/')}/sdapi/v1/txt2img"]
 else:
-    world_images = {}
+    SD_WEBUI_ENDPOINTS = [
+        "http://localhost:7860/sdapi/v1/txt2img",
+        "http://127.0.0.1:7860/sdapi/v1/txt2img",
+        "http://localhost:7860/sdapi/v1/txt2img/",
+        "http://127.0.0.1:7860/sdapi/v1/txt2img/"
+    ]
+
+def load_world_images():
+    if DB_PATH.exists():
+        return serializer.load_file(DB_PATH)
+    return {}
+
+# Read on first use rather than at import, so startup does not wait on it
+world_images = None
+
+def get_world_images():
+    global world_images
+    if world_images is None:
+        world_images = load_world_images()
+    return world_images
+
+# Generated images and their metadata (see image_store); created on first use
+image_store = None
+
+def get_image_store():
+    global image_store
+    if image_store is None:
+        image_store = ImageStore(BASE_DIR / "db" / "worldImages", BASE_DIR / "db" / "imageStore.json", storage=image_storage)
+    return image_store
+
+def set_images_base_dir(base_dir):
+    """Keep images, worldImages.json and imageStore.json under base_dir/db (defaults to the repo root)."""
+    global BASE_DIR, DB_PATH, world_images, image_store
+    BASE_DIR = Path(base_dir)
+    DB_PATH = BASE_DIR / "db" / "worldImages.json"
+    world_images = None
+    image_store = None
+
+# Optional SQLiteStorage; when set, the image index is read and written per row
+image_storage = None
+
+def set_image_storage(storage):
+    global image_storage, image_store
+    image_storage = storage
+    image_store = None
+
+def get_world_image_filename(location):
+    images = get_world_images()
+    filename = images.get(location)
+    if filename is None and image_storage is not None:
+        filename = image_storage.get_image(location)
+        if filename is not None:
+            images[location] = filename
+    return filename
+
+def set_world_image_filename(location, filename):
+    images = get_world_images()
+    images[location] = filename
+    if image_storage is not None:
+        image_storage.put_image(location, filename)
+        return
+    default_io.write_json(DB_PATH, images)
+
+def world_image_locations():
+    """Every location -> image filename mapping, including rows not read into memory yet."""
+    images = dict(get_world_images())
+    if image_storage is not None:
+        images.update(image_storage.load_images())
+    return images
+
+def forget_world_images(locations):
+    images = get_world_images()
+    for location in locations:
+        images.pop(location, None)
+    if image_storage is not None:
+        image_storage.delete_images(locations)
+        return
+    default_io.write_json(DB_PATH, images)
+
+def note_image_served(image_path):
+    """Record that image_path was posted, for the image cache's eviction order."""
+    if image_store is not None and image_path:
+        image_store.touch(image_path)
 
 async def ensure_world_image(location, description):
-    images_dir = BASE_DIR / "db" / "worldImages"
+    """
+    Path of the image to post for location, generating it if needed. The content-addressed
+    store is asked for the prompt's image first, so identical prompts never go to SD WebUI
+    twice and a changed description gets a new image. The location -> file mapping is only
+    used to adopt a <location>.png from before the store.
+    """
+    store = get_image_store()
     print(f"[DEBUG] ensure_world_image called for location: {location}")
-    if location in world_images:
-        file_path = images_dir / world_images[location]
-        print(f"[DEBUG] Checking existing image at: {file_path}")
-        if file_path.exists():
+    if world_images is None:
+        await default_io.run(DB_PATH, get_world_images)
+    await store.aload()
+    prompt = f"A beautiful, detailed illustration of: {description.replace('**', '')}"
+    payload = {"prompt": prompt}
+    key = image_key(payload)
+    meta = await store.lookup(key)
+    if meta is None:
+        existing_filename = get_world_image_filename(location)
+        # Files the store already owns belong to another prompt (another campaign's room
+        # of the same name, or an older description) and are not reused
+        if existing_filename and store.key_for_file(existing_filename) is None:
+            # A <location>.png from before the store: verify it once and keep it under this prompt's key
+            file_path = store.root / existing_filename
             try:
-                from PIL import Image
-                with Image.open(file_path) as img:
-                    img.verify()
-                print(f"[DEBUG] Existing image is valid: {file_path}")
-                return str(file_path)
+                meta = await store.adopt(key, existing_filename)
+            except FileNotFoundError:
+                pass
             except Exception as e:
                 print(f"[DEBUG] Invalid or corrupted image found for {location}, regenerating... Exception: {e}")
-                file_path.unlink(missing_ok=True)
-    prompt = f"A beautiful, detailed illustration of: {description.replace('**', '')}"
+                await default_io.run(file_path, file_path.unlink, True)
+    if meta is not None:
+        print(f"[DEBUG] Reusing stored image {meta['file']} for {location}")
+        if get_world_image_filename(location) != meta["file"]:
+            set_world_image_filename(location, meta["file"])
+        return str(store.upload_path(meta))
     print(f"[DEBUG] Sending image generation request to SD WebUI for prompt: {prompt}")
     try:
         async with httpx.AsyncClient() as client:
-            payload = {"prompt": prompt}
-            endpoints = [
-                "http://localhost:7860/sdapi/v1/txt2img",
-                "http://127.0.0.1:7860/sdapi/v1/txt2img",
-                "http://localhost:7860/sdapi/v1/txt2img/",
-                "http://127.0.0.1:7860/sdapi/v1/txt2img/"
-            ]
-            for endpoint in endpoints:
+            for endpoint in SD_WEBUI_ENDPOINTS:
                 print(f"[DEBUG] Trying SD WebUI endpoint: {endpoint}")
                 try:
                     response = await client.post(
@@ -58,21 +154,10 @@ async def ensure_world_image(location, description):
                     if not images or not images[0]:
                         print("[Bot] SD WebUI did not return an image.")
                         return None
-                    import base64
-                    filename = f"{location.replace(' ', '_').lower()}.png"
-                    file_path = images_dir / filename
-                    file_path.parent.mkdir(parents=True, exist_ok=True)
-                    with open(file_path, "wb") as f:
-                        f.write(base64.b64decode(images[0]))
-                    from PIL import Image
-                    with Image.open(file_path) as img:
-                        img.verify()
-                    world_images[location] = filename
-                    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-                    with open(DB_PATH, "w", encoding="utf-8") as f:
-                        json.dump(world_images, f, indent=2)
-                    print(f"[DEBUG] Image saved and verified at: {file_path}")
-                    return str(file_path)
+                    meta = await store.put(key, base64.b64decode(images[0]))
+                    set_world_image_filename(location, meta["file"])
+                    print(f"[DEBUG] Image saved and verified at: {store.path(meta)}")
+                    return str(store.upload_path(meta))
                 else:
                     print(f"[Bot] SD WebUI endpoint {endpoint} failed: {response.status_code} {response.text}")
             print("[Bot] All SD WebUI endpoints failed. Is the server running? Is the API enabled?")
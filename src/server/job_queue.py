@@ -0,0 +1,174 @@
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from llm_scheduler import PRIORITY_INTERACTIVE
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    result TEXT,
+    error TEXT,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_queued ON jobs (status, priority, id);
+"""
+
+SQL_ENQUEUE = "INSERT INTO jobs (kind, payload, priority, created_at) VALUES (?, ?, ?, ?)"
+SQL_NEXT_QUEUED = "SELECT id, kind, payload FROM jobs WHERE status = 'queued' ORDER BY priority, id LIMIT 1"
+SQL_CLAIM = "UPDATE jobs SET status = 'running', worker = ?, started_at = ? WHERE id = ? AND status = 'queued'"
+SQL_FINISH = "UPDATE jobs SET status = ?, result = ?, error = ? WHERE id = ?"
+SQL_REQUEUE_STALE = "UPDATE jobs SET status = 'queued', worker = NULL, started_at = NULL WHERE status = 'running' AND started_at < ?"
+SQL_DELETE = "DELETE FROM jobs WHERE id = ?"
+SQL_COUNTS = "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+
+class SQLiteJobQueue:
+    """
+    Generation jobs shared between the Discord gateway and worker processes through
+    one SQLite file (WAL mode). The gateway enqueues and collects results; workers
+    claim queued jobs in priority order and write back a JSON result or an error.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.RLock()
+
+    def enqueue(self, kind, payload, priority=PRIORITY_INTERACTIVE):
+        with self._lock:
+            cur = self._conn.execute(SQL_ENQUEUE, (kind, json.dumps(payload), priority, time.time()))
+            return cur.lastrowid
+
+    def claim(self, worker_id):
+        """Mark the most urgent queued job as running for worker_id and return (id, kind, payload), or None."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(SQL_NEXT_QUEUED).fetchone()
+                if row is not None:
+                    self._conn.execute(SQL_CLAIM, (worker_id, time.time(), row[0]))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def complete(self, job_id, result):
+        with self._lock:
+            self._conn.execute(SQL_FINISH, ("done", json.dumps(result), None, job_id))
+
+    def fail(self, job_id, error):
+        with self._lock:
+            self._conn.execute(SQL_FINISH, ("failed", None, str(error), job_id))
+
+    def finished(self, job_ids):
+        """Return {id: (status, result, error)} for the given jobs that are done or failed."""
+        if not job_ids:
+            return {}
+        job_ids = list(job_ids)
+        placeholders = ",".join("?" * len(job_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, status, result, error FROM jobs WHERE id IN ({placeholders}) AND status IN ('done', 'failed')",
+                job_ids
+            ).fetchall()
+        return {
+            job_id: (status, json.loads(result) if result is not None else None, error)
+            for job_id, status, result, error in rows
+        }
+
+    def delete(self, job_ids):
+        with self._lock:
+            self._conn.executemany(SQL_DELETE, [(job_id,) for job_id in job_ids])
+
+    def requeue_stale(self, timeout):
+        """Put jobs back in the queue whose worker has held them for over timeout seconds (crashed worker)."""
+        with self._lock:
+            return self._conn.execute(SQL_REQUEUE_STALE, (time.time() - timeout,)).rowcount
+
+    def counts(self):
+        with self._lock:
+            return dict(self._conn.execute(SQL_COUNTS).fetchall())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class JobQueueClient:
+    """
+    Gateway side of the split architecture: submit() enqueues a job and returns a
+    future; a single poller task resolves every pending future from one query per
+    poll_interval and removes finished rows. Failed jobs resolve to None. The SQLite
+    calls run in worker threads, so a worker holding the write lock never stalls
+    the gateway's event loop.
+    """
+
+    def __init__(self, queue: SQLiteJobQueue, poll_interval: float = 0.05):
+        self.queue = queue
+        self.poll_interval = poll_interval
+        self._pending = {}
+        self._poller = None
+
+    async def submit(self, kind, payload, priority=PRIORITY_INTERACTIVE) -> asyncio.Future:
+        job_id = await asyncio.to_thread(self.queue.enqueue, kind, payload, priority)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[job_id] = future
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.get_running_loop().create_task(self._poll())
+        return future
+
+    async def llm(self, prompt, ollama_host, ollama_model, priority=PRIORITY_INTERACTIVE):
+        result = await (await self.submit("llm", {"prompt": prompt, "host": ollama_host, "model": ollama_model, "priority": priority}, priority))
+        return result or ""
+
+    async def image(self, location, description, priority=PRIORITY_INTERACTIVE):
+        return await (await self.submit("image", {"location": location, "description": description}, priority))
+
+    async def _poll(self):
+        while self._pending:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                finished = await asyncio.to_thread(self.queue.finished, list(self._pending))
+                if finished:
+                    await asyncio.to_thread(self.queue.delete, list(finished))
+            except Exception as e:
+                # e.g. "database is locked" past the busy timeout; pending jobs stay pending
+                print(f"[Bot] Polling the job queue failed, retrying: {e}")
+                continue
+            for job_id, (status, result, error) in finished.items():
+                future = self._pending.pop(job_id, None)
+                if future is None or future.done():
+                    continue
+                if status == "failed":
+                    print(f"[Bot] Worker job {job_id} failed: {error}")
+                    result = None
+                future.set_result(result)
+
+    async def aclose(self):
+        if self._poller and not self._poller.done():
+            self._poller.cancel()
+        self._poller = None
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+        self.queue.close()
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
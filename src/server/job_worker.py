@@ -0,0 +1,58 @@
+import asyncio
+from pathlib import Path
+from job_queue import SQLiteJobQueue, default_worker_id
+from llm_utils import get_llm_response, close_http_client, configure_llm_scheduler
+from image_utils import ensure_world_image
+from file_io import default_io
+
+async def run_job(kind, payload):
+    if kind == "llm":
+        return await get_llm_response(payload["prompt"], payload["host"], payload["model"], priority=payload.get("priority", 0))
+    if kind == "image":
+        return await ensure_world_image(payload["location"], payload["description"])
+    raise ValueError(f"Unknown job kind: {kind}")
+
+async def run_worker(queue_path: Path, concurrency: int = 2, poll_interval: float = 0.1, stale_after: float = 600, worker_id=None):
+    """
+    Claim and run jobs from the gateway's queue until cancelled. Up to concurrency
+    jobs run at once; jobs left 'running' by a crashed worker are re-queued after stale_after seconds.
+    """
+    queue = SQLiteJobQueue(queue_path)
+    worker_id = worker_id or default_worker_id()
+    configure_llm_scheduler(max_concurrency=concurrency)
+    print(f"[Worker] {worker_id} consuming {queue_path} with {concurrency} slots")
+
+    async def slot():
+        while True:
+            job = queue.claim(worker_id)
+            if job is None:
+                await asyncio.sleep(poll_interval)
+                continue
+            job_id, kind, payload = job
+            try:
+                queue.complete(job_id, await run_job(kind, payload))
+            except asyncio.CancelledError:
+                queue.fail(job_id, "worker stopped")
+                raise
+            except Exception as e:
+                print(f"[Worker] Job {job_id} ({kind}) failed: {e}")
+                queue.fail(job_id, e)
+
+    async def reaper():
+        while True:
+            requeued = queue.requeue_stale(stale_after)
+            if requeued:
+                print(f"[Worker] Re-queued {requeued} stale job(s)")
+            await asyncio.sleep(min(stale_after, 60))
+
+    tasks = [asyncio.create_task(slot()) for _ in range(max(1, concurrency))]
+    tasks.append(asyncio.create_task(reaper()))
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await close_http_client()
+        await default_io.aclose()
+        queue.close()
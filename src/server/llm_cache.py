@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+def make_cache_key(ollama_model, prompt, options=None):
+    """Content address for a generation: same model + prompt + options => same key."""
+    raw = json.dumps([ollama_model, prompt, options or {}], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    """
+    Two-tier cache for deterministic LLM calls: an in-memory LRU with TTL in front
+    of an optional SQLite file. Disk hits are promoted back into memory. Coroutines use
+    aget()/aput(), which keep the SQLite queries off the event loop.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 6 * 3600, disk_path: Path = None, disk_ttl: float = 7 * 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_ttl = disk_ttl
+        self._memory = OrderedDict()
+        # _lock guards the memory tier, _disk_lock the SQLite connection
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._conn = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if disk_path is not None:
+            disk_path = Path(disk_path)
+            disk_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(disk_path), isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def get(self, key):
+        value = self._memory_get(key)
+        if value is None:
+            value = self._disk_get(key)
+        return value
+
+    def put(self, key, value):
+        self._memory_put(key, value)
+        self._disk_put(key, value)
+
+    async def aget(self, key):
+        """get() for the event loop: the memory tier answers inline, the disk tier in a thread."""
+        value = self._memory_get(key)
+        if value is None and self._conn is not None:
+            value = await asyncio.to_thread(self._disk_get, key)
+        elif value is None:
+            self._miss()
+        return value
+
+    async def aput(self, key, value):
+        self._memory_put(key, value)
+        if self._conn is not None:
+            await asyncio.to_thread(self._disk_put, key, value)
+
+    def _memory_get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._memory[key]
+            return None
+
+    def _memory_put(self, key, value):
+        with self._lock:
+            self._remember(key, value, time.time())
+
+    def _disk_get(self, key):
+        now = time.time()
+        with self._disk_lock:
+            row = None
+            if self._conn is not None:
+                row = self._conn.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                value, created_at = row
+                if created_at + self.disk_ttl > now:
+                    with self._lock:
+                        self._remember(key, value, now)
+                        self.disk_hits += 1
+                    return value
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+        self._miss()
+        return None
+
+    def _disk_put(self, key, value):
+        with self._disk_lock:
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT INTO llm_cache (key, response, created_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET response = excluded.response, created_at = excluded.created_at",
+                    (key, value, time.time())
+                )
+
+    def _miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def _remember(self, key, value, now):
+        self._memory[key] = (now + self.ttl, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        with self._disk_lock:
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM llm_cache")
+
+    def stats(self):
+        return {
+            "entries": len(self._memory),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses
+        }
+
+    def close(self):
+        with self._disk_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,89 @@
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager
+
+# Lower value = served first
+PRIORITY_INTERACTIVE = 0  # DM replies to in-game player actions
+PRIORITY_QA = 1           # Session zero questions, downtime/shop chatter
+PRIORITY_BACKGROUND = 2   # Campaign/adventure generation, room pre-generation
+
+class LLMScheduler:
+    """
+    Admits at most max_concurrency LLM generations at a time. Waiting requests are
+    released strictly by priority, then in arrival order within a priority.
+    """
+
+    def __init__(self, max_concurrency: int = 2):
+        self.max_concurrency = max(1, max_concurrency)
+        self._active = 0
+        self._waiters = []
+        self._counter = itertools.count()
+
+    @property
+    def active(self):
+        return self._active
+
+    @property
+    def waiting(self):
+        return sum(1 for _, _, fut in self._waiters if not fut.done())
+
+    async def acquire(self, priority=PRIORITY_INTERACTIVE):
+        if self._active < self.max_concurrency and not self.waiting:
+            self._active += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Slot was handed to us just as we were cancelled: pass it on
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                # Hand the slot straight to the next waiter; _active is unchanged
+                fut.set_result(None)
+                return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority=PRIORITY_INTERACTIVE):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+class MessageCoalescer:
+    """
+    Collects items submitted under the same key (e.g. a channel/scene) within
+    `window` seconds and hands them to handler(key, items) as one batch. The first
+    submitter waits out the window and runs the handler; later ones return at once.
+    A window of 0 disables batching.
+    """
+
+    def __init__(self, handler, window: float = 0.0):
+        self.handler = handler
+        self.window = window
+        self._pending = {}
+
+    async def submit(self, key, item):
+        if self.window <= 0:
+            await self.handler(key, [item])
+            return
+        batch = self._pending.get(key)
+        if batch is not None:
+            batch.append(item)
+            return
+        batch = [item]
+        self._pending[key] = batch
+        try:
+            await asyncio.sleep(self.window)
+        finally:
+            self._pending.pop(key, None)
+        await self.handler(key, batch)
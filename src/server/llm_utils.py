@@ -1,6 +1,7 @@
 import os
 import httpx
-from pathlib import Path
+from llm_scheduler import LLMScheduler, PRIORITY_INTERACTIVE
+from llm_cache import LLMResponseCache, make_cache_key
 
 LLM_SYSTEM_PROMPT = """
 You are a creative, fair, and engaging Dungeon Master for a D20-based tabletop RPG set in a dystopian sci-fi Mega City and its wasteland. Your job is to describe the world, NPCs, and outcomes of player actions, never controlling or speaking for player characters.
@@ -21,47 +22,221 @@ You are a creative, fair, and engaging Dungeon Master for a D20-based tabletop R
 - Balance fun, challenge, and story.
 """
 
-async def get_llm_response(prompt: str, ollama_host: str, ollama_model: str) -> str:
-    full_prompt = f"{LLM_SYSTEM_PROMPT.strip()}\n\nPlayer: {prompt.strip()}"
+# --- Shared HTTP client ---
+# One pooled AsyncClient is reused by every LLM call so requests skip TCP/TLS setup.
+HTTP_CLIENT_CONFIG = {
+    "timeout": 180,
+    "max_connections": 10,
+    "max_keepalive_connections": 5,
+    "keepalive_expiry": 60.0
+}
+_http_client = None
+
+def configure_http_client(**config):
+    """Override pool settings (see HTTP_CLIENT_CONFIG) used when the shared client is (re)created."""
+    HTTP_CLIENT_CONFIG.update({k: v for k, v in config.items() if v is not None})
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        import importlib.util
+        _http_client = httpx.AsyncClient(
+            timeout=HTTP_CLIENT_CONFIG["timeout"],
+            limits=httpx.Limits(
+                max_connections=HTTP_CLIENT_CONFIG["max_connections"],
+                max_keepalive_connections=HTTP_CLIENT_CONFIG["max_keepalive_connections"],
+                keepalive_expiry=HTTP_CLIENT_CONFIG["keepalive_expiry"]
+            ),
+            # HTTP/2 needs the optional 'h2' package (pip install httpx[http2])
+            http2=importlib.util.find_spec("h2") is not None
+        )
+    return _http_client
+
+async def close_http_client():
+    """Close the shared client. Must run on the event loop that used it; the next call recreates it."""
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+
+# --- Shared scheduler ---
+# Every generation goes through one LLMScheduler so a single Ollama box is not oversubscribed.
+llm_scheduler = LLMScheduler()
+
+def configure_llm_scheduler(max_concurrency=None):
+    if max_concurrency is not None:
+        llm_scheduler.max_concurrency = max(1, max_concurrency)
+
+# --- Response cache ---
+# Only consulted by calls that pass cache=True (rules adjudications, room descriptions);
+# narrative replies are never cached.
+llm_cache = LLMResponseCache()
+
+def set_llm_cache(cache: LLMResponseCache):
+    global llm_cache
+    llm_cache = cache
+
+# --- Worker offload ---
+# In a split deployment (see job_queue.py / run_worker.py) sessionless completions run in
+# worker processes. Streamed replies and session turns stay here: they need the tokens
+# and the channel's context in the gateway.
+llm_job_client = None
+
+def set_llm_job_client(client):
+    global llm_job_client
+    llm_job_client = client
+
+def build_full_prompt(prompt: str) -> str:
+    return f"{LLM_SYSTEM_PROMPT.strip()}\n\nPlayer: {prompt.strip()}"
+
+# --- Conversation sessions ---
+# How long Ollama keeps the model (and its KV cache) loaded between requests
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Drop a session's context once it grows past this many tokens to stay inside num_ctx
+LLM_SESSION_MAX_CONTEXT = int(os.getenv("LLM_SESSION_MAX_CONTEXT", "6000"))
+
+class LLMSession:
+    """
+    Per-channel conversation with Ollama. Holds the `context` token array returned by
+    /api/generate so the next turn only sends (and evaluates) the new prompt text.
+    The context is dropped whenever the system prompt, model or scene changes.
+    """
+
+    def __init__(self):
+        self.context = None
+        self.fingerprint = None
+
+    def context_for(self, ollama_model, scene=None):
+        fingerprint = (hash(LLM_SYSTEM_PROMPT), ollama_model, scene)
+        if fingerprint != self.fingerprint:
+            self.reset()
+            self.fingerprint = fingerprint
+        return self.context
+
+    def update(self, context):
+        if context and len(context) <= LLM_SESSION_MAX_CONTEXT:
+            self.context = context
+        else:
+            self.context = None
+
+    def reset(self):
+        self.context = None
+
+def build_generate_payload(prompt: str, ollama_model: str, stream: bool, session: LLMSession = None, scene=None) -> dict:
+    payload = {
+        "model": ollama_model,
+        "stream": stream,
+        "keep_alive": OLLAMA_KEEP_ALIVE
+    }
+    if session is None:
+        payload["prompt"] = build_full_prompt(prompt)
+        return payload
+    context = session.context_for(ollama_model, scene)
+    payload["prompt"] = f"Player: {prompt.strip()}"
+    if context:
+        # The system prompt and earlier turns are already encoded in context
+        payload["context"] = context
+    else:
+        payload["system"] = LLM_SYSTEM_PROMPT.strip()
+    return payload
+
+async def get_llm_response(prompt: str, ollama_host: str, ollama_model: str, priority: int = PRIORITY_INTERACTIVE, session: LLMSession = None, scene=None, cache: bool = False) -> str:
+    payload = build_generate_payload(prompt, ollama_model, False, session, scene)
+    # Session turns depend on prior context, so they are never served from the cache
+    cache_key = None
+    if cache and session is None and llm_cache is not None:
+        cache_key = make_cache_key(ollama_model, payload["prompt"], payload.get("options"))
+        cached = await llm_cache.aget(cache_key)
+        if cached is not None:
+            return cached
+    if llm_job_client is not None and session is None:
+        text = await llm_job_client.llm(prompt, ollama_host, ollama_model, priority)
+        if cache_key is not None and text:
+            await llm_cache.aput(cache_key, text)
+        return text
     try:
-        async with httpx.AsyncClient(timeout=180) as client:
-            response = await client.post(
+        async with llm_scheduler.slot(priority):
+            response = await get_http_client().post(
                 f"{ollama_host}/api/generate",
-                json={
-                    "model": ollama_model,
-                    "prompt": full_prompt,
-                    "stream": False
-                }
+                json=payload
             )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("response") or data.get("message") or data.get("text") or ""
-            else:
-                print(f"LLM error: {response.status_code} - {response.text}")
-                return ""
+        
+        if response.status_code == 200:
+            data = response.json()
+            if session is not None:
+                session.update(data.get("context"))
+            text = data.get("response") or data.get("message") or data.get("text") or ""
+            if cache_key is not None and text:
+                await llm_cache.aput(cache_key, text)
+            return text
+        else:
+            print(f"LLM error: {response.status_code} - {response.text}")
+            return ""
     except Exception as e:
         print(f"LLM request failed: {e}")
         return ""
 
+async def stream_llm_response(prompt: str, ollama_host: str, ollama_model: str, priority: int = PRIORITY_INTERACTIVE, session: LLMSession = None, scene=None):
+    """
+    Async generator yielding response text pieces as Ollama produces them.
+    With "stream": true, /api/generate returns NDJSON: one object per line, each
+    carrying a 'response' fragment, the last one with "done": true.
+    """
+    payload = build_generate_payload(prompt, ollama_model, True, session, scene)
+    try:
+        async with llm_scheduler.slot(priority), get_http_client().stream(
+            "POST",
+            f"{ollama_host}/api/generate",
+            json=payload
+        ) as response:
+            if response.status_code != 200:
+                body = await response.aread()
+                print(f"LLM error: {response.status_code} - {body.decode('utf-8', 'replace')}")
+                return
+            import json
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    print(f"LLM stream error: {data['error']}")
+                    return
+                piece = data.get("response")
+                if piece:
+                    yield piece
+                if data.get("done"):
+                    if session is not None:
+                        session.update(data.get("context"))
+                    return
+    except Exception as e:
+        print(f"LLM stream failed: {e}")
+
 async def llm_can_equip(character, item, ollama_host, ollama_model):
     """
     Ask the LLM if the character can equip the item, and in which slot. Returns dict:
-    { 'allowed': bool, 'slot': str or None, 'reason': str }
+    { 'allowed': bool, 'slot': str or None, 'reason': str, 'item': inventory name }
+    Inventory and equipped checks are made here, so the cached prompt depends only on
+    race, class and item and is shared by every character of that race and class.
     """
+    owned = next((entry for entry in character.inventory if entry.lower() == item.strip().lower()), None)
+    if owned is None:
+        return {"allowed": False, "slot": None, "reason": f"'{item}' is not in your inventory.", "item": item}
+    if owned in character.equipped.values():
+        return {"allowed": False, "slot": None, "reason": f"{owned} is already equipped.", "item": owned}
     prompt = f"""
-A player wishes to equip an item. Here is their character sheet:
-Name: {character.name}\nRace: {character.race}\nClass: {character.char_class}\nAbilities: {character.abilities}\nInventory: {character.inventory}\nEquipped: {character.equipped}\n
-The player says: 'equip my {item}'.
+A player wishes to equip an item they carry.
+Race: {character.race}\nClass: {character.char_class}\nItem: {owned}
 
-As the DM, decide if this character can equip this item, considering their race, class, and any reasonable fantasy logic. If allowed, specify the equipment slot (e.g., Weapon, Armor, Shield, etc). If not, explain why. Respond in JSON: {{ "allowed": true/false, "slot": "SlotName" or null, "reason": "short explanation" }}. Only output valid JSON."
+As the DM, decide if a character of this race and class can equip this item, considering any reasonable fantasy logic. If allowed, specify the equipment slot (e.g., Weapon, Armor, Shield, etc). If not, explain why. Respond in JSON: {{ "allowed": true/false, "slot": "SlotName" or null, "reason": "short explanation" }}. Only output valid JSON."
     """
-    response = await get_llm_response(prompt, ollama_host, ollama_model)
+    response = await get_llm_response(prompt, ollama_host, ollama_model, cache=True)
     import json
     try:
-        return json.loads(response)
+        result = json.loads(response)
     except Exception:
-        return {"allowed": False, "slot": None, "reason": "LLM response could not be parsed."}
+        return {"allowed": False, "slot": None, "reason": "LLM response could not be parsed.", "item": owned}
+    result["item"] = owned
+    return result
 
 # State-specific LLM prompts for the Discord bot state engine
 SESSION_ZERO_QA_PROMPT = (
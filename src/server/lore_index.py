@@ -0,0 +1,162 @@
+import math
+import re
+from collections import Counter
+from pathlib import Path
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:['-][a-z0-9]+)*")
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have he her his in into is it its of on or she that the their them
+they this to was were will with you your our we not no so if then than there these those which who what when where
+""".split())
+
+# Scope of the example markdown files; generated text is indexed under its campaign id
+EXAMPLES_SCOPE = "examples"
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+def describe_markdown(content):
+    """Title (first heading or 'Campaign:' line) and first paragraph after it."""
+    lines = content.splitlines()
+    title = next((l.strip('# ').strip() for l in lines if l.startswith('#') or l.lower().startswith('campaign:')), "Example Adventure")
+    desc = ""
+    for i, l in enumerate(lines):
+        if l.startswith('#') or l.lower().startswith('campaign:'):
+            # Find next non-empty, non-heading line
+            for l2 in lines[i+1:]:
+                if l2.strip() and not l2.startswith('#') and not l2.lower().startswith('campaign:'):
+                    desc = l2.strip()
+                    break
+            break
+    return title, desc
+
+def chunk_markdown(content, max_words: int = 160):
+    """
+    Split markdown into chunks of about max_words words along paragraph boundaries.
+    Each chunk is prefixed with its nearest heading so it still makes sense on its own.
+    """
+    chunks = []
+    heading = ""
+    current = []
+    words = 0
+
+    def flush():
+        nonlocal current, words
+        if current:
+            body = "\n".join(current).strip()
+            if body:
+                chunks.append(f"{heading}\n{body}" if heading else body)
+        current, words = [], 0
+
+    for block in re.split(r"\n\s*\n", content):
+        block = block.strip()
+        if not block or set(block) <= set("-*_ "):
+            continue
+        if block.startswith("#"):
+            flush()
+            first, _, rest = block.partition("\n")
+            heading = first.strip("# ").strip()
+            block = rest.strip()
+            if not block:
+                continue
+        size = len(block.split())
+        if current and words + size > max_words:
+            flush()
+        current.append(block)
+        words += size
+    flush()
+    return chunks
+
+class LoreIndex:
+    """
+    In-memory BM25 index over chunks of lore: the example adventures/campaigns,
+    loaded once at startup, plus generated campaign, adventure and room text.
+    Documents are replaced wholesale by re-adding the same doc_id.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, chunk_words: int = 160):
+        self.k1 = k1
+        self.b = b
+        self.chunk_words = chunk_words
+        self.chunks = {}
+        self.documents = {}
+        self._postings = {}
+        self._next_id = 0
+        self._total_length = 0
+
+    @classmethod
+    def from_directories(cls, directories, **kwargs):
+        index = cls(**kwargs)
+        for directory in directories:
+            for path in sorted(Path(directory).glob("*.md")):
+                index.add_markdown(path)
+        return index
+
+    def add_markdown(self, path, scope=EXAMPLES_SCOPE):
+        path = Path(path)
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        title, desc = describe_markdown(content)
+        self.add(str(path), content, scope=scope, title=title, description=desc)
+
+    def add(self, doc_id, text, scope=EXAMPLES_SCOPE, title="", description=""):
+        """Index text under doc_id, replacing any earlier version of the same document."""
+        self.remove(doc_id)
+        chunk_ids = []
+        for body in chunk_markdown(text, self.chunk_words):
+            terms = Counter(tokenize(body))
+            if not terms:
+                continue
+            chunk_id = self._next_id
+            self._next_id += 1
+            length = sum(terms.values())
+            self.chunks[chunk_id] = {"doc_id": doc_id, "scope": scope, "text": body, "length": length}
+            self._total_length += length
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[chunk_id] = tf
+            chunk_ids.append(chunk_id)
+        self.documents[doc_id] = {"doc_id": doc_id, "scope": scope, "title": title, "description": description, "chunks": chunk_ids}
+
+    def remove(self, doc_id):
+        doc = self.documents.pop(doc_id, None)
+        if doc is None:
+            return
+        for chunk_id in doc["chunks"]:
+            chunk = self.chunks.pop(chunk_id)
+            self._total_length -= chunk["length"]
+            for term in set(tokenize(chunk["text"])):
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(chunk_id, None)
+                    if not postings:
+                        del self._postings[term]
+
+    def remove_scope(self, scope):
+        for doc_id in [d for d, doc in self.documents.items() if doc["scope"] == scope]:
+            self.remove(doc_id)
+
+    def documents_in(self, scope=EXAMPLES_SCOPE):
+        return [doc for doc in self.documents.values() if doc["scope"] == scope]
+
+    def search(self, query, k: int = 4, scopes=None, doc_id=None):
+        """Top-k chunks for query as dicts with doc_id, scope, text and score, best first."""
+        n = len(self.chunks)
+        if not n:
+            return []
+        avg_length = self._total_length / n
+        scores = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings.items():
+                chunk = self.chunks[chunk_id]
+                if scopes is not None and chunk["scope"] not in scopes:
+                    continue
+                if doc_id is not None and chunk["doc_id"] != doc_id:
+                    continue
+                norm = tf + self.k1 * (1 - self.b + self.b * chunk["length"] / avg_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [dict(self.chunks[chunk_id], score=score) for chunk_id, score in best]
@@ -0,0 +1,170 @@
+import heapq
+from room_utils import get_room_key
+
+def normalize_exits(exits):
+    """
+    Canonical exit schema: {label: location name}. Older rooms store a plain list of
+    location names; each becomes an exit labelled with its lower-cased name.
+    """
+    if not exits:
+        return {}
+    if isinstance(exits, dict):
+        return {str(label).strip().lower(): str(target).strip() for label, target in exits.items() if str(target).strip()}
+    return {str(target).strip().lower(): str(target).strip() for target in exits if str(target).strip()}
+
+def room_name(key, room):
+    return (room or {}).get("name") or key.replace("_", " ").title()
+
+class RoomGraph:
+    """
+    Adjacency graph over a campaign's RoomStore, kept in sync through the store's
+    listeners. Indexes every room by key and display name and every exit by label and
+    target name, so resolving "go <exit>" or "travel to <room>" is a dict lookup.
+    Multi-hop routes use Dijkstra over exit weights (exits may carry a "distance"
+    in the room's optional "exit_distances" map; default 1).
+    """
+
+    def __init__(self, room_store):
+        self.store = room_store
+        self.names = {}
+        self.edges = {}
+        self.aliases = {}
+        # Bumped whenever a room is re-indexed, so callers can cache per-room derived data
+        self.versions = {}
+        self._built = False
+        room_store.listeners.append(self.update_room)
+
+    def _build(self):
+        if self._built:
+            return
+        self._built = True
+        for key, room in list(self.store.all().items()):
+            self.update_room(key, room)
+
+    def update_room(self, key, room):
+        """Re-index one room after it was set."""
+        if not self._built:
+            # Nothing indexed yet; the first query builds everything from the store
+            return
+        self.names.setdefault(key, room_name(key, room))
+        if room and room.get("name"):
+            self.names[key] = room["name"]
+        exits = normalize_exits((room or {}).get("exits"))
+        distances = (room or {}).get("exit_distances", {})
+        edges = {}
+        aliases = {}
+        for label, target in exits.items():
+            target_key = get_room_key(target)
+            edges[target_key] = min(edges.get(target_key, float("inf")), float(distances.get(label, 1)))
+            aliases[label] = target
+            aliases[target.lower()] = target
+            # Exits can point at rooms that have not been generated yet
+            self.names.setdefault(target_key, target)
+        self.edges[key] = edges
+        self.aliases[key] = aliases
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def name_of(self, location):
+        self._build()
+        key = get_room_key(location)
+        return self.names.get(key, location)
+
+    def has_room(self, location):
+        self._build()
+        return get_room_key(location) in self.names
+
+    def exit_aliases(self, location):
+        """{alias: target location name} for the room at location."""
+        self._build()
+        return self.aliases.get(get_room_key(location), {})
+
+    def version(self, location):
+        self._build()
+        return self.versions.get(get_room_key(location), 0)
+
+    def resolve_exit(self, location, text):
+        """Target of the exit of location called text (label or target name), else None."""
+        return self.exit_aliases(location).get(text.strip().lower())
+
+    def neighbours(self, location):
+        self._build()
+        return self.edges.get(get_room_key(location), {})
+
+    def shortest_path(self, start, goal):
+        """Room names along the cheapest route from start to goal (both included), or None."""
+        self._build()
+        start_key, goal_key = get_room_key(start), get_room_key(goal)
+        if start_key == goal_key:
+            return [self.name_of(start)]
+        dist = {start_key: 0.0}
+        previous = {}
+        heap = [(0.0, start_key)]
+        while heap:
+            cost, key = heapq.heappop(heap)
+            if key == goal_key:
+                break
+            if cost > dist.get(key, float("inf")):
+                continue
+            for neighbour, weight in self.edges.get(key, {}).items():
+                new_cost = cost + weight
+                if new_cost < dist.get(neighbour, float("inf")):
+                    dist[neighbour] = new_cost
+                    previous[neighbour] = key
+                    heapq.heappush(heap, (new_cost, neighbour))
+        if goal_key not in previous:
+            return None
+        path = [goal_key]
+        while path[-1] != start_key:
+            path.append(previous[path[-1]])
+        return [self.names.get(key, key) for key in reversed(path)]
+
+    def _undirected(self):
+        adjacency = {key: set() for key in self.names}
+        for key, edges in self.edges.items():
+            for neighbour in edges:
+                adjacency.setdefault(key, set()).add(neighbour)
+                adjacency.setdefault(neighbour, set()).add(key)
+        return adjacency
+
+    def components(self):
+        """Connected groups of room names (exits treated as two-way), largest first."""
+        self._build()
+        adjacency = self._undirected()
+        seen = set()
+        groups = []
+        for key in adjacency:
+            if key in seen:
+                continue
+            seen.add(key)
+            stack = [key]
+            group = []
+            while stack:
+                current = stack.pop()
+                group.append(self.names.get(current, current))
+                for neighbour in adjacency[current]:
+                    if neighbour not in seen:
+                        seen.add(neighbour)
+                        stack.append(neighbour)
+            groups.append(sorted(group))
+        groups.sort(key=len, reverse=True)
+        return groups
+
+    def orphans(self, start=None):
+        """
+        Generated rooms with no exits in or out, or, given start, every generated
+        room that cannot be reached from start.
+        """
+        self._build()
+        generated = set(self.edges)
+        if start is None:
+            adjacency = self._undirected()
+            return sorted(self.names[key] for key in generated if not adjacency.get(key))
+        reachable = set()
+        stack = [get_room_key(start)]
+        while stack:
+            key = stack.pop()
+            if key in reachable:
+                continue
+            reachable.add(key)
+            stack.extend(self.edges.get(key, {}))
+        return sorted(self.names[key] for key in generated - reachable)
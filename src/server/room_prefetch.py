@@ -0,0 +1,71 @@
+import asyncio
+from room_utils import get_room_key
+from room_graph import normalize_exits
+
+def exit_targets(exits):
+    """Location names reachable from a room's exits (dict of direction -> location, or a list)."""
+    return list(dict.fromkeys(normalize_exits(exits).values()))
+
+class RoomPrefetcher:
+    """
+    Speculatively generates unvisited neighbouring rooms while players read the current one.
+    Rooms are stored with "provisional": True until a player actually enters them.
+    At most max_pending generations are queued or running at any time.
+    """
+
+    def __init__(self, generate_room, get_room, set_room, max_pending: int = 3, on_generated=None):
+        self.generate_room = generate_room
+        self.get_room = get_room
+        self.set_room = set_room
+        self.max_pending = max_pending
+        self.on_generated = on_generated
+        self._pending = {}
+
+    @property
+    def enabled(self):
+        return self.max_pending > 0
+
+    def schedule(self, from_location, exits):
+        """Queue generation for every exit of from_location that has no room yet, within budget."""
+        if not self.enabled:
+            return
+        for target in exit_targets(exits):
+            if len(self._pending) >= self.max_pending:
+                return
+            key = get_room_key(target)
+            if key in self._pending or key == get_room_key(from_location) or self.get_room(target):
+                continue
+            self._pending[key] = asyncio.get_running_loop().create_task(self._prefetch(key, target, from_location))
+
+    async def wait_for(self, location):
+        """If location is being prefetched, wait for it and return the room (else None)."""
+        task = self._pending.get(get_room_key(location))
+        if task is None:
+            return None
+        try:
+            await asyncio.shield(task)
+        except Exception:
+            return None
+        return self.get_room(location)
+
+    async def _prefetch(self, key, target, from_location):
+        try:
+            room = await self.generate_room(target, from_location, background=True)
+            # A player may have walked in (and generated the room) while we were waiting
+            if room and not self.get_room(target):
+                room["provisional"] = True
+                self.set_room(target, room)
+                if self.on_generated:
+                    self.on_generated(target, room)
+        except Exception as e:
+            print(f"[Bot] Prefetch of room {target} failed: {e}")
+        finally:
+            self._pending.pop(key, None)
+
+    def pending(self):
+        return len(self._pending)
+
+    async def aclose(self):
+        for task in list(self._pending.values()):
+            task.cancel()
+        self._pending.clear()
@@ -1,37 +1,185 @@
-import json
 import re
+from pathlib import Path
+from storage import DEFAULT_CAMPAIGN_ID
+from utils.file_utils import atomic_write_bytes
+from file_io import default_io
+import serializer
 
 def get_room_key(location):
     return location.lower().replace(" ", "_")
 
+class RoomStore:
+    """
+    Rooms of one campaign, read through row by row from a SQLiteStorage when one is
+    configured. Otherwise rooms.json is a snapshot and every set() appends one JSON line
+    to rooms.jsonl next to it, so a room edit costs the size of the room rather than
+    the size of the world. Both are replayed lazily on first access, and the journal is
+    folded into a new snapshot once it holds more than compact_after entries (and on close).
+    """
+
+    def __init__(self, path=None, storage=None, campaign_id=DEFAULT_CAMPAIGN_ID, compact_after: int = 256):
+        self.path = Path(path) if path is not None else None
+        self.storage = storage
+        self.campaign_id = campaign_id
+        self.compact_after = compact_after
+        self.rooms = {}
+        # Called as listener(room_key, data) after every set() (see room_graph.RoomGraph)
+        self.listeners = []
+        self._loaded = False
+        self._journal = None
+        self._journal_entries = 0
+
+    @property
+    def journal_path(self):
+        return self.path.with_suffix(".jsonl") if self.path is not None else None
+
+    def load(self):
+        """Read the snapshot and journal now rather than on first access."""
+        self._load()
+        return self
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.storage is not None or self.path is None:
+            return
+        loaded = {}
+        if self.path.exists():
+            loaded = serializer.load_file(self.path)
+        if self.journal_path.exists():
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    try:
+                        entry = serializer.loads(line)
+                    except ValueError:
+                        # Torn last line from a crash mid-append
+                        continue
+                    loaded[entry["key"]] = entry["room"]
+                    self._journal_entries += 1
+        # Rooms set before the lazy load win over what was on disk
+        loaded.update(self.rooms)
+        self.rooms = loaded
+
+    def get(self, location):
+        key = get_room_key(location)
+        self._load()
+        room = self.rooms.get(key)
+        if room is None and self.storage is not None:
+            # self.rooms acts as a read-through cache over the SQLite rooms table
+            room = self.storage.get_room(key, self.campaign_id)
+            if room is not None:
+                self.rooms[key] = room
+        return room
+
+    def set(self, location, data):
+        key = get_room_key(location)
+        self._load()
+        self.rooms[key] = data
+        if self.storage is not None:
+            self.storage.put_room(key, data, self.campaign_id)
+        else:
+            self._append(key, data)
+        for listener in self.listeners:
+            listener(key, data)
+
+    def all(self):
+        """Every room of the campaign keyed by room key."""
+        self._load()
+        if self.storage is not None:
+            self.rooms.update(self.storage.load_rooms(self.campaign_id))
+        return self.rooms
+
+    def _check_path(self):
+        if self.path is None:
+            raise RuntimeError(
+                "ROOMS_DB_PATH is not set. Cannot save rooms database. "
+                "Call set_rooms_db_path(pathlib.Path(...)) before using set_room()."
+            )
+
+    # Journal and snapshot writes run on the file I/O pool, queued on the journal's path
+    # so appends, compactions and the final close happen in order. Rooms are serialized
+    # on the caller's side, so later edits to a room dict cannot race the write.
+
+    def _append(self, key, data):
+        self._check_path()
+        self._journal_entries += 1
+        default_io.submit(self.journal_path, self._write_journal, serializer.dumps({"key": key, "room": data}, pretty=False) + b"\n")
+        if self._journal_entries > self.compact_after:
+            self.save()
+
+    def _write_journal(self, line):
+        if self._journal is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            _drop_torn_tail(self.journal_path)
+            self._journal = open(self.journal_path, "ab")
+        self._journal.write(line)
+        self._journal.flush()
+
+    def save(self):
+        """Write a full rooms.json snapshot and empty the journal (compaction)."""
+        self._check_path()
+        self._load()
+        self._journal_entries = 0
+        return default_io.submit(self.journal_path, self._compact, serializer.dumps(self.rooms))
+
+    def _compact(self, snapshot):
+        atomic_write_bytes(self.path, snapshot)
+        # A crash before the truncate only replays entries the snapshot already has
+        self._close_journal()
+        if self.journal_path.exists():
+            open(self.journal_path, "w").close()
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def close(self):
+        """Compact any journalled changes and release the journal file."""
+        if self.storage is None and self._journal_entries:
+            self.save()
+        if self.path is not None:
+            return default_io.submit(self.journal_path, self._close_journal)
+
+    async def aclose(self):
+        """close(), then wait for the queued journal work to reach the disk."""
+        self.close()
+        if self.path is not None:
+            await default_io.drain(self.journal_path)
+
+def _drop_torn_tail(journal_path):
+    """Cut a partial last line left by a crash mid-append, so the next entry starts on its own line."""
+    try:
+        f = open(journal_path, "r+b")
+    except FileNotFoundError:
+        return
+    with f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+            print(f"[Storage] Dropped a torn last entry from {journal_path}")
+
+# Module-level store used by the get_room/set_room helpers (single-campaign callers and tools).
+# The bot itself keeps one RoomStore per campaign (see campaigns.CampaignContext).
+default_room_store = RoomStore()
+
 def get_room(location):
-    key = get_room_key(location)
-    # Assumes rooms_db is set externally
-    global rooms_db
-    return rooms_db.get(key)
+    return default_room_store.get(location)
 
 def set_room(location, data):
-    key = get_room_key(location)
-    global rooms_db
-    rooms_db[key] = data
-    save_rooms_db()
+    default_room_store.set(location, data)
 
 def set_rooms_db_path(path):
-    """Set the global ROOMS_DB_PATH variable."""
-    global ROOMS_DB_PATH
-    ROOMS_DB_PATH = path
+    """Set the rooms.json path of the default room store."""
+    default_room_store.path = Path(path)
+
+def set_rooms_storage(storage):
+    """Persist the default room store row-by-row in a SQLiteStorage instead of rewriting rooms.json."""
+    default_room_store.storage = storage
 
 def save_rooms_db():
-    # Assumes ROOMS_DB_PATH and rooms_db are set externally
-    global ROOMS_DB_PATH, rooms_db
-    if ROOMS_DB_PATH is None:
-        raise RuntimeError(
-            "ROOMS_DB_PATH is not set. Cannot save rooms database. "
-            "Call set_rooms_db_path(pathlib.Path(...)) before using set_room()."
-        )
-    ROOMS_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(ROOMS_DB_PATH, "w", encoding="utf-8") as f:
-        json.dump(rooms_db, f, indent=2)
+    default_room_store.save()
 
 def extract_exits_from_dm(dm_text):
     if not dm_text:
@@ -44,7 +192,3 @@ def extract_exits_from_dm(dm_text):
         exits_line = matches[-1]
         exits = [e.strip() for e in exits_line.split(",") if e.strip() and e.strip().lower() != 'none']
     return exits
-
-# These globals must be set by the main server module:
-rooms_db = {}
-ROOMS_DB_PATH = None
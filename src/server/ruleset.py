@@ -1,6 +1,4 @@
 import random
-import json
-from pathlib import Path
 
 # --- Basic d20 Ruleset (Distilled) ---
 
@@ -70,10 +68,7 @@ STARTING_INVENTORY = {
     # Add more as needed
 }
 
-# Load shop items from tracked gear.json
-GEAR_JSON_PATH = Path(__file__).parent / "gear" / "gear.json"
-with open(GEAR_JSON_PATH, "r", encoding="utf-8") as f:
-    SHOP_ITEMS = json.load(f)
+# Shop items live in gear/gear.json; see gear_catalog.default_catalog
 
 def generate_ability_scores():
     """Generate ability scores using 4d6k3 for each ability."""
@@ -82,8 +77,20 @@ def generate_ability_scores():
         abilities[ability] = roll_4d6k3()
     return abilities
 
+# Bumped whenever Character.to_dict's layout changes; from_dict upgrades older records
+CHARACTER_SCHEMA_VERSION = 1
+# Assigning any of these drops the cached derived stats
+STAT_FIELDS = frozenset(("abilities", "skills"))
+
+def split_race_class(race_class):
+    """'Elf Street Samurai' -> ('Elf', 'Street Samurai'), as typed during character creation."""
+    race, _, char_class = (race_class or "").strip().partition(" ")
+    return race, char_class.strip()
+
 class Character:
-    def __init__(self, name, race, char_class, abilities=None, skills=None, advantages=None, powers=None, pp=20, inventory=None, backstory=None, equipped=None):
+    __slots__ = ("name", "race", "char_class", "race_class", "abilities", "skills", "advantages", "powers", "pp", "inventory", "backstory", "equipped", "_stats")
+
+    def __init__(self, name, race="", char_class="", abilities=None, skills=None, advantages=None, powers=None, pp=20, inventory=None, backstory=None, equipped=None, race_class=None):
         """
         DYSTOPIAN SCI-FI FUTURE SETTING: The world is a grim, high-tech society with advanced technology, cybernetic enhancements, and powerful corporations. Magic is rare or replaced by psionics and advanced science. Please create your character to fit this setting (e.g., cybernetics, hacking, futuristic weapons, etc).
 
@@ -94,21 +101,110 @@ class Character:
         pp: Power Points available
         inventory: list of items carried
         equipped: dict mapping slot (e.g., 'Weapon', 'Armor') to item name
+        race_class: race and class as the player typed them; split into race/char_class if those are not given
         """
+        if race_class and not (race or char_class):
+            race, char_class = split_race_class(race_class)
+        self._stats = None
         self.name = name
         self.race = race
         self.char_class = char_class
+        self.race_class = race_class or f"{race} {char_class}".strip()
         self.abilities = abilities or generate_ability_scores()
-        self.skills = skills or {skill: 0 for skill, _ in BROAD_SKILLS}
+        self.skills = {skill: 0 for skill, _ in BROAD_SKILLS}
+        self.skills.update(skills or {})
         self.advantages = advantages or []
         self.powers = powers or []
         self.pp = pp
-        self.inventory = inventory or self.get_starting_inventory()
+        self.inventory = inventory if inventory is not None else self.get_starting_inventory()
         self.backstory = backstory or ""
         self.equipped = equipped or {}  # e.g., {'Weapon': 'Longsword', 'Armor': 'Chainmail'}
 
+    def __setattr__(self, name, value):
+        if name in STAT_FIELDS:
+            object.__setattr__(self, "_stats", None)
+        object.__setattr__(self, name, value)
+
+    def __repr__(self):
+        return f"Character({self.name!r}, {self.race_class!r})"
+
+    def to_dict(self):
+        """JSON-ready record; zero skill ranks are left out."""
+        return {
+            "version": CHARACTER_SCHEMA_VERSION,
+            "name": self.name,
+            "race": self.race,
+            "char_class": self.char_class,
+            "race_class": self.race_class,
+            "backstory": self.backstory,
+            "abilities": self.abilities,
+            "skills": {skill: rank for skill, rank in self.skills.items() if rank},
+            "advantages": self.advantages,
+            "powers": self.powers,
+            "pp": self.pp,
+            "inventory": self.inventory,
+            "equipped": self.equipped
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Build a Character from a saved record. Version 0 records are the bare
+        {'name', 'race_class', 'backstory'} dicts written by character creation; their
+        missing fields (abilities, starting inventory, ...) are generated here.
+        """
+        version = data.get("version", 0)
+        if version > CHARACTER_SCHEMA_VERSION:
+            raise ValueError(f"Character record version {version} is newer than supported ({CHARACTER_SCHEMA_VERSION})")
+        return cls(
+            data.get("name", ""),
+            race=data.get("race", ""),
+            char_class=data.get("char_class", ""),
+            race_class=data.get("race_class"),
+            abilities=data.get("abilities"),
+            skills=data.get("skills"),
+            advantages=data.get("advantages"),
+            powers=data.get("powers"),
+            pp=data.get("pp", 20),
+            inventory=data.get("inventory"),
+            backstory=data.get("backstory"),
+            equipped=data.get("equipped")
+        )
+
+    def invalidate(self):
+        """Drop cached derived stats; needed after changing abilities or skills in place."""
+        self._stats = None
+
+    def set_skill(self, skill, rank):
+        if skill not in self.skills:
+            raise ValueError(f"Unknown skill: {skill}")
+        self.skills[skill] = rank
+        self._stats = None
+
+    def set_ability(self, ability, value):
+        self.abilities[ability] = value
+        self._stats = None
+
+    @property
+    def stats(self):
+        """Unmodified defenses, saves, HP and initiative, computed once until abilities or skills change."""
+        if self._stats is None:
+            self._stats = {
+                "hit_points": self.hit_points(),
+                "initiative": self.initiative(),
+                "melee_defense": self.melee_defense(),
+                "ranged_defense": self.ranged_defense(),
+                "melee_attack": self.melee_attack_bonus(),
+                "ranged_attack": self.ranged_attack_bonus(),
+                "fortitude": self.fortitude_save(),
+                "reflex": self.reflex_save(),
+                "toughness": self.toughness_save(),
+                "will": self.will_save()
+            }
+        return self._stats
+
     def get_starting_inventory(self):
-        return STARTING_INVENTORY.get((self.race, self.char_class), ["Rations", "Backpack"])
+        return list(STARTING_INVENTORY.get((self.race, self.char_class), ["Rations", "Backpack"]))
 
     def equip_item(self, item, slot):
         """Equip an item from inventory to a slot (e.g., 'Weapon', 'Armor')."""
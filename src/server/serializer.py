@@ -0,0 +1,92 @@
+"""
+JSON codec for everything the bot persists (state files, the room journal, SQLite rows).
+Uses orjson or msgspec when installed and falls back to the stdlib json module. State
+is written compact by default; pretty (indented) output is for exports and debugging,
+turned on with set_pretty(True) / PRETTY_JSON=1. loads() reads either form, so files
+written in one mode load fine in the other.
+
+    python src/server/serializer.py db/campaign_state.json --pretty   # reformat in place
+"""
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+if orjson is not None:
+    BACKEND = "orjson"
+elif msgspec is not None:
+    BACKEND = "msgspec"
+else:
+    BACKEND = "json"
+
+PRETTY = os.getenv("PRETTY_JSON", "").lower() in ("1", "true", "yes")
+
+def set_pretty(pretty: bool):
+    """Indent state files (for debugging) instead of writing them compact."""
+    global PRETTY
+    PRETTY = bool(pretty)
+
+if orjson is not None:
+    _ORJSON_OPTS = orjson.OPT_NON_STR_KEYS
+
+    def _dumps(obj, pretty):
+        return orjson.dumps(obj, option=_ORJSON_OPTS | orjson.OPT_INDENT_2 if pretty else _ORJSON_OPTS)
+
+    _loads = orjson.loads
+elif msgspec is not None:
+    _encoder = msgspec.json.Encoder()
+    _decoder = msgspec.json.Decoder()
+
+    def _dumps(obj, pretty):
+        data = _encoder.encode(obj)
+        return msgspec.json.format(data, indent=2) if pretty else data
+
+    def _loads(data):
+        # Raise ValueError like the other backends (msgspec.DecodeError is not one)
+        try:
+            return _decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+else:
+    # ensure_ascii stays on: the C encoder only has a fast path for ASCII output
+    def _dumps(obj, pretty):
+        if pretty:
+            return json.dumps(obj, indent=2).encode("utf-8")
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    _loads = json.loads
+
+def dumps(obj, pretty=None) -> bytes:
+    """UTF-8 JSON for obj; compact unless pretty (default: the PRETTY setting)."""
+    return _dumps(obj, PRETTY if pretty is None else pretty)
+
+def dumps_str(obj, pretty=None) -> str:
+    return dumps(obj, pretty).decode("utf-8")
+
+def loads(data):
+    """Parse JSON from bytes or str, compact or indented. Raises ValueError on bad input."""
+    return _loads(data)
+
+def load_file(path):
+    with open(path, "rb") as f:
+        return _loads(f.read())
+
+if __name__ == "__main__":
+    import argparse
+    from pathlib import Path
+    from utils.file_utils import atomic_write_bytes
+    parser = argparse.ArgumentParser(description="Rewrite JSON state files compact or indented")
+    parser.add_argument('paths', nargs='+', help='JSON files to rewrite in place')
+    parser.add_argument('--pretty', action='store_true', help='Indent for reading/diffing (default: compact)')
+    args = parser.parse_args()
+    for path in map(Path, args.paths):
+        before = path.stat().st_size
+        atomic_write_bytes(path, dumps(load_file(path), pretty=args.pretty))
+        print(f"[Storage] {path}: {before} -> {path.stat().st_size} bytes ({BACKEND})")
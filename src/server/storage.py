@@ -0,0 +1,294 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+import serializer
+
+DEFAULT_CAMPAIGN_ID = "default"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS campaigns (
+    campaign_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS characters (
+    campaign_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (campaign_id, user_id)
+);
+CREATE TABLE IF NOT EXISTS rooms (
+    campaign_id TEXT NOT NULL,
+    room_key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (campaign_id, room_key)
+);
+CREATE TABLE IF NOT EXISTS world_images (
+    location TEXT PRIMARY KEY,
+    filename TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS image_blobs (
+    key TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    checksum TEXT NOT NULL,
+    verified_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    variants TEXT NOT NULL,
+    last_served REAL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# Statements are module constants so sqlite3's statement cache reuses the prepared form
+SQL_GET_META = "SELECT value FROM meta WHERE key = ?"
+SQL_PUT_META = "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value"
+SQL_GET_CAMPAIGN = "SELECT state FROM campaigns WHERE campaign_id = ?"
+SQL_PUT_CAMPAIGN = "INSERT INTO campaigns (campaign_id, state) VALUES (?, ?) ON CONFLICT(campaign_id) DO UPDATE SET state = excluded.state"
+SQL_ALL_CHARACTERS = "SELECT user_id, data FROM characters WHERE campaign_id = ?"
+SQL_PUT_CHARACTER = "INSERT INTO characters (campaign_id, user_id, data) VALUES (?, ?, ?) ON CONFLICT(campaign_id, user_id) DO UPDATE SET data = excluded.data"
+SQL_DELETE_CHARACTER = "DELETE FROM characters WHERE campaign_id = ? AND user_id = ?"
+SQL_GET_ROOM = "SELECT data FROM rooms WHERE campaign_id = ? AND room_key = ?"
+SQL_ALL_ROOMS = "SELECT room_key, data FROM rooms WHERE campaign_id = ?"
+SQL_PUT_ROOM = "INSERT INTO rooms (campaign_id, room_key, data) VALUES (?, ?, ?) ON CONFLICT(campaign_id, room_key) DO UPDATE SET data = excluded.data"
+SQL_GET_IMAGE = "SELECT filename FROM world_images WHERE location = ?"
+SQL_ALL_IMAGES = "SELECT location, filename FROM world_images"
+SQL_PUT_IMAGE = "INSERT INTO world_images (location, filename) VALUES (?, ?) ON CONFLICT(location) DO UPDATE SET filename = excluded.filename"
+SQL_ALL_IMAGE_BLOBS = "SELECT key, filename, size, checksum, verified_at, created_at, variants, last_served, hits FROM image_blobs"
+SQL_PUT_IMAGE_BLOB = (
+    "INSERT INTO image_blobs (key, filename, size, checksum, verified_at, created_at, variants, last_served, hits) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(key) DO UPDATE SET filename = excluded.filename, size = excluded.size, checksum = excluded.checksum, "
+    "verified_at = excluded.verified_at, created_at = excluded.created_at, variants = excluded.variants, "
+    "last_served = excluded.last_served, hits = excluded.hits"
+)
+SQL_DELETE_IMAGE_BLOB = "DELETE FROM image_blobs WHERE key = ?"
+SQL_DELETE_IMAGE = "DELETE FROM world_images WHERE location = ?"
+SQL_ROOM_CAMPAIGNS = "SELECT DISTINCT campaign_id FROM rooms"
+SQL_CAMPAIGN_IDS = "SELECT campaign_id FROM campaigns"
+# Columns added after a table was first released: (table, column, definition)
+MIGRATIONS = (
+    ("image_blobs", "last_served", "REAL"),
+    ("image_blobs", "hits", "INTEGER NOT NULL DEFAULT 0"),
+)
+
+class SQLiteStorage:
+    """
+    Single SQLite database (WAL mode) holding campaigns, characters, rooms and the
+    world image index. Each room/character/image is its own row, so a write costs
+    the size of the change rather than the size of the world.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            str(self.path),
+            isolation_level=None,  # explicit BEGIN/COMMIT via transaction()
+            check_same_thread=False,
+            cached_statements=128
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._in_transaction = False
+
+    def _migrate(self):
+        for table, column, definition in MIGRATIONS:
+            columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    @contextmanager
+    def transaction(self):
+        """Group several writes into one atomic commit. Nested calls join the outer transaction."""
+        with self._lock:
+            if self._in_transaction:
+                yield self._conn
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._in_transaction = True
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._conn.execute("COMMIT")
+            finally:
+                self._in_transaction = False
+
+    def _fetchone(self, sql, params):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _fetchall(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # --- Meta ---
+    def get_meta(self, key, default=None):
+        row = self._fetchone(SQL_GET_META, (key,))
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self.transaction() as conn:
+            conn.execute(SQL_PUT_META, (key, str(value)))
+
+    # --- Campaigns ---
+    def load_campaign(self, campaign_id=DEFAULT_CAMPAIGN_ID):
+        row = self._fetchone(SQL_GET_CAMPAIGN, (campaign_id,))
+        return serializer.loads(row[0]) if row else None
+
+    def campaign_ids(self):
+        return [row[0] for row in self._fetchall(SQL_CAMPAIGN_IDS)]
+
+    def save_campaign(self, state, campaign_id=DEFAULT_CAMPAIGN_ID):
+        with self.transaction() as conn:
+            conn.execute(SQL_PUT_CAMPAIGN, (campaign_id, serializer.dumps_str(state)))
+
+    # --- Characters ---
+    def load_characters(self, campaign_id=DEFAULT_CAMPAIGN_ID):
+        return {user_id: serializer.loads(data) for user_id, data in self._fetchall(SQL_ALL_CHARACTERS, (campaign_id,))}
+
+    def save_character(self, user_id, data, campaign_id=DEFAULT_CAMPAIGN_ID):
+        with self.transaction() as conn:
+            conn.execute(SQL_PUT_CHARACTER, (campaign_id, str(user_id), serializer.dumps_str(data)))
+
+    def save_characters(self, characters, campaign_id=DEFAULT_CAMPAIGN_ID):
+        with self.transaction() as conn:
+            conn.executemany(
+                SQL_PUT_CHARACTER,
+                [(campaign_id, str(user_id), serializer.dumps_str(data)) for user_id, data in characters.items()]
+            )
+
+    def delete_character(self, user_id, campaign_id=DEFAULT_CAMPAIGN_ID):
+        with self.transaction() as conn:
+            conn.execute(SQL_DELETE_CHARACTER, (campaign_id, str(user_id)))
+
+    # --- Rooms ---
+    def get_room(self, room_key, campaign_id=DEFAULT_CAMPAIGN_ID):
+        row = self._fetchone(SQL_GET_ROOM, (campaign_id, room_key))
+        return serializer.loads(row[0]) if row else None
+
+    def room_campaign_ids(self):
+        return [row[0] for row in self._fetchall(SQL_ROOM_CAMPAIGNS)]
+
+    def load_rooms(self, campaign_id=DEFAULT_CAMPAIGN_ID):
+        return {room_key: serializer.loads(data) for room_key, data in self._fetchall(SQL_ALL_ROOMS, (campaign_id,))}
+
+    def put_room(self, room_key, data, campaign_id=DEFAULT_CAMPAIGN_ID):
+        with self.transaction() as conn:
+            conn.execute(SQL_PUT_ROOM, (campaign_id, room_key, serializer.dumps_str(data)))
+
+    # --- World images ---
+    def get_image(self, location):
+        row = self._fetchone(SQL_GET_IMAGE, (location,))
+        return row[0] if row else None
+
+    def load_images(self):
+        return dict(self._fetchall(SQL_ALL_IMAGES))
+
+    def put_image(self, location, filename):
+        with self.transaction() as conn:
+            conn.execute(SQL_PUT_IMAGE, (location, filename))
+
+    def delete_images(self, locations):
+        with self.transaction() as conn:
+            conn.executemany(SQL_DELETE_IMAGE, [(location,) for location in locations])
+
+    # --- Image store metadata (see image_store.ImageStore) ---
+    def load_image_blobs(self):
+        return {
+            key: {
+                "file": filename,
+                "size": size,
+                "checksum": checksum,
+                "verified_at": verified_at,
+                "created_at": created_at,
+                "variants": serializer.loads(variants),
+                "last_served": last_served,
+                "hits": hits
+            }
+            for key, filename, size, checksum, verified_at, created_at, variants, last_served, hits
+            in self._fetchall(SQL_ALL_IMAGE_BLOBS)
+        }
+
+    def put_image_blob(self, key, meta):
+        with self.transaction() as conn:
+            conn.execute(SQL_PUT_IMAGE_BLOB, _image_blob_row(key, meta))
+
+    def put_image_blobs(self, entries):
+        with self.transaction() as conn:
+            conn.executemany(SQL_PUT_IMAGE_BLOB, [_image_blob_row(key, meta) for key, meta in entries.items()])
+
+    def delete_image_blob(self, key):
+        with self.transaction() as conn:
+            conn.execute(SQL_DELETE_IMAGE_BLOB, (key,))
+
+def _image_blob_row(key, meta):
+    return (
+        key, meta["file"], meta["size"], meta["checksum"], meta["verified_at"], meta["created_at"],
+        serializer.dumps_str(meta.get("variants", {})), meta.get("last_served"), meta.get("hits", 0)
+    )
+
+def _read_json(path):
+    if path.exists():
+        return serializer.load_file(path)
+    return None
+
+def import_json_db(storage: SQLiteStorage, db_dir: Path, campaign_id=DEFAULT_CAMPAIGN_ID, force=False):
+    """
+    One-shot import of the legacy JSON files in db_dir (campaign_state.json,
+    characters.json, rooms.json/rooms.jsonl, worldImages.json, imageStore.json) into storage.
+    Skipped if an import already happened, unless force=True. Returns row counts.
+    """
+    db_dir = Path(db_dir)
+    if storage.get_meta("json_imported") and not force:
+        return None
+    campaign = _read_json(db_dir / "campaign_state.json")
+    characters = _read_json(db_dir / "characters.json") or {}
+    # rooms.json plus any journalled edits in rooms.jsonl
+    from room_utils import RoomStore
+    rooms = RoomStore(db_dir / "rooms.json").all()
+    images = _read_json(db_dir / "worldImages.json") or {}
+    image_blobs = _read_json(db_dir / "imageStore.json") or {}
+    with storage.transaction() as conn:
+        if campaign is not None:
+            conn.execute(SQL_PUT_CAMPAIGN, (campaign_id, serializer.dumps_str(campaign)))
+        conn.executemany(SQL_PUT_CHARACTER, [(campaign_id, str(k), serializer.dumps_str(v)) for k, v in characters.items()])
+        conn.executemany(SQL_PUT_ROOM, [(campaign_id, k, serializer.dumps_str(v)) for k, v in rooms.items()])
+        conn.executemany(SQL_PUT_IMAGE, list(images.items()))
+        conn.executemany(SQL_PUT_IMAGE_BLOB, [_image_blob_row(k, v) for k, v in image_blobs.items()])
+        conn.execute(SQL_PUT_META, ("json_imported", "1"))
+    counts = {
+        "campaign": 1 if campaign is not None else 0,
+        "characters": len(characters),
+        "rooms": len(rooms),
+        "world_images": len(images),
+        "image_blobs": len(image_blobs)
+    }
+    print(f"[Storage] Imported legacy JSON from {db_dir}: {counts}")
+    return counts
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Import legacy db/*.json files into the SQLite store")
+    parser.add_argument('db_dir', type=str, help='Directory containing the legacy JSON files')
+    parser.add_argument('--sqlite-path', type=str, default=None, help='SQLite file (default: <db_dir>/game.sqlite3)')
+    parser.add_argument('--force', action='store_true', help='Re-import even if an import already happened')
+    args = parser.parse_args()
+    db_dir = Path(args.db_dir)
+    storage = SQLiteStorage(Path(args.sqlite_path) if args.sqlite_path else db_dir / "game.sqlite3")
+    import_json_db(storage, db_dir, force=args.force)
+    storage.close()
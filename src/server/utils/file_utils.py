@@ -0,0 +1,24 @@
+import os
+from pathlib import Path
+import serializer
+
+def atomic_write_bytes(path, data: bytes):
+    """Write data to path via a temp file + fsync + rename so readers never see a partial file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    # Persist the rename itself (not supported on Windows)
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def atomic_write_json(path, obj):
+    atomic_write_bytes(path, serializer.dumps(obj))
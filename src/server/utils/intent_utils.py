@@ -0,0 +1,99 @@
+import re
+from collections import namedtuple
+from room_utils import get_room_key
+
+# kind is "move" (name = destination) or "command" (name = command, args = list of words)
+Intent = namedtuple("Intent", "kind name args")
+
+TRAVEL_RE = re.compile(r"\b(?:travel|go|head|walk|run|return|make (?:my|our) way)\s+(?:back\s+)?to\s+(?:the\s+)?([\w' -]+)")
+GO_RE = re.compile(r"\bgo (?!to\b)(\w+)\b")
+# Exit labels too common in ordinary sentences to count as a move unless after "go"
+GENERIC_LABELS = frozenset(["back", "forward", "up", "down", "in", "out", "left", "right", "inside", "outside"])
+
+# "I equip my pistol": only as the whole message and only for an item the player carries
+# (see inventory_item), so "I wield my sword and charge the guard" still goes to the DM
+EQUIP_RE = re.compile(r"^\s*(?:i\s+)?(?:equip|wield|don)\s+(?:my\s+|the\s+|a\s+|an\s+)?(?P<item>[\w' -]+?)\s*[.!]?\s*$")
+
+def inventory_item(phrase, inventory):
+    """The inventory entry phrase names: an exact (case-insensitive) match, else the only entry containing it as whole words."""
+    phrase = phrase.strip().lower()
+    if not phrase:
+        return None
+    for item in inventory:
+        if item.lower() == phrase:
+            return item
+    pattern = re.compile(r"\b" + re.escape(phrase) + r"\b")
+    matches = [item for item in inventory if pattern.search(item.lower())]
+    return matches[0] if len(matches) == 1 else None
+
+# Player phrasings that map onto local commands, answered without an LLM round-trip
+COMMAND_RE = re.compile(
+    r"(?P<shop>\b(?:what(?:'s| is) (?:for sale|in stock)|(?:browse|check|see|visit|open) (?:the )?(?:shop|store|wares|market stall)|show me (?:the |your )?(?:shop|store|wares))\b)"
+    # Dice only: skill checks ("roll for stealth") need the DM to adjudicate them
+    r"|(?P<roll>\broll\s+(?:an?\s+)?(?P<dice>\d*d\d+(?:\s*[+-]\s*\d+)?)\b)"
+)
+
+class IntentDetector:
+    """
+    Classifies a player message before any LLM call. Exit labels and target names of
+    the current room are compiled into one alternation regex, cached per room and
+    rebuilt only when the room graph re-indexes that room; command-like phrasings
+    (shop, dice rolls) come from one precompiled pattern, equips from EQUIP_RE.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self._compiled = {}
+
+    def _exit_pattern(self, location):
+        version = self.graph.version(location)
+        key = get_room_key(location)
+        cached = self._compiled.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1], cached[2]
+        aliases = self.graph.exit_aliases(location)
+        # Longest alias first so "north gate" wins over "north"
+        names = sorted(aliases, key=len, reverse=True)
+        pattern = re.compile(r"\b(?:" + "|".join(re.escape(n) for n in names) + r")\b") if names else None
+        self._compiled[key] = (version, pattern, aliases)
+        return pattern, aliases
+
+    def movement(self, content, location):
+        """Destination named in content ("travel to <known room>", an exit name or label, "go <word>"), else None."""
+        text = content.lower()
+        match = TRAVEL_RE.search(text)
+        if match:
+            destination = match.group(1).strip()
+            if self.graph.has_room(destination):
+                return self.graph.name_of(destination)
+        pattern, aliases = self._exit_pattern(location)
+        if pattern is not None:
+            match = pattern.search(text)
+            # Generic labels such as "back" only count after "go" ("I step back" is not a move)
+            if match and match.group(0) not in GENERIC_LABELS:
+                return aliases[match.group(0)]
+        match = GO_RE.search(text)
+        if not match:
+            return None
+        return aliases.get(match.group(1)) or match.group(1).capitalize()
+
+    def command(self, content, inventory=()):
+        text = content.lower()
+        match = EQUIP_RE.match(text)
+        if match:
+            item = inventory_item(match.group("item"), inventory)
+            if item is not None:
+                return Intent("command", "equip", item.split())
+        match = COMMAND_RE.search(text)
+        if match is None:
+            return None
+        if match.group("shop"):
+            return Intent("command", "shop", [])
+        return Intent("command", "roll", [match.group("dice").replace(" ", "")])
+
+    def detect(self, content, location, inventory=()):
+        """Intent for a player message in location (inventory: the player's items), or None if it should go to the DM."""
+        destination = self.movement(content, location)
+        if destination:
+            return Intent("move", destination, [])
+        return self.command(content, inventory)
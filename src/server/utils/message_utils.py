@@ -1,15 +1,107 @@
-async def send_dm_response(channel, raw_message, exits, world_state, replace_mentions):
+import contextlib
+import time
+
+DISCORD_MAX_LEN = 2000
+
+def format_dm_reply(raw_message, exits, channel, replace_mentions, partial=False):
     import re
-    from discord import File
-    from pathlib import Path
     clean_message = re.sub(r"", "", raw_message, flags=re.DOTALL).strip()
     reply = f"**DM:** {replace_mentions(clean_message, channel)}"
+    if partial:
+        # Exits are only known once the full response has arrived
+        return reply
     if exits:
         reply += f"\n\n**Exits:** {', '.join(exits)}"
     else:
         reply += "\n\n**Exits:** None"
+    return reply
+
+async def send_world_image(channel, world_state):
+    import io
+    from discord import File
+    from pathlib import Path
+    from file_io import default_io
+    from image_utils import note_image_served
     image_path = world_state.get("image")
-    if image_path and Path(image_path).exists():
-        with open(image_path, "rb") as img_fp:
-            await channel.send(file=File(img_fp, Path(image_path).name))
+    image_bytes = await default_io.read_bytes(image_path) if image_path else None
+    if image_bytes:
+        await channel.send(file=File(io.BytesIO(image_bytes), Path(image_path).name))
+        note_image_served(image_path)
+
+async def send_dm_response(channel, raw_message, exits, world_state, replace_mentions):
+    reply = format_dm_reply(raw_message, exits, channel, replace_mentions)
+    await send_world_image(channel, world_state)
     await channel.send(reply)
+
+def split_message(text, max_len=DISCORD_MAX_LEN):
+    """
+    Split text into Discord-sized pages, preferring newline then space boundaries.
+    The whole text is re-split on each call, so page boundaries can move as streamed text
+    grows; StreamingMessage edits every page whose content changed.
+    """
+    pages = []
+    while len(text) > max_len:
+        cut = text.rfind("\n", 0, max_len + 1)
+        if cut <= 0:
+            cut = text.rfind(" ", 0, max_len + 1)
+        if cut <= 0:
+            cut = max_len
+        pages.append(text[:cut])
+        text = text[cut:]
+    pages.append(text)
+    return pages
+
+class StreamingMessage:
+    """
+    Progressively shows streamed LLM text in Discord: the first piece is sent as a new
+    message and later pieces edit it at most once per edit_interval seconds. Text past
+    the 2000-character limit rolls over into additional messages.
+    """
+
+    def __init__(self, channel, render=None, edit_interval=1.0, max_len=DISCORD_MAX_LEN):
+        self.channel = channel
+        self.render = render or (lambda text: text)
+        self.edit_interval = edit_interval
+        self.max_len = max_len
+        self.text = ""
+        self.messages = []
+        self._shown = []
+        self._last_update = 0.0
+
+    async def append(self, piece):
+        self.text += piece
+        if time.monotonic() - self._last_update >= self.edit_interval:
+            await self._show(self.render(self.text))
+
+    async def finish(self, final_content=None):
+        """Show the final content (defaults to the rendered stream) and drop any surplus messages."""
+        content = self.render(self.text) if final_content is None else final_content
+        await self._show(content, final=True)
+        return self.text
+
+    async def _show(self, content, final=False):
+        pages = [p for p in split_message(content, self.max_len) if p.strip()]
+        if not pages:
+            return
+        self._last_update = time.monotonic()
+        for i, page in enumerate(pages):
+            if i < len(self.messages):
+                if self._shown[i] != page:
+                    await self.messages[i].edit(content=page)
+                    self._shown[i] = page
+            else:
+                self.messages.append(await self.channel.send(page))
+                self._shown.append(page)
+        if final:
+            while len(self.messages) > len(pages):
+                await self.messages.pop().delete()
+                self._shown.pop()
+
+async def stream_to_channel(channel, chunks, render=None, edit_interval=1.0):
+    """Consume an async iterator of text pieces into a StreamingMessage. Returns the message (not yet finished)."""
+    streamer = StreamingMessage(channel, render=render, edit_interval=edit_interval)
+    # Close the generator even if a send/edit fails, so it gives back its scheduler slot and HTTP stream
+    async with contextlib.aclosing(chunks):
+        async for piece in chunks:
+            await streamer.append(piece)
+    return streamer